@@ -33,4 +33,7 @@ def create_app(config_class=Config):
     from app.cli import init_app as init_cli
     init_cli(app)
 
+    # Background jobs are started by the one process meant to run them
+    # (gunicorn.conf.py, run.py), see app.tasks.init_scheduler
+
     return app
@@ -1,6 +1,10 @@
+import itertools
+
 import click
 from flask.cli import with_appcontext
 from app.utils.book_cache import BookCache
+from app.utils.content_store import ContentStore
+from app.utils.extractive import DocumentFrequencies, ExtractiveScorer
 
 @click.command('refresh-books')
 @with_appcontext
@@ -10,5 +14,45 @@ def refresh_books_command():
     BookCache.refresh_cache()
     click.echo('Book cache refreshed!')
 
+@click.command('refresh-front-page')
+@with_appcontext
+def refresh_front_page_command():
+    """Rebuild the home page snapshot"""
+    click.echo('Refreshing front page...')
+    if BookCache.refresh_front_page():
+        click.echo('Front page refreshed!')
+    else:
+        click.echo('No front page snapshot available.')
+
+@click.command('build-idf')
+@click.option('--rebuild', is_flag=True, help='Recount every book instead of only new ones')
+@with_appcontext
+def build_idf_command(rebuild):
+    """Count document frequencies over stored book texts for TF-IDF scoring"""
+    from app.models import Book
+    click.echo('Building document frequencies...')
+    # Every stored text (fetched books and uploads), then any text kept only
+    # on the Book row; texts counted before are skipped by content hash
+    books = (
+        Book.query.with_entities(Book.content)
+        .filter(Book.content.isnot(None))
+        .order_by(Book.id)
+        .yield_per(50)
+    )
+    texts = itertools.chain(ContentStore.each(), (content for content, in books))
+    added, table = DocumentFrequencies.update(texts, ExtractiveScorer.shared(), rebuild=rebuild)
+    click.echo(f'Added {added} books; {table.documents} books and {len(table)} words indexed.')
+
+@click.command('scan-library')
+@with_appcontext
+def scan_library_command():
+    """Add a book for each new EPUB in the upload folder"""
+    click.echo('Scanning local library...')
+    added = BookCache.cache_local_books()
+    click.echo(f'Added {added} books.')
+
 def init_app(app):
-    app.cli.add_command(refresh_books_command) 
\ No newline at end of file
+    app.cli.add_command(refresh_books_command)
+    app.cli.add_command(refresh_front_page_command)
+    app.cli.add_command(build_idf_command)
+    app.cli.add_command(scan_library_command)
\ No newline at end of file
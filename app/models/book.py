@@ -17,10 +17,25 @@ class Book(db.Model):
     source = db.Column(db.String(50))
     source_id = db.Column(db.String(100))
     source_url = db.Column(db.String(500))
+    content = db.Column(db.Text)
+    category = db.Column(db.String(50))
+    # Opening paragraphs and size, computed once from the full text
+    preview = db.Column(db.Text)
+    word_count = db.Column(db.Integer)
+    estimated_pages = db.Column(db.Integer)
+    # Filled in by the background summary queue after the book is saved
+    summary = db.Column(db.Text)
+    # Uploaded files are processed in the background: queued, processing, ready or error
+    ingest_status = db.Column(db.String(20))
     accessible_without_login = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     
+    @property
+    def is_ready(self):
+        """False while an uploaded file is still being processed"""
+        return self.ingest_status in (None, 'ready')
+
     @property
     def can_read(self):
         """Check if the book content is available for reading"""
@@ -43,6 +58,20 @@ class Book(db.Model):
     def __repr__(self):
         return f'<Book {self.title}>'
 
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'author': self.author,
+            'cover_url': self.cover_url,
+            'source': self.source,
+            'source_id': self.source_id,
+            'category': self.category,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'summary': self.summary,
+            'ingest_status': self.ingest_status
+        }
+
     @property
     def average_rating(self):
         if not self.reviews:
@@ -1,4 +1,6 @@
-from flask import Blueprint, request, jsonify
+from functools import partial
+from typing import Optional
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from app.models import Book
 from app.extensions import db
@@ -6,8 +8,15 @@ from app.utils.scraper import (
     OpenLibraryScraper, GutenbergScraper, 
     InternetArchiveScraper, StandardEbooksScraper, AnnasArchiveScraper
 )
-from app.utils.summarizer import TextSummarizer
+from app.utils.summarizer import SummarizerRegistry
+from app.utils.ingest import IngestQueue
+from app.utils.pdf_extract import PdfTextExtractor
+from app.utils.summary_cache import SummaryCache
+from app.utils.summary_queue import SummaryQueue
 from app.utils.google_books_api import GoogleBooksAPI
+from app.utils.search_executor import ParallelSearchExecutor
+from app.utils.rate_limiter import RateLimiter
+from app.utils.response_cache import ResponseCache
 
 api_bp = Blueprint('api', __name__)
 
@@ -16,44 +25,29 @@ def search_books():
     query = request.args.get('query', '')
     source = request.args.get('source', 'all')
     
-    results = []
-    
-    # First priority: Open source books
-    if source in ['all', 'archive']:
-        archive_books = InternetArchiveScraper.search_books(query)
-        for book in archive_books:
-            book['source'] = 'archive'
-            book['can_read_online'] = True
-            results.append(book)
-            
-    if source in ['all', 'gutenberg']:
-        gutenberg_books = GutenbergScraper.search_books(query)
-        for book in gutenberg_books:
-            book['source'] = 'gutenberg'
-            book['can_read_online'] = True
-            results.append(book)
-            
-    if source in ['all', 'standard']:
-        standard_books = StandardEbooksScraper.search_books(query)
-        for book in standard_books:
-            book['source'] = 'standard'
-            book['can_read_online'] = True
-            results.append(book)
+    # Source name -> (scraper, whether results are readable online).
+    # Open source books first, then OpenLibrary, then Anna's Archive.
+    sources = {
+        'archive': (InternetArchiveScraper, True),
+        'gutenberg': (GutenbergScraper, True),
+        'standard': (StandardEbooksScraper, True),
+        'openlibrary': (OpenLibraryScraper, None),
+        'annas_archive': (AnnasArchiveScraper, True),
+    }
+    selected = [name for name in sources if source in ['all', name]]
     
-    # Second priority: OpenLibrary
-    if source in ['all', 'openlibrary']:
-        openlibrary_books = OpenLibraryScraper.search_books(query)
-        for book in openlibrary_books:
-            book['source'] = 'openlibrary'
-            book['can_read_online'] = book.get('is_public_domain', False)
-            results.append(book)
+    # Query every source at once; slow sources are dropped at the deadline
+    source_results, timed_out = ParallelSearchExecutor.run(
+        {name: partial(sources[name][0].search_books, query) for name in selected},
+        timeout=current_app.config.get('SEARCH_TIMEOUT')
+    )
     
-    # Add Anna's Archive
-    if source in ['all', 'annas_archive']:
-        annas_books = AnnasArchiveScraper.search_books(query)
-        for book in annas_books:
-            book['source'] = 'annas_archive'
-            book['can_read_online'] = True
+    results = []
+    for name in selected:
+        readable = sources[name][1]
+        for book in source_results.get(name, []):
+            book['source'] = name
+            book['can_read_online'] = book.get('is_public_domain', False) if readable is None else readable
             results.append(book)
     
     # Sort results: Open source books first, then by relevance
@@ -63,7 +57,7 @@ def search_books():
         -x.get('relevance_score', 0)  # Higher scores first
     ))
     
-    return jsonify({'results': results})
+    return jsonify({'results': results, 'timed_out': timed_out})
 
 @api_bp.route('/api/books/save', methods=['POST'])
 @login_required
@@ -103,22 +97,11 @@ def save_book():
                 'message': 'Could not fetch book content'
             }), 404
             
-        # Generate summary if content is available
-        summary = None
-        if content.get('content'):
-            summarizer = TextSummarizer()
-            summary = summarizer.summarize(
-                content['content'][:5000],  # Summarize first 5000 chars
-                method='extractive',
-                length='medium'
-            )
-        
-        # Create new book record
+        # Create new book record; its summary is filled in in the background
         book = Book(
             title=content.get('title', data.get('title', 'Unknown')),
             author=content.get('author', data.get('author', 'Unknown')),
             content=content.get('content'),
-            summary=summary,
             cover_url=content.get('cover_url', data.get('cover_url')),
             source_url=content.get('source_url'),
             source=source,
@@ -134,7 +117,8 @@ def save_book():
         return jsonify({
             'status': 'success',
             'message': 'Book saved successfully',
-            'book': book.to_dict()
+            'book': book.to_dict(),
+            'summary_job_id': _queue_book_summary(book)
         })
         
     except Exception as e:
@@ -151,6 +135,7 @@ def batch_save_books():
         data = request.get_json()
         books = data.get('books', [])
         results = []
+        saved = []
         
         for book_data in books:
             source = book_data.get('source')
@@ -190,6 +175,7 @@ def batch_save_books():
                         user_id=current_user.id
                     )
                     db.session.add(book)
+                    saved.append((book, len(results)))
                     results.append({
                         'book_id': book_id,
                         'status': 'success',
@@ -210,6 +196,9 @@ def batch_save_books():
                 })
                 
         db.session.commit()
+        # Summaries are queued only now that the books have ids
+        for book, index in saved:
+            results[index]['summary_job_id'] = _queue_book_summary(book)
         return jsonify({
             'status': 'success',
             'results': results
@@ -220,4 +209,45 @@ def batch_save_books():
         return jsonify({
             'status': 'error',
             'message': str(e)
-        }), 500 
\ No newline at end of file
+        }), 500
+
+
+@api_bp.route('/api/metrics', methods=['GET'])
+@login_required
+def metrics():
+    """Operational counters for the outbound fetch layer"""
+    return jsonify({
+        'rate_limiter': RateLimiter.metrics(),
+        'response_cache': ResponseCache.stats(),
+        'summarizer': SummarizerRegistry.stats(),
+        'summary_queue': SummaryQueue.stats(),
+        'summary_cache': SummaryCache.stats(),
+        'pdf_extraction': PdfTextExtractor.stats(),
+        'ingest': IngestQueue.stats()
+    })
+
+
+def _queue_book_summary(book: Book) -> Optional[str]:
+    """Queue a summary of the whole book and store it on the book when done"""
+    if not book.content:
+        return None
+    app = current_app._get_current_object()
+    book_id = book.id
+
+    def store(summary: str) -> None:
+        with app.app_context():
+            saved = Book.query.get(book_id)
+            if saved is not None:
+                saved.summary = summary
+                # The model's own session; app.extensions.db isn't bound to the app
+                Book.query.session.commit()
+
+    return SummaryQueue.submit(book.content, method='hierarchical', length='medium', on_done=store)
+
+@api_bp.route('/api/summaries/<job_id>', methods=['GET'])
+def summary_status(job_id):
+    """State of a queued summary; includes the summary once it's done"""
+    status = SummaryQueue.status(job_id)
+    if status is None:
+        return jsonify({'status': 'error', 'message': 'Unknown summary job'}), 404
+    return jsonify(status)
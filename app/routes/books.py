@@ -4,13 +4,16 @@ from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from app.models import Book, ReadingProgress, Bookmark, Review
 from app import db
-from app.utils.file_handler import process_book_file, allowed_file
+from app.utils.file_handler import allowed_file
 from app.utils.book_sources import BookSourceManager
 from app.utils.content_fetcher import BookContentFetcher
 from datetime import datetime
 import logging
 from typing import List
 from app.utils.content_processor import ContentProcessor
+from app.utils.ingest import IngestQueue, UPLOAD_SOURCE, save_upload, thumbnail_path
+from app.utils.summary_cache import SummaryCache
+from app.utils.pagination import BookPager, PagerCache, PAGE_SIZE
 import io
 
 # Set up logger
@@ -18,6 +21,9 @@ logger = logging.getLogger(__name__)
 
 books_bp = Blueprint('books', __name__)
 
+# Upper bound on pages returned by a single reader API call
+MAX_PAGES_PER_REQUEST = 10
+
 @books_bp.route('/books/upload', methods=['GET', 'POST'])
 @login_required
 def upload_book():
@@ -33,25 +39,34 @@ def upload_book():
             
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
-            book_info = process_book_file(filepath)
+            filepath, content_hash = save_upload(file.stream, current_app.config['UPLOAD_FOLDER'], filename)
+            form = {field: request.form.get(field, '').strip() for field in IngestQueue.FORM_FIELDS}
             
+            # Text, page index and cover are extracted in the background
             book = Book(
-                title=request.form.get('title', book_info.get('title', filename)),
-                author=request.form.get('author', book_info.get('author', 'Unknown')),
-                description=request.form.get('description', ''),
+                title=form['title'] or os.path.splitext(filename)[0],
+                author=form['author'] or 'Unknown',
+                description=form['description'],
                 file_path=filepath,
                 file_type=os.path.splitext(filename)[1][1:].upper(),
-                total_pages=book_info.get('total_pages', 0),
+                source=UPLOAD_SOURCE,
+                source_id=content_hash,
+                total_pages=0,
+                ingest_status='queued',
                 user_id=current_user.id
             )
             
             db.session.add(book)
             db.session.commit()
             
-            flash('Book uploaded successfully!', 'success')
+            IngestQueue.submit(
+                current_app._get_current_object(), book,
+                page_size=current_app.config.get('READER_PAGE_SIZE', PAGE_SIZE),
+                cover_url=url_for('books.book_cover', book_id=book.id),
+                fill=[field for field, value in form.items() if not value]
+            )
+            
+            flash('Book uploaded! It will be ready to read in a moment.', 'success')
             return redirect(url_for('books.view_book', book_id=book.id))
             
     return render_template('books/upload.html')
@@ -68,73 +83,128 @@ def view_book(book_id):
         progress = None
     return render_template('books/view.html', book=book, progress=progress)
 
+@books_bp.route('/books/<int:book_id>/cover')
+def book_cover(book_id):
+    """Cover thumbnail made when an uploaded book was ingested"""
+    book = Book.query.get_or_404(book_id)
+    path = thumbnail_path(book.source_id) if book.source == UPLOAD_SOURCE else None
+    if not path or not os.path.exists(path):
+        return jsonify({'status': 'error', 'message': 'No cover'}), 404
+    return send_file(path, mimetype='image/jpeg', max_age=30 * 24 * 60 * 60)
+
+@books_bp.route('/api/books/<int:book_id>/ingest')
+def ingest_status(book_id):
+    """Progress of an uploaded book through the background ingest"""
+    book = Book.query.get_or_404(book_id)
+    # A job lost to a restart is picked up again by whoever asks about it
+    IngestQueue.resume(
+        current_app._get_current_object(), book,
+        page_size=current_app.config.get('READER_PAGE_SIZE', PAGE_SIZE),
+        cover_url=url_for('books.book_cover', book_id=book.id)
+    )
+    status = IngestQueue.status(book_id) or {}
+    # The row has the final word; the job store knows the current step
+    status.update(book_id=book_id, status=book.ingest_status or 'ready',
+                  total_pages=book.total_pages)
+    return jsonify(status)
+
 @books_bp.route('/read/<string:source>/<string:book_id>')
 def read_book(source, book_id):
     try:
         view_mode = request.args.get('view', 'paginated')
         
         # Get book details
-        book = BookSourceManager.get_book_details(source, book_id)
+        if source == UPLOAD_SOURCE:
+            # Uploads are read from the text stored at ingest, never the original file
+            saved = Book.query.filter_by(source=source, source_id=book_id).first()
+            book = saved.to_dict() if saved and saved.is_ready else None
+        else:
+            book = BookSourceManager.get_book_details(source, book_id)
         if not book:
             flash('Book not found', 'error')
             return redirect(url_for('main.index'))
         
-        # Fetch book content
-        content = BookContentFetcher.fetch_content({'source': source, 'source_id': book_id})
-        if not content:
-            flash('Unable to load book content', 'error')
-            return redirect(url_for('books.book_details', source=source, book_id=book_id))
-        
         if view_mode == 'full':
+            # Fetch book content
+            content = BookContentFetcher.fetch_content({'source': source, 'source_id': book_id})
+            if not content:
+                flash('Unable to load book content', 'error')
+                return redirect(url_for('books.book_details', source=source, book_id=book_id))
+            
             # Return full book view
             return render_template('books/full_reader.html',
                                 book=book,
                                 content=content)
         
-        # Process content into pages for paginated view
-        pages = process_book_content(content)
+        # A book still downloading opens on its first page; the page count follows with the rest
+        first_page = BookContentFetcher.first_page(
+            {'source': source, 'source_id': book_id},
+            page_size=current_app.config.get('READER_PAGE_SIZE', PAGE_SIZE)
+        )
+        if first_page is not None:
+            return render_template('books/reader.html',
+                                 book=book,
+                                 first_page=first_page,
+                                 progress={'current_page': 1, 'total_pages': None},
+                                 current_page=1,
+                                 total_pages=None)
+        
+        # Only the first page is rendered; the reader pulls the rest on demand
+        with open_book_pager(source, book_id) as pager:
+            if not pager or not pager.page_count:
+                flash('Unable to load book content', 'error')
+                return redirect(url_for('books.book_details', source=source, book_id=book_id))
+            first_page, total_pages = pager.get_page(1), pager.page_count
         
         # Get reading progress
         progress = {
             'current_page': 1,
-            'total_pages': len(pages)
+            'total_pages': total_pages
         }
         
         return render_template('books/reader.html',
                              book=book,
-                             content=pages,
+                             first_page=first_page,
                              progress=progress,
                              current_page=1,
-                             total_pages=len(pages))
+                             total_pages=total_pages)
                              
     except Exception as e:
         logger.error(f"Error in read_book route: {str(e)}")
         flash('Error loading book. Please try again later.', 'error')
         return redirect(url_for('main.index'))
 
+@books_bp.route('/api/read/<string:source>/<string:book_id>/pages')
+def read_book_pages(source, book_id):
+    """Return ``count`` pages of a book starting at page ``start`` (1-based)"""
+    start = request.args.get('start', 1, type=int)
+    count = min(max(request.args.get('count', 1, type=int), 1), MAX_PAGES_PER_REQUEST)
+    
+    with open_book_pager(source, book_id) as pager:
+        if not pager:
+            return jsonify({'status': 'error', 'message': 'Unable to load book content'}), 404
+        if not 1 <= start <= pager.page_count:
+            return jsonify({'status': 'error', 'message': 'Page out of range'}), 404
+        
+        return jsonify({
+            'status': 'success',
+            'start': start,
+            'pages': pager.get_pages(start, count),
+            'total_pages': pager.page_count
+        })
+
+def open_book_pager(source: str, book_id: str):
+    """Page index for an external book, fetching its content on first use; use with ``with``"""
+    return PagerCache.open(
+        source, book_id,
+        lambda: BookContentFetcher.open_content({'source': source, 'source_id': book_id}),
+        page_size=current_app.config.get('READER_PAGE_SIZE', PAGE_SIZE)
+    )
+
 def process_book_content(content: str) -> List[str]:
     """Split book content into pages"""
     try:
-        # Remove excess whitespace and split into paragraphs
-        paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
-        
-        # Group paragraphs into pages (roughly 2000 characters per page)
-        pages = []
-        current_page = []
-        current_length = 0
-        
-        for paragraph in paragraphs:
-            if current_length + len(paragraph) > 2000 and current_page:
-                pages.append('\n'.join(current_page))
-                current_page = []
-                current_length = 0
-            current_page.append(paragraph)
-            current_length += len(paragraph)
-        
-        if current_page:
-            pages.append('\n'.join(current_page))
-        
-        return pages
+        return BookPager(content).get_pages(1, len(content))
     except Exception as e:
         logger.error(f"Error processing book content: {e}")
         return [content]  # Return single page if processing fails
@@ -251,7 +321,7 @@ def download_book(book_id, format):
             flash('You do not have permission to download this book.', 'error')
             return redirect(url_for('main.index'))
             
-        if not book.content:
+        if not book.get_content():
             flash('No content available for download.', 'error')
             return redirect(url_for('books.view_book', book_id=book.id))
             
@@ -340,22 +410,30 @@ def download_pdf(book):
 def book_details(source, book_id):
     try:
         # Get book details
-        book = BookSourceManager.get_book_details(source, book_id)
+        if source == UPLOAD_SOURCE:
+            # Uploads are read from the text stored at ingest, never the original file
+            saved = Book.query.filter_by(source=source, source_id=book_id).first()
+            book = saved.to_dict() if saved and saved.is_ready else None
+        else:
+            book = BookSourceManager.get_book_details(source, book_id)
         if not book:
             flash('Book not found', 'error')
             return redirect(url_for('main.index'))
         
-        # Get preview content (first few paragraphs)
-        content = BookContentFetcher.fetch_content({'source': source, 'source_id': book_id})
-        preview_content = None
-        if content:
-            # Process content to get a preview
-            paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
-            preview_content = '\n'.join(paragraphs[:3]) + '...'  # First 3 paragraphs
+        # Preview comes from the stored row, or the first few KB of the text
+        cached = Book.query.filter_by(source=source, source_id=book_id).first()
+        preview_content = cached.preview if cached else None
+        if not preview_content:
+            preview_content = BookContentFetcher.fetch_preview({'source': source, 'source_id': book_id})
+            if cached and preview_content:
+                cached.preview = preview_content
+                db.session.commit()
         
         return render_template('books/details.html',
                              book=book,
-                             preview_content=preview_content)
+                             preview_content=preview_content,
+                             word_count=cached.word_count if cached else None,
+                             estimated_pages=cached.estimated_pages if cached else None)
                              
     except Exception as e:
         logger.error(f"Error in book_details route: {str(e)}")
@@ -415,20 +493,31 @@ def summarize_book():
                 
             if file and allowed_file(file.filename):
                 processor = ContentProcessor()
-                
-                # Extract text based on file type
-                if file.filename.endswith('.pdf'):
-                    text = processor.extract_text_from_pdf(file)
-                elif file.filename.endswith('.epub'):
-                    text = processor.extract_text_from_epub(file)
-                elif file.filename.endswith('.txt'):
-                    text = file.read().decode('utf-8')
-                else:
+                if not file.filename.endswith(('.pdf', '.epub', '.txt')):
                     flash('Unsupported file format', 'error')
                     return redirect(request.url)
                 
-                # Generate summary
-                summary_data = processor.generate_summary(text)
+                # Keyed by the uploaded bytes, so a re-upload skips text extraction too
+                data = file.read()
+                content_hash = SummaryCache.content_hash(data)
+                version = processor.scorer.version()
+                summary_data = SummaryCache.get(content_hash, 'report', 'default', version)
+                
+                if summary_data is None:
+                    # Extract text based on file type
+                    if file.filename.endswith('.pdf'):
+                        text = processor.extract_text_from_pdf(io.BytesIO(data))
+                    elif file.filename.endswith('.epub'):
+                        text = processor.extract_text_from_epub(io.BytesIO(data))
+                    else:
+                        text = data.decode('utf-8')
+                    
+                    # Generate summary
+                    summary_data = processor.generate_summary(text)
+                    if summary_data['key_sentences']:
+                        # The PDF doesn't use the full text, so don't store it
+                        SummaryCache.set(content_hash, 'report', 'default', version,
+                                         {k: v for k, v in summary_data.items() if k != 'full_text'})
                 
                 # Create PDF
                 pdf_data = processor.create_summary_pdf(
@@ -1,15 +1,18 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from functools import partial
+from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, current_app
 from flask_login import login_required, current_user
 from app.models import Book, ReadingProgress, Bookmark
 from app.utils.api_client import OpenLibraryAPI, InternetArchiveAPI
 # from app.utils.google_books_api import GoogleBooksAPI  # Comment out this line
 from app.utils.scraper import OpenLibraryScraper, GutenbergScraper, GoodreadsScraper, StandardEbooksScraper, ManyBooksScraper, InternetArchiveScraper, SmashwordsScraper, NoteGPTScraper, AnnasArchiveScraper
-from app.utils.summarizer import TextSummarizer
+from app.utils.pdf_extract import PdfTextExtractor
+from app.utils.summary_queue import SummaryQueue
 from app.extensions import db
 import os
 from werkzeug.utils import secure_filename
 from app.utils.book_cache import BookCache
 from app.utils.book_sources import BookSourceManager
+from app.utils.search_executor import ParallelSearchExecutor
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -38,12 +41,7 @@ def summarizer():
                     document = Document(uploaded_file)
                     text = '\n'.join([paragraph.text for paragraph in document.paragraphs])
                 elif file_ext == '.pdf':
-                    # Add PDF handling if needed
-                    import PyPDF2
-                    pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                    text = ''
-                    for page in pdf_reader.pages:
-                        text += page.extract_text()
+                    text = PdfTextExtractor.extract(uploaded_file)
             
             if not text:
                 flash('Please enter some text or upload a file to summarize.', 'error')
@@ -52,23 +50,16 @@ def summarizer():
             method = request.form.get('method', 'extractive')
             length = request.form.get('length', 'medium')
             
-            summarizer = TextSummarizer()
-            summary = summarizer.summarize(
-                text=text,
-                method=method,
-                length=length
-            )
-            
-            if not summary:
-                flash('Could not generate summary. Please try again.', 'error')
-                return render_template('main/summarize.html', 
-                                    original_text=text,
-                                    method=method,
-                                    length=length)
+            # Summarized in the background; the page polls for the result
+            job_id = SummaryQueue.submit(text, method=method, length=length)
+            # ...unless it was already cached
+            job = SummaryQueue.status(job_id)
+            summary = job.get('summary') if job else None
             
             return render_template('main/summarize.html', 
                                  original_text=text,
                                  summary=summary,
+                                 job_id=None if summary else job_id,
                                  method=method,
                                  length=length)
                                  
@@ -82,21 +73,12 @@ def summarizer():
 @main_bp.route('/')
 def index():
     try:
-        # Get only 8 featured books
-        featured_books = BookSourceManager.get_featured_books(limit=8)
-        
-        # Get just book titles for categories (faster loading)
-        categories = {
-            'Fiction': BookSourceManager.get_category_titles('fiction', limit=12),
-            'Non-Fiction': BookSourceManager.get_category_titles('non-fiction', limit=12),
-            'Science Fiction': BookSourceManager.get_category_titles('science-fiction', limit=12),
-            'Romance': BookSourceManager.get_category_titles('romance', limit=12),
-            'Mystery': BookSourceManager.get_category_titles('mystery', limit=12),
-        }
+        # Served from the snapshot the scheduler keeps warm, never scraped inline
+        snapshot = BookCache.get_front_page() or {}
         
         return render_template('main/index.html',
-                             featured_books=featured_books,
-                             categories=categories)
+                             featured_books=snapshot.get('featured_books', []),
+                             categories=snapshot.get('categories', {}))
                              
     except Exception as e:
         logger.error(f"Error in index route: {str(e)}")
@@ -140,23 +122,21 @@ def discover():
 @main_bp.route('/search', methods=['GET'])
 def search():
     query = request.args.get('q')
-    openlibrary_results = OpenLibraryScraper.search_books(query)
-    gutenberg_results = GutenbergScraper.search_books(query)
-    goodreads_results = GoodreadsScraper.search_books(query)
-    annas_archive_results = AnnasArchiveScraper.search_books(query)
 
-    # Combine results from all sources
-    all_results = {
-        'openlibrary': openlibrary_results,
-        'gutenberg': gutenberg_results,
-        'goodreads': goodreads_results,
-        'annas_archive': annas_archive_results
-    }
-    return render_template('main/search_results.html', 
-                         openlibrary_results=openlibrary_results,
-                         gutenberg_results=gutenberg_results,
-                         annas_archive_results=annas_archive_results,
-                         all_results=all_results)
+    # Search all sources concurrently; a slow source only costs its deadline
+    all_results, timed_out = ParallelSearchExecutor.run({
+        'openlibrary': partial(OpenLibraryScraper.search_books, query),
+        'gutenberg': partial(GutenbergScraper.search_books, query),
+        'goodreads': partial(GoodreadsScraper.search_books, query),
+        'annas_archive': partial(AnnasArchiveScraper.search_books, query)
+    }, timeout=current_app.config.get('SEARCH_TIMEOUT'))
+
+    return render_template('main/search_results.html',
+                         openlibrary_results=all_results['openlibrary'],
+                         gutenberg_results=all_results['gutenberg'],
+                         annas_archive_results=all_results['annas_archive'],
+                         all_results=all_results,
+                         timed_out=timed_out)
 
 @main_bp.route('/book/bookmark', methods=['POST'])
 def add_bookmark():
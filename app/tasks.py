@@ -1,14 +1,69 @@
+import os
+import threading
+from datetime import datetime
+from typing import Optional
 from flask_apscheduler import APScheduler
 from app.utils.book_cache import BookCache
+from app.utils.disk_cache import cache_folder
 
 scheduler = APScheduler()
+_lock = threading.Lock()
+# Held open (and locked) for the life of the process that won the election
+_election_file = None
+
+def elect_scheduler_process(folder: Optional[str] = None) -> bool:
+    """Try to become the one process that runs the background jobs.
+
+    Takes an exclusive, non-blocking lock on ``scheduler.lock`` in the
+    cache folder and keeps it until the process exits, when the OS drops
+    it and the next process to ask takes over. gunicorn workers call this
+    from ``post_fork``, so a worker that replaces a dead one re-runs the
+    election. True if this process holds the lock.
+    """
+    global _election_file
+    import fcntl  # POSIX only, like gunicorn itself
+    with _lock:
+        if _election_file is not None:
+            return True
+        folder = folder or cache_folder()
+        os.makedirs(folder, exist_ok=True)
+        lock_file = open(os.path.join(folder, 'scheduler.lock'), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        _election_file = lock_file
+        return True
 
 def init_scheduler(app):
-    scheduler.init_app(app)
-    scheduler.start()
-
-    # Refresh cache every 24 hours
-    @scheduler.task('interval', id='refresh_book_cache', hours=24)
-    def refresh_book_cache():
-        with app.app_context():
-            BookCache.refresh_cache() 
\ No newline at end of file
+    """Start the background jobs in this process, once.
+
+    Only the process designated to run them should call this: the gunicorn
+    worker that won ``elect_scheduler_process`` (see gunicorn.conf.py) or
+    run.py's dev server. create_app doesn't, so other workers and ``flask``
+    CLI commands never scrape on their own. Returns False without starting anything if
+    SCHEDULER_ENABLED is off or the scheduler is already running.
+    """
+    if not app.config.get('SCHEDULER_ENABLED'):
+        return False
+    with _lock:
+        if scheduler.running:
+            return False
+        scheduler.init_app(app)
+
+        # Refresh cache every 24 hours
+        @scheduler.task('interval', id='refresh_book_cache', hours=24)
+        def refresh_book_cache():
+            with app.app_context():
+                BookCache.refresh_cache()
+
+        # Keep the home page snapshot warm; also build one right away at startup
+        @scheduler.task('interval', id='refresh_front_page', minutes=app.config.get('FRONT_PAGE_REFRESH_MINUTES', 30),
+                        next_run_time=datetime.now())
+        def refresh_front_page():
+            with app.app_context():
+                BookCache.refresh_front_page()
+
+        scheduler.start()
+    return True
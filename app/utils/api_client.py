@@ -1,4 +1,4 @@
-import requests
+from app.utils.http_client import HttpClient
 
 # OpenLibrary API Client
 class OpenLibraryAPI:
@@ -7,11 +7,11 @@ class OpenLibraryAPI:
     @staticmethod
     def search_books(query):
         try:
-            response = requests.get(f'{OpenLibraryAPI.BASE_URL}/search.json?q={query}')
+            response = HttpClient.get(f'{OpenLibraryAPI.BASE_URL}/search.json?q={query}')
             if response.status_code == 200:
                 return response.json().get('docs', [])
             print(f"OpenLibraryAPI Error: Status Code {response.status_code}")
-        except requests.exceptions.RequestException as e:
+        except HttpClient.Error as e:
             print(f"OpenLibraryAPI Exception: {e}")
         return []
 
@@ -22,10 +22,10 @@ class InternetArchiveAPI:
     @staticmethod
     def search_books(query):
         try:
-            response = requests.get(f'{InternetArchiveAPI.BASE_URL}/search.php?q={query}&output=json')
+            response = HttpClient.get(f'{InternetArchiveAPI.BASE_URL}/search.php?q={query}&output=json')
             if response.status_code == 200:
                 return response.json().get('response', {}).get('docs', [])
             print(f"InternetArchiveAPI Error: Status Code {response.status_code}")
-        except requests.exceptions.RequestException as e:
+        except HttpClient.Error as e:
             print(f"InternetArchiveAPI Exception: {e}")
         return []
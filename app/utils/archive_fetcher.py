@@ -1,6 +1,7 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from app.utils.http_client import HttpClient
+from app.utils.cover_cache import CoverCache
+from app.utils.html_stream import iter_response_lines, iter_response_paragraphs
+from typing import Iterator, List, Dict, Optional
 import logging
 import re
 from urllib.parse import urljoin
@@ -25,10 +26,10 @@ class ArchiveAPI:
                 'output': 'json'
             }
             
-            response = requests.get(cls.API_URL, params=params)
+            response = HttpClient.get(cls.API_URL, params=params)
             if response.status_code == 200:
                 data = response.json()
-                books = []
+                candidates = []
                 
                 for doc in data.get('response', {}).get('docs', []):
                     try:
@@ -50,15 +51,7 @@ class ArchiveAPI:
                         # Get cover URL
                         cover_url = f"{cls.BASE_URL}/services/img/{identifier}"
                         
-                        # Verify cover exists
-                        try:
-                            cover_response = requests.head(cover_url)
-                            if cover_response.status_code != 200:
-                                continue
-                        except Exception:
-                            continue
-                        
-                        books.append({
+                        candidates.append({
                             'id': identifier,
                             'title': doc.get('title', 'Unknown Title'),
                             'author': creator,
@@ -67,15 +60,13 @@ class ArchiveAPI:
                             'downloads': doc.get('downloads', 0),
                             'pages': doc.get('imagecount', 0)
                         })
-                        
-                        if len(books) >= limit:
-                            break
                             
                     except Exception as e:
                         logger.error(f"Error processing archive book: {e}")
                         continue
                 
-                return books[:limit]
+                # Verify covers exist; checked concurrently and cached
+                return CoverCache.filter_books(candidates, limit)
                 
         except Exception as e:
             logger.error(f"Error fetching archive books: {e}")
@@ -86,7 +77,7 @@ class ArchiveAPI:
         """Get detailed information about a specific book"""
         try:
             metadata_url = f"{cls.BASE_URL}/metadata/{book_id}"
-            response = requests.get(metadata_url)
+            response = HttpClient.get(metadata_url)
             
             if response.status_code == 200:
                 data = response.json()
@@ -113,26 +104,31 @@ class ArchiveAPI:
             logger.error(f"Error fetching archive book details: {e}")
         return None
 
+    @classmethod
+    def iter_book_paragraphs(cls, book_id: str) -> Optional[Iterator[str]]:
+        """Lines of the book's text, streamed as it downloads"""
+        # Try to get the DjVu text version first
+        text_url = f"{cls.BASE_URL}/download/{book_id}/{book_id}_djvu.txt"
+        response = HttpClient.get(text_url, stream=True)
+        if response.status_code == 200:
+            return iter_response_lines(response)
+        response.close()
+
+        # Fallback to OCR text if available
+        ocr_url = f"{cls.BASE_URL}/download/{book_id}/{book_id}_djvu.xml"
+        response = HttpClient.get(ocr_url, stream=True)
+        if response.status_code == 200:
+            return iter_response_paragraphs(response, xml=True)
+        response.close()
+        return None
+
     @classmethod
     def get_book_content(cls, book_id: str) -> Optional[str]:
         """Get the book content in text format"""
         try:
-            # Try to get the DjVu text version first
-            text_url = f"{cls.BASE_URL}/download/{book_id}/{book_id}_djvu.txt"
-            response = requests.get(text_url)
-            
-            if response.status_code == 200:
-                return response.text
-                
-            # Fallback to OCR text if available
-            ocr_url = f"{cls.BASE_URL}/download/{book_id}/{book_id}_djvu.xml"
-            response = requests.get(ocr_url)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'xml')
-                text = ' '.join([p.get_text() for p in soup.find_all('PARAGRAPH')])
-                return text
-                
+            paragraphs = cls.iter_book_paragraphs(book_id)
+            if paragraphs is not None:
+                return '\n'.join(paragraphs)
         except Exception as e:
             logger.error(f"Error fetching archive book content: {e}")
         return None
@@ -149,7 +145,7 @@ class ArchiveAPI:
                 'output': 'json'
             }
             
-            response = requests.get(cls.API_URL, params=params)
+            response = HttpClient.get(cls.API_URL, params=params)
             if response.status_code == 200:
                 data = response.json()
                 books = []
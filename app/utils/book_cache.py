@@ -3,9 +3,15 @@ import logging
 from datetime import datetime, timedelta
 from app.extensions import db
 from app.models import Book
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from flask import current_app
-from app.utils.process_book_file import process_book_file
+from app.utils.process_book_file import scan_epub
+from app.utils.book_preview import BookPreview
+from app.utils.content_store import ContentStore
+from app.utils.disk_cache import cache_folder
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,6 +19,23 @@ logger = logging.getLogger(__name__)
 class BookCache:
     CACHE_DURATION = timedelta(hours=24)
 
+    # Home page shelves: display name -> Gutenberg bookshelf
+    FRONT_PAGE_CATEGORIES = {
+        'Fiction': 'fiction',
+        'Non-Fiction': 'non-fiction',
+        'Science Fiction': 'science-fiction',
+        'Romance': 'romance',
+        'Mystery': 'mystery',
+    }
+    _front_page = None
+    _front_page_mtime = 0.0
+    _front_page_lock = threading.Lock()
+    _front_page_refreshing = False
+
+    # Local library scans: processes used to hash and read new or changed EPUBs
+    LIBRARY_SCAN_WORKERS = int(os.environ.get('LIBRARY_SCAN_WORKERS', os.cpu_count() or 2))
+    LIBRARY_SCAN_PARALLEL_MIN = 16
+
     @staticmethod
     def get_cached_books(category=None, limit=10):
         """Get books from cache/database"""
@@ -60,12 +83,15 @@ class BookCache:
                     created_at=datetime.utcnow(),
                     user_id=1  # Set a default user ID or handle this differently
                 )
+                BookCache._fill_preview(book)
                 db.session.add(book)
                 db.session.commit()
                 logger.info(f"Cached new book: {book.title}")
                 return book
             
             logger.info(f"Book already exists: {existing_book.title}")
+            if existing_book.word_count is None and BookCache._fill_preview(existing_book, book_data.get('content')):
+                db.session.commit()
             return existing_book
             
         except Exception as e:
@@ -73,6 +99,23 @@ class BookCache:
             db.session.rollback()
             return None
 
+    @staticmethod
+    def _fill_preview(book: Book, content: str = None) -> bool:
+        """Set a book's preview fields from its text, if the text is at hand locally"""
+        content = content or book.content
+        if content:
+            BookPreview.apply(book, BookPreview.from_text(content))
+            return True
+        # Read from the store block by block rather than decoded whole
+        stored = ContentStore.open(book.source, str(book.source_id))
+        if stored is None:
+            return False
+        try:
+            BookPreview.apply(book, BookPreview.from_text(stored))
+        finally:
+            stored.close()
+        return True
+
     @staticmethod
     def refresh_cache():
         """Refresh the book cache with new books from various sources"""
@@ -131,35 +174,194 @@ class BookCache:
             logger.error(f"Error getting local books: {str(e)}")
             return []
 
+    @staticmethod
+    def _library_manifest_path():
+        return os.path.join(cache_folder(), 'library_manifest.json')
+
+    @staticmethod
+    def _load_library_manifest():
+        """Last scan's ``{path: {size, mtime_ns, sha256, info}}``, empty if there isn't one"""
+        try:
+            with open(BookCache._library_manifest_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_library_manifest(manifest):
+        path = BookCache._library_manifest_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _scan_epubs(jobs):
+        """``scan_epub`` over ``(path, known_hash)`` pairs, on a process pool for big batches"""
+        workers = min(BookCache.LIBRARY_SCAN_WORKERS, len(jobs))
+        if len(jobs) < BookCache.LIBRARY_SCAN_PARALLEL_MIN or workers <= 1:
+            return [scan_epub(path, known_hash) for path, known_hash in jobs]
+        # Spawned rather than forked: the app process runs threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            return list(pool.map(scan_epub, *zip(*jobs), chunksize=max(1, len(jobs) // (workers * 8))))
+
     @staticmethod
     def cache_local_books():
-        """Cache books from the local epub folder"""
+        """Cache books from the local epub folder.
+
+        Incremental: a manifest of each file's size, mtime, hash and
+        metadata is kept from the last scan, so unchanged files are never
+        opened. New or changed files are hashed and their metadata read
+        from the OPF on a process pool; a file whose hash hasn't changed
+        keeps its metadata. Which files already have a ``Book`` row is
+        found with one query. Returns the number of books added.
+        """
         try:
             epub_folder = current_app.config['UPLOAD_FOLDER']
-            for filename in os.listdir(epub_folder):
-                if filename.lower().endswith('.epub'):
-                    filepath = os.path.join(epub_folder, filename)
-                    book_info = process_book_file(filepath)
-                    
-                    # Check if book already exists
-                    existing_book = Book.query.filter_by(file_path=filepath).first()
-                    if not existing_book:
-                        book = Book(
-                            title=book_info.get('title', filename),
-                            author=book_info.get('author', 'Unknown'),
-                            description=book_info.get('description', ''),
-                            file_path=filepath,
-                            file_type='EPUB',
-                            total_pages=book_info.get('total_pages', 0),
-                            category='Local',
-                            accessible_without_login=True,
-                            created_at=datetime.utcnow()
-                        )
-                        db.session.add(book)
-            
-            db.session.commit()
-            logger.info("Local EPUB books cached successfully")
+            previous = BookCache._load_library_manifest()
+            manifest = {}
+            stale = []
+            with os.scandir(epub_folder) as entries:
+                for entry in entries:
+                    if not entry.name.lower().endswith('.epub') or not entry.is_file():
+                        continue
+                    filepath = os.path.join(epub_folder, entry.name)
+                    stat = entry.stat()
+                    known = previous.get(filepath)
+                    if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+                        manifest[filepath] = known
+                    else:
+                        manifest[filepath] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                        stale.append((filepath, known['sha256'] if known else None))
+
+            for (filepath, _), (content_hash, info) in zip(stale, BookCache._scan_epubs(stale)):
+                if content_hash is None:
+                    del manifest[filepath]  # unreadable or no metadata; try again next scan
+                    continue
+                entry = manifest[filepath]
+                entry['sha256'] = content_hash
+                entry['info'] = info if info is not None else previous[filepath]['info']
+            BookCache._save_library_manifest(manifest)
+
+            # The model's own session; app.extensions.db isn't bound to the app
+            session = Book.query.session
+            existing = {
+                path for (path,) in session.query(Book.file_path).filter(Book.file_path.isnot(None))
+            }
+            added = 0
+            for filepath, entry in manifest.items():
+                if filepath in existing:
+                    continue
+                book_info = entry['info']
+                session.add(Book(
+                    title=book_info.get('title', os.path.basename(filepath)),
+                    author=book_info.get('author', 'Unknown'),
+                    description=book_info.get('description', ''),
+                    language=book_info.get('language'),
+                    file_path=filepath,
+                    file_type='EPUB',
+                    total_pages=book_info.get('total_pages', 0),
+                    category='Local',
+                    accessible_without_login=True,
+                    created_at=datetime.utcnow()
+                ))
+                added += 1
+
+            session.commit()
+            logger.info(f"Local EPUB books cached: {len(stale)} of {len(manifest)} files read, {added} added")
+            return added
             
         except Exception as e:
             logger.error(f"Error caching local books: {str(e)}")
-            db.session.rollback()
\ No newline at end of file
+            Book.query.session.rollback()
+            return 0
+
+    @staticmethod
+    def _front_page_path():
+        return os.path.join(cache_folder(), 'front_page.json')
+
+    @staticmethod
+    def build_front_page():
+        """Scrape the featured books and category shelves shown on the home page"""
+        from app.utils.book_sources import BookSourceManager
+
+        return {
+            'featured_books': BookSourceManager.get_featured_books(limit=8),
+            'categories': {
+                name: BookSourceManager.get_category_titles(shelf, limit=12)
+                for name, shelf in BookCache.FRONT_PAGE_CATEGORIES.items()
+            },
+            'generated_at': datetime.utcnow().isoformat()
+        }
+
+    @staticmethod
+    def refresh_front_page():
+        """Rebuild the home page snapshot, keeping the last good one on failure"""
+        try:
+            snapshot = BookCache.build_front_page()
+            if not snapshot['featured_books'] and not any(snapshot['categories'].values()):
+                logger.warning("Front page refresh returned no books, keeping previous snapshot")
+                return BookCache._front_page
+
+            path = BookCache._front_page_path()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)  # atomic, so readers never see half a file
+
+            with BookCache._front_page_lock:
+                BookCache._front_page = snapshot
+                BookCache._front_page_mtime = os.path.getmtime(path)
+            logger.info("Front page snapshot refreshed")
+            return snapshot
+        except Exception as e:
+            logger.error(f"Error refreshing front page: {str(e)}")
+            return BookCache._front_page
+
+    @staticmethod
+    def _refresh_front_page_in_background():
+        with BookCache._front_page_lock:
+            if BookCache._front_page_refreshing:
+                return
+            BookCache._front_page_refreshing = True
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    BookCache.refresh_front_page()
+            finally:
+                with BookCache._front_page_lock:
+                    BookCache._front_page_refreshing = False
+
+        threading.Thread(target=refresh, name='front-page-refresh', daemon=True).start()
+
+    @staticmethod
+    def get_front_page():
+        """Return the latest home page snapshot without touching upstream sites.
+
+        Serves from memory, picking up a newer snapshot written to disk by
+        the scheduler (possibly in another worker). With no snapshot at all,
+        a background build is started and None is returned.
+        """
+        path = BookCache._front_page_path()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+
+        if mtime is not None and mtime > BookCache._front_page_mtime:
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+                with BookCache._front_page_lock:
+                    BookCache._front_page = snapshot
+                    BookCache._front_page_mtime = mtime
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading front page snapshot: {str(e)}")
+
+        if BookCache._front_page is None:
+            BookCache._refresh_front_page_in_background()
+        return BookCache._front_page
@@ -1,4 +1,3 @@
-import requests
 from typing import Dict, List, Optional
 from datetime import datetime
 from flask import current_app
@@ -0,0 +1,118 @@
+import logging
+import re
+from typing import Dict, List, Optional
+
+from app.utils.pagination import PAGE_SIZE, PageOffsetBuilder
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(rb'\S+')
+
+class BookPreview:
+    """Short preview of a book's text plus its word and page counts.
+
+    Computed once when a book's full text is first available and stored on
+    its ``Book`` row, so the details page never has to load the text again.
+    """
+    PARAGRAPHS = 3
+    # Bytes of text read when only the opening paragraphs are needed
+    HEAD_BYTES = 64 * 1024
+
+    @classmethod
+    def paragraphs(cls, text: str, limit: Optional[int] = None) -> List[str]:
+        limit = limit or cls.PARAGRAPHS
+        paragraphs = []
+        for line in text.split('\n'):
+            line = line.strip()
+            if line:
+                paragraphs.append(line)
+                if len(paragraphs) == limit:
+                    break
+        return paragraphs
+
+    @classmethod
+    def snippet(cls, text: str) -> Optional[str]:
+        """First few paragraphs of ``text``, or None if it has none"""
+        paragraphs = cls.paragraphs(text)
+        return '\n'.join(paragraphs) + '...' if paragraphs else None
+
+    @classmethod
+    def from_text(cls, text, page_size: int = PAGE_SIZE, page_count: Optional[int] = None) -> Dict:
+        """Preview, word count and reader page count for a full text.
+
+        ``text`` is a string, UTF-8 bytes or a ``StoredText``, which is
+        read a block at a time. Pass ``page_count`` when the page index
+        has already been built.
+        """
+        if isinstance(text, str):
+            text = text.encode('utf-8')
+        tally = TextTally(page_size, paginate=page_count is None)
+        for block in (text.blocks() if hasattr(text, 'blocks') else [text]):
+            tally.feed(block)
+        info = tally.info()
+        if page_count is not None:
+            info['estimated_pages'] = page_count
+        return info
+
+    @classmethod
+    def from_head(cls, stored) -> Optional[str]:
+        """Preview from the start of a ``StoredText`` without reading the rest"""
+        return cls.snippet(stored.read(0, cls.HEAD_BYTES).decode('utf-8', 'ignore'))
+
+    @staticmethod
+    def apply(book, info: Dict) -> None:
+        book.preview = info['preview']
+        book.word_count = info['word_count']
+        book.estimated_pages = info['estimated_pages']
+
+    @classmethod
+    def record(cls, source: str, source_id: str, info: Dict) -> None:
+        """Store preview fields on the matching ``Book`` row, if there is one"""
+        from app import db
+        from app.models import Book
+
+        try:
+            book = Book.query.filter_by(source=source, source_id=source_id).first()
+            if book is None or book.word_count is not None:
+                return
+            cls.apply(book, info)
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error recording preview for {source}/{source_id}: {e}")
+            db.session.rollback()
+
+class TextTally:
+    """``BookPreview.from_text`` for a text fed a piece at a time.
+
+    Keeps only the opening ``BookPreview.HEAD_BYTES`` and a running word
+    count, plus the page offsets when ``paginate`` is set, so a book can be
+    summed up while it streams in without ever being held whole.
+    """
+
+    def __init__(self, page_size: int = PAGE_SIZE, paginate: bool = True):
+        self.pages = PageOffsetBuilder(page_size) if paginate else None
+        self.head = bytearray()
+        self.words = 0
+        self._in_word = False
+
+    def feed(self, data: bytes) -> None:
+        if not data:
+            return
+        if len(self.head) < BookPreview.HEAD_BYTES:
+            self.head += data[:BookPreview.HEAD_BYTES - len(self.head)]
+        words = sum(1 for _ in _WORD_RE.finditer(data))
+        # A word split across two pieces was counted in both
+        if self._in_word and not data[:1].isspace():
+            words -= 1
+        self.words += words
+        self._in_word = not data[-1:].isspace()
+        if self.pages is not None:
+            self.pages.feed(data)
+
+    def info(self) -> Dict:
+        """``BookPreview`` fields for everything fed so far"""
+        return {
+            'preview': BookPreview.snippet(bytes(self.head).decode('utf-8', 'ignore')),
+            'word_count': self.words,
+            'estimated_pages': len(self.pages.finish()) - 1 if self.pages is not None else None
+        }
@@ -1,7 +1,7 @@
-import requests
+from app.utils.http_client import HttpClient
 import logging
 from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from app.utils.html_parsing import parse_html
 import json
 import os
 from flask import current_app
@@ -35,9 +35,9 @@ class GutenbergSource(BookSource):
         """Get just titles without fetching covers"""
         try:
             url = f"{cls.BASE_URL}/bookshelf/{category}"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'booklink')
                 books = []
                 
                 for link in soup.select('.booklink a')[:limit]:
@@ -69,9 +69,9 @@ class GutenbergSource(BookSource):
         """Get basic book information"""
         try:
             url = f"{cls.BASE_URL}/{book_id}"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # Get title and author
                 title_elem = soup.select_one('h1')
@@ -106,7 +106,7 @@ class GutenbergSource(BookSource):
         try:
             # First try to get from API
             api_url = f"{cls.API_URL}?ids={book_id}"
-            response = requests.get(api_url)
+            response = HttpClient.get(api_url)
             if response.status_code == 200:
                 data = response.json()
                 if data['results']:
@@ -173,7 +173,7 @@ class InternetArchiveSource(BookSource):
                 'page': 1,
                 'output': 'json'
             }
-            response = requests.get(cls.API_URL, params=params)
+            response = HttpClient.get(cls.API_URL, params=params)
             if response.status_code == 200:
                 data = response.json()
                 books = []
@@ -197,9 +197,9 @@ class StandardEbooksSource(BookSource):
     @classmethod
     def get_featured_books(cls, limit: int = 10) -> List[Dict]:
         try:
-            response = requests.get(f"{cls.BASE_URL}/ebooks/")
+            response = HttpClient.get(f"{cls.BASE_URL}/ebooks/")
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'ebook-list')
                 books = []
                 for item in soup.select('.ebook-list li')[:limit]:
                     title_elem = item.select_one('.title')
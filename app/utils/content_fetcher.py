@@ -1,19 +1,162 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional
+from app.utils.archive_fetcher import ArchiveAPI
+from app.utils.book_preview import BookPreview, TextTally
+from app.utils.content_store import ContentStore, StoredText
+from app.utils.html_stream import iter_response_paragraphs
+from app.utils.http_client import HttpClient
+from app.utils.pagination import PAGE_SIZE, PageIndex, book_key, render_page
+from contextlib import nullcontext
+from flask import current_app, has_app_context
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+class _Download:
+    """One book streaming into the content store, and the requests waiting on it"""
+
+    def __init__(self, page_size: int):
+        self.page_size = page_size
+        self.first_page: Optional[str] = None
+        self.first_page_ready = threading.Event()
+        self.finished = threading.Event()
+        self.stored = False
+        self.complete = False
+
+    def watch(self, paragraphs: Iterator[str], tally: TextTally) -> Iterator[str]:
+        """Pass the text on to the store, feeding ``tally`` and publishing page 1 once it's whole"""
+        for paragraph in paragraphs:
+            piece = f"{paragraph}\n\n"
+            tally.feed(piece.encode('utf-8'))
+            if self.first_page is None and len(tally.pages.offsets) > 1:
+                end = tally.pages.offsets[1]
+                if end <= len(tally.head):
+                    self.first_page = render_page(bytes(tally.head[:end]).decode('utf-8', 'replace'))
+                self.first_page_ready.set()
+            yield piece
+        self.complete = True
+
 class BookContentFetcher:
+    # Longest a reader waits for the first page of a book that is downloading
+    FIRST_PAGE_TIMEOUT = float(os.environ.get('FIRST_PAGE_TIMEOUT', 30))
+
+    _downloads: Dict[Tuple[str, str], _Download] = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def fetch_content(book_data: dict) -> Optional[str]:
-        """Fetch book content based on source"""
+        """Fetch book content based on source, serving repeat reads from the local store"""
+        stored = BookContentFetcher.open_content(book_data)
+        if stored is None:
+            return None
+        try:
+            return stored.text()
+        finally:
+            stored.close()
+
+    @staticmethod
+    def fetch_preview(book_data: dict) -> Optional[str]:
+        """Opening paragraphs of a book, reading as little of it as possible.
+
+        Gutenberg books stream just the head of their HTML edition; any
+        other source (or a Gutenberg book without one) falls back to
+        fetching the whole text, as before previews were stored.
+        """
+        source, source_id = book_data['source'], str(book_data['source_id'])
+        if source == 'gutenberg' and not ContentStore.has(source, source_id):
+            preview = GutenbergContentFetcher.fetch_preview(source_id)
+            if preview:
+                return preview
+        stored = BookContentFetcher.open_content(book_data)
+        if stored is None:
+            return None
+        try:
+            return BookPreview.from_head(stored)
+        finally:
+            stored.close()
+
+    @staticmethod
+    def open_content(book_data: dict) -> Optional[StoredText]:
+        """Memory-mapped handle on a book's stored text, fetching it on first use"""
+        source, source_id = book_data['source'], str(book_data['source_id'])
+        stored = ContentStore.open(source, source_id)
+        if stored is None:
+            download = BookContentFetcher._download(book_data)
+            download.finished.wait()
+            if download.stored:
+                stored = ContentStore.open(source, source_id)
+        return stored
+
+    @staticmethod
+    def first_page(book_data: dict, page_size: int = PAGE_SIZE) -> Optional[str]:
+        """Page 1 of a book that is still downloading, as soon as the download gets past it.
+
+        None if the book is already stored, or if its first page can't be
+        had early (a book shorter than a page, a failed download); the
+        caller then reads it through ``open_content`` as usual.
+        """
+        if ContentStore.has(book_data['source'], str(book_data['source_id'])):
+            return None
+        download = BookContentFetcher._download(book_data, page_size)
+        download.first_page_ready.wait(BookContentFetcher.FIRST_PAGE_TIMEOUT)
+        return download.first_page if download.page_size == page_size else None
+
+    @staticmethod
+    def _download(book_data: dict, page_size: Optional[int] = None) -> '_Download':
+        """The download of a book into the content store, started unless one is running"""
+        key = (book_data['source'], str(book_data['source_id']))
+        with BookContentFetcher._lock:
+            download = BookContentFetcher._downloads.get(key)
+            if download is None:
+                app = current_app._get_current_object() if has_app_context() else None
+                if page_size is None:
+                    page_size = app.config.get('READER_PAGE_SIZE', PAGE_SIZE) if app else PAGE_SIZE
+                download = _Download(page_size)
+                BookContentFetcher._downloads[key] = download
+                threading.Thread(target=BookContentFetcher._run_download, args=(app, book_data, download),
+                                 name='book-download', daemon=True).start()
+        return download
+
+    @staticmethod
+    def _run_download(app, book_data: dict, download: '_Download') -> None:
+        """Stream a book from its source into the content store, summing it up on the way.
+
+        The preview fields and the reader's page index come from the same
+        pass, so the stored text needn't be read back whole afterwards.
+        """
+        source, source_id = book_data['source'], str(book_data['source_id'])
+        try:
+            with app.app_context() if app is not None else nullcontext():
+                paragraphs = BookContentFetcher._fetch_remote(book_data)
+                if paragraphs is None:
+                    return
+                tally = TextTally(download.page_size)
+                download.stored = ContentStore.put_stream(
+                    source, source_id, download.watch(paragraphs, tally)
+                )
+                # put_stream stops early if another process stored the book first
+                if download.stored and download.complete:
+                    info = tally.info()
+                    PageIndex.save(book_key(source, source_id), download.page_size, tally.pages.finish())
+                    if app is not None:
+                        BookPreview.record(source, source_id, info)
+        except Exception as e:
+            logger.error(f"Error downloading {source}/{source_id}: {e}")
+        finally:
+            with BookContentFetcher._lock:
+                BookContentFetcher._downloads.pop((source, source_id), None)
+            download.first_page_ready.set()
+            download.finished.set()
+
+    @staticmethod
+    def _fetch_remote(book_data: dict) -> Optional[Iterator[str]]:
         try:
             if book_data['source'] == 'gutenberg':
-                return GutenbergContentFetcher.fetch_content(book_data['source_id'])
+                return GutenbergContentFetcher.iter_paragraphs(book_data['source_id'])
             elif book_data['source'] == 'archive':
-                return ArchiveContentFetcher.fetch_content(book_data['source_id'])
+                return ArchiveAPI.iter_book_paragraphs(book_data['source_id'])
             elif book_data['source'] == 'standard':
                 return StandardEbooksContentFetcher.fetch_content(book_data['source_id'])
             else:
@@ -24,29 +167,47 @@ class BookContentFetcher:
             return None
 
 class GutenbergContentFetcher:
+    @staticmethod
+    def _urls(book_id: str) -> List[str]:
+        return [
+            f"https://www.gutenberg.org/files/{book_id}/{book_id}-h/{book_id}-h.htm",
+            f"https://www.gutenberg.org/cache/epub/{book_id}/pg{book_id}-images.html",
+            f"https://www.gutenberg.org/cache/epub/{book_id}/pg{book_id}.html"
+        ]
+
+    @staticmethod
+    def iter_paragraphs(book_id: str) -> Optional[Iterator[str]]:
+        """Paragraphs of the first available HTML edition, parsed as it downloads"""
+        for url in GutenbergContentFetcher._urls(book_id):
+            response = HttpClient.get(url, stream=True)
+            if response.status_code == 200:
+                return iter_response_paragraphs(response)
+            response.close()
+        return None
+
     @staticmethod
     def fetch_content(book_id: str) -> Optional[str]:
         try:
-            # Try different URL patterns
-            urls = [
-                f"https://www.gutenberg.org/files/{book_id}/{book_id}-h/{book_id}-h.htm",
-                f"https://www.gutenberg.org/cache/epub/{book_id}/pg{book_id}-images.html",
-                f"https://www.gutenberg.org/cache/epub/{book_id}/pg{book_id}.html"
-            ]
-            
-            for url in urls:
-                response = requests.get(url)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    # Remove navigation and header elements
-                    for nav in soup.find_all(['nav', 'header']):
-                        nav.decompose()
-                    # Get main content
-                    content = soup.find('body') or soup
-                    return content.get_text()
-            
-            return None
+            paragraphs = GutenbergContentFetcher.iter_paragraphs(book_id)
+            return '\n\n'.join(paragraphs) if paragraphs is not None else None
         except Exception as e:
             logger.error(f"Error fetching Gutenberg content: {e}")
             return None
-  
\ No newline at end of file
+
+    @staticmethod
+    def fetch_preview(book_id: str) -> Optional[str]:
+        """Stream the start of the HTML edition, stopping once a preview's worth is read"""
+        url = f"https://www.gutenberg.org/cache/epub/{book_id}/pg{book_id}-images.html"
+        try:
+            response = HttpClient.get(url, stream=True)
+            if response.status_code != 200:
+                response.close()
+                return None
+            paragraphs = iter_response_paragraphs(response)
+            try:
+                return BookPreview.snippet('\n'.join(islice(paragraphs, BookPreview.PARAGRAPHS)))
+            finally:
+                paragraphs.close()
+        except Exception as e:
+            logger.error(f"Error fetching Gutenberg preview: {e}")
+            return None
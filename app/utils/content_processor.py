@@ -1,17 +1,14 @@
 import logging
 from typing import Optional, List, Dict
-from bs4 import BeautifulSoup
 import re
 import io
-from PyPDF2 import PdfReader
-import ebooklib
-from ebooklib import epub
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
+from app.utils.epub_extract import EpubTextExtractor
+from app.utils.extractive import Analysis, ExtractiveScorer
+from app.utils.pdf_extract import PdfTextExtractor
 
 # Initialize NLTK
 try:
@@ -26,31 +23,21 @@ except LookupError:
 logger = logging.getLogger(__name__)
 
 class ContentProcessor:
-    def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
+    def __init__(self, scorer: Optional[ExtractiveScorer] = None):
+        self.scorer = scorer or ExtractiveScorer.shared()
 
     def extract_text_from_pdf(self, file) -> str:
         """Extract text from PDF file"""
         try:
-            reader = PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            return PdfTextExtractor.extract(file)
         except Exception as e:
             logger.error(f"Error extracting PDF text: {e}")
             return ""
 
     def extract_text_from_epub(self, file) -> str:
-        """Extract text from EPUB file"""
+        """Extract text from EPUB file (a path, bytes or a file object)"""
         try:
-            book = epub.read_epub(file)
-            text = ""
-            for item in book.get_items():
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    soup = BeautifulSoup(item.get_content(), 'html.parser')
-                    text += soup.get_text() + "\n"
-            return text
+            return EpubTextExtractor.extract(file).text
         except Exception as e:
             logger.error(f"Error extracting EPUB text: {e}")
             return ""
@@ -62,34 +49,12 @@ class ContentProcessor:
         text = re.sub(r'\s+', ' ', text)
         return text.strip()
 
-    def get_important_sentences(self, text: str, num_sentences: int = 5) -> List[str]:
+    def get_important_sentences(self, text: str, num_sentences: int = 5,
+                                analysis: Optional[Analysis] = None) -> List[str]:
         """Extract most important sentences based on word frequency"""
         try:
-            sentences = sent_tokenize(text)
-            words = word_tokenize(text.lower())
-            
-            # Remove stopwords and calculate word frequency
-            word_freq = {}
-            for word in words:
-                if word.isalnum() and word not in self.stop_words:
-                    word_freq[word] = word_freq.get(word, 0) + 1
-            
-            # Score sentences based on word importance
-            sentence_scores = {}
-            for sentence in sentences:
-                score = 0
-                words = word_tokenize(sentence.lower())
-                for word in words:
-                    if word.isalnum() and word not in self.stop_words:
-                        score += word_freq.get(word, 0)
-                sentence_scores[sentence] = score
-            
-            # Get top sentences
-            important_sentences = sorted(sentence_scores.items(), 
-                                      key=lambda x: x[1], 
-                                      reverse=True)[:num_sentences]
-            
-            return [sentence[0] for sentence in important_sentences]
+            analysis = analysis or self.scorer.analyze(text)
+            return self.scorer.top_sentences(analysis, num_sentences)
         except Exception as e:
             logger.error(f"Error extracting important sentences: {e}")
             return []
@@ -99,20 +64,13 @@ class ContentProcessor:
         try:
             # Preprocess content
             cleaned_content = self.preprocess_text(content)
+            analysis = self.scorer.analyze(cleaned_content)
             
             # Get key sentences
-            key_sentences = self.get_important_sentences(cleaned_content)
+            key_sentences = self.get_important_sentences(cleaned_content, analysis=analysis)
             
             # Extract main topics (most frequent meaningful words)
-            words = word_tokenize(cleaned_content.lower())
-            word_freq = {}
-            for word in words:
-                if word.isalnum() and word not in self.stop_words:
-                    word_freq[word] = word_freq.get(word, 0) + 1
-            
-            main_topics = sorted(word_freq.items(), 
-                               key=lambda x: x[1], 
-                               reverse=True)[:5]
+            main_topics = self.scorer.top_terms(analysis, 5)
             
             # Create summary
             summary = " ".join(key_sentences)
@@ -122,7 +80,7 @@ class ContentProcessor:
             return {
                 'summary': summary,
                 'key_sentences': key_sentences,
-                'main_topics': [topic[0] for topic in main_topics],
+                'main_topics': main_topics,
                 'full_text': cleaned_content
             }
             
@@ -0,0 +1,189 @@
+import logging
+import mmap
+import os
+import shutil
+import struct
+import threading
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from app.utils.disk_cache import cache_folder
+from app.utils.pagination import book_key
+
+logger = logging.getLogger(__name__)
+
+class StoredText:
+    """Read-only, memory-mapped view of a stored book text.
+
+    The file is split into independently compressed blocks, so reading a
+    byte range only inflates the blocks that cover it.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.block_size, n_blocks, self.size = ContentStore.HEADER.unpack_from(self._map, 0)
+        if magic != ContentStore.MAGIC:
+            self._map.close()
+            raise ValueError(f"Not a content blob: {path}")
+        table_start = ContentStore.HEADER.size
+        self._blocks = struct.unpack_from(f"<{n_blocks + 1}Q", self._map, table_start)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _block(self, n: int) -> bytes:
+        return zlib.decompress(self._map[self._blocks[n]:self._blocks[n + 1]])
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Uncompressed bytes ``start:end`` of the text"""
+        end = self.size if end is None else min(end, self.size)
+        if start >= end:
+            return b''
+        first, last = start // self.block_size, (end - 1) // self.block_size
+        data = b''.join(self._block(n) for n in range(first, last + 1))
+        offset = first * self.block_size
+        return data[start - offset:end - offset]
+
+    def blocks(self) -> Iterator[bytes]:
+        """The uncompressed text, one block at a time"""
+        for n in range(len(self._blocks) - 1):
+            yield self._block(n)
+
+    def text(self) -> str:
+        return self.read().decode('utf-8')
+
+    def close(self) -> None:
+        self._map.close()
+
+class ContentStore:
+    """Write-once on-disk store of cleaned book texts keyed by (source, source_id).
+
+    Texts are stored as UTF-8 in zlib-compressed blocks with a block offset
+    table, and read back through ``mmap`` so repeat opens of a book need no
+    network, no HTML parsing and no full decompression.
+    """
+    MAGIC = b'BSTXT\x00\x00\x01'
+    # magic, block size, block count, uncompressed size
+    HEADER = struct.Struct('<8sIIQ')
+    BLOCK_SIZE = 64 * 1024
+    COMPRESSION_LEVEL = 6
+    # Under the cache folder; subclasses keep other kinds of text apart
+    FOLDER = 'books'
+
+    @classmethod
+    def path(cls, source: str, source_id: str) -> str:
+        return os.path.join(cache_folder(), cls.FOLDER, f"{book_key(source, source_id)}.blob")
+
+    @classmethod
+    def has(cls, source: str, source_id: str) -> bool:
+        return os.path.exists(cls.path(source, source_id))
+
+    @classmethod
+    def put(cls, source: str, source_id: str, text: str) -> bool:
+        """Store a book's text unless it is already stored"""
+        return cls.put_stream(source, source_id, [text])
+
+    @classmethod
+    def put_stream(cls, source: str, source_id: str, pieces: Iterable[str]) -> bool:
+        """Store a book's text as it arrives, one piece at a time.
+
+        Compressed blocks are spooled to a temporary file while ``pieces``
+        is consumed, so at most one block of text is held in memory. Nothing
+        is stored if iterating ``pieces`` fails part way. Returns whether
+        the text is now in the store.
+        """
+        path = cls.path(source, source_id)
+        if os.path.exists(path):
+            return True
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        blocks_path = f"{tmp_path}.blocks"
+        table = []
+        size = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(blocks_path, 'w+b') as blocks:
+                def write_block(block: bytes) -> None:
+                    table.append(blocks.tell())
+                    blocks.write(zlib.compress(block, cls.COMPRESSION_LEVEL))
+
+                buffer = bytearray()
+                for piece in pieces:
+                    buffer += piece.encode('utf-8')
+                    while len(buffer) >= cls.BLOCK_SIZE:
+                        write_block(bytes(buffer[:cls.BLOCK_SIZE]))
+                        size += cls.BLOCK_SIZE
+                        del buffer[:cls.BLOCK_SIZE]
+                if buffer:
+                    write_block(bytes(buffer))
+                    size += len(buffer)
+                table.append(blocks.tell())
+                if not size:
+                    return False
+
+                start = cls.HEADER.size + 8 * len(table)
+                with open(tmp_path, 'wb') as f:
+                    f.write(cls.HEADER.pack(cls.MAGIC, cls.BLOCK_SIZE, len(table) - 1, size))
+                    f.write(struct.pack(f"<{len(table)}Q", *(start + offset for offset in table)))
+                    blocks.seek(0)
+                    shutil.copyfileobj(blocks, f)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing content for {source}/{source_id}: {e}")
+            return False
+        finally:
+            for leftover in (blocks_path, tmp_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    @classmethod
+    def delete(cls, source: str, source_id: str) -> None:
+        """Remove a stored text; readers that have it open keep their mapping"""
+        try:
+            os.remove(cls.path(source, source_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error deleting stored content for {source}/{source_id}: {e}")
+
+    @classmethod
+    def open(cls, source: str, source_id: str) -> Optional[StoredText]:
+        path = cls.path(source, source_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            return StoredText(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Error opening stored content {path}: {e}")
+            return None
+
+    @classmethod
+    def each(cls) -> Iterator[StoredText]:
+        """Every stored text, opened one at a time and closed when the next is taken"""
+        try:
+            names = sorted(os.listdir(os.path.join(cache_folder(), cls.FOLDER)))
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith('.blob'):
+                continue
+            try:
+                stored = StoredText(os.path.join(cache_folder(), cls.FOLDER, name))
+            except (OSError, ValueError, struct.error) as e:
+                logger.error(f"Error opening stored content {name}: {e}")
+                continue
+            try:
+                yield stored
+            finally:
+                stored.close()
+
+    @classmethod
+    def get_text(cls, source: str, source_id: str) -> Optional[str]:
+        stored = cls.open(source, source_id)
+        if stored is None:
+            return None
+        try:
+            return stored.text()
+        finally:
+            stored.close()
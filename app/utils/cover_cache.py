@@ -0,0 +1,95 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from app.utils.disk_cache import DiskCache
+from app.utils.http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+
+class CoverCache:
+    """Remembers which cover image URLs exist so they're probed only once.
+
+    Unknown URLs are checked with concurrent HEAD requests on a bounded pool;
+    answers are persisted with a long TTL for covers that exist and a short
+    one for covers that don't. Network errors are never cached.
+    """
+    POSITIVE_TTL = 30 * DAY
+    NEGATIVE_TTL = DAY
+    MAX_WORKERS = 8
+    MISSING_STATUSES = {403, 404, 410}
+
+    store = DiskCache('cover_checks', 16 * 1024 * 1024)
+
+    @classmethod
+    def _cached(cls, url: str) -> Optional[bool]:
+        entry = cls.store.get(url)
+        if entry is None:
+            return None
+        exists = entry.value == b'1'
+        ttl = cls.POSITIVE_TTL if exists else cls.NEGATIVE_TTL
+        if time.time() - entry.stored_at > ttl:
+            return None
+        return exists
+
+    @classmethod
+    def _probe(cls, url: str) -> Optional[bool]:
+        try:
+            status = HttpClient.head(url).status_code
+        except Exception as e:
+            logger.warning(f"Cover check failed for {url}: {e}")
+            return None
+        if status == 200:
+            return True
+        if status in cls.MISSING_STATUSES:
+            return False
+        return None
+
+    @classmethod
+    def check_many(cls, urls: Iterable[str]) -> Dict[str, bool]:
+        """Map each url to whether its cover exists, probing unknown ones concurrently"""
+        results = {}
+        unknown = []
+        for url in dict.fromkeys(urls):
+            cached = cls._cached(url)
+            if cached is None:
+                unknown.append(url)
+            else:
+                results[url] = cached
+
+        if unknown:
+            with ThreadPoolExecutor(max_workers=min(cls.MAX_WORKERS, len(unknown))) as pool:
+                for url, exists in zip(unknown, pool.map(cls._probe, unknown)):
+                    if exists is not None:
+                        cls.store.set(url, b'1' if exists else b'0')
+                    results[url] = bool(exists)
+        return results
+
+    @classmethod
+    def exists(cls, url: str) -> bool:
+        return cls.check_many([url])[url]
+
+    @classmethod
+    def first_existing(cls, urls: List[str]) -> Optional[str]:
+        """First url in ``urls`` whose cover exists"""
+        found = cls.check_many(urls)
+        return next((url for url in urls if found[url]), None)
+
+    @classmethod
+    def filter_books(cls, books: List[Dict], limit: int, key: str = 'cover_url') -> List[Dict]:
+        """Keep the first ``limit`` books whose cover exists, preserving order.
+
+        Candidates are checked a batch at a time so we stop probing as soon
+        as enough covers have been found.
+        """
+        accepted = []
+        pos = 0
+        while pos < len(books) and len(accepted) < limit:
+            batch = books[pos:pos + max(limit - len(accepted), cls.MAX_WORKERS)]
+            pos += len(batch)
+            found = cls.check_many(book[key] for book in batch)
+            accepted.extend(book for book in batch if found[book[key]])
+        return accepted[:limit]
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+def cache_folder() -> str:
+    """Folder holding on-disk caches (``CACHE_FOLDER`` config or env var)"""
+    if has_app_context() and current_app.config.get('CACHE_FOLDER'):
+        return current_app.config['CACHE_FOLDER']
+    return os.environ.get('CACHE_FOLDER') or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'cache'
+    )
+
+class CacheEntry(NamedTuple):
+    value: bytes
+    meta: Dict
+    stored_at: float
+
+class DiskCache:
+    """Size-bounded key/value store in a SQLite file with LRU eviction.
+
+    Values are raw bytes plus a small JSON ``meta`` dict. Every read bumps
+    the entry's access time, and writes evict least recently used entries
+    once the total stored size goes over ``max_bytes``.
+    """
+
+    def __init__(self, name: str, max_bytes: int, folder: Optional[str] = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.folder = folder
+        self._local = threading.local()
+        self._path = None
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            folder = self.folder or cache_folder()
+            os.makedirs(folder, exist_ok=True)
+            self._path = os.path.join(folder, f"{self.name}.sqlite")
+        return self._path
+
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared across threads, so keep one each
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'path', None) != self.path:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, meta TEXT NOT NULL, '
+                'size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+            self._local.conn = conn
+            self._local.path = self.path
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                'SELECT value, meta, stored_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            return CacheEntry(bytes(row[0]), json.loads(row[1]), row[2])
+        except sqlite3.Error as e:
+            logger.error(f"Error reading {self.name} cache: {e}")
+            return None
+
+    def set(self, key: str, value: bytes, meta: Optional[Dict] = None,
+            stored_at: Optional[float] = None) -> None:
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, meta, size, stored_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, value, json.dumps(meta or {}), len(value), stored_at or now, now)
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing {self.name} cache: {e}")
+
+    def touch(self, key: str, meta: Optional[Dict] = None) -> None:
+        """Mark an entry as freshly stored without rewriting its value"""
+        now = time.time()
+        try:
+            if meta is None:
+                self._conn().execute(
+                    'UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, key)
+                )
+            else:
+                self._conn().execute(
+                    'UPDATE entries SET meta = ?, stored_at = ?, accessed_at = ? WHERE key = ?',
+                    (json.dumps(meta), now, now, key)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error updating {self.name} cache: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._conn().execute('DELETE FROM entries WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            logger.error(f"Error deleting from {self.name} cache: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so we don't evict again on the very next write
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed_at'):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+        logger.info(f"Evicted {len(victims)} entries ({freed} bytes) from {self.name} cache")
+
+    def stats(self) -> Dict:
+        try:
+            count, size = self._conn().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+            return {'entries': count, 'bytes': size, 'max_bytes': self.max_bytes}
+        except sqlite3.Error as e:
+            logger.error(f"Error reading {self.name} cache stats: {e}")
+            return {}
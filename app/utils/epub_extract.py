@@ -0,0 +1,171 @@
+import io
+import logging
+import multiprocessing
+import os
+import posixpath
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import unquote
+
+import lxml.html
+from lxml import etree
+
+from app.utils.html_stream import BLOCK_TAGS, SKIP_TAGS
+
+logger = logging.getLogger(__name__)
+
+_CONTAINER_NS = {'c': 'urn:oasis:names:tc:opendocument:xmlns:container'}
+_OPF_NS = {'opf': 'http://www.idpf.org/2007/opf', 'dc': 'http://purl.org/dc/elements/1.1/'}
+# EPUB content documents are UTF-8 (or declare otherwise in a way libxml2 reads)
+_PARSER = lxml.html.HTMLParser(encoding='utf-8', remove_comments=True, no_network=True)
+_HEADINGS = ('h1', 'h2', 'h3')
+# Marks block boundaries; source line breaks inside a paragraph are just whitespace
+_BREAK = '\ue000'
+
+class Chapter(NamedTuple):
+    href: str
+    title: str
+    # Offset of the chapter's first character in ``EpubText.text``
+    offset: int
+
+class EpubText(NamedTuple):
+    text: str
+    chapters: List[Chapter]
+
+def _package(book: zipfile.ZipFile) -> Tuple[str, etree._Element]:
+    """Zip path and parsed root of the book's OPF package document"""
+    container = etree.fromstring(book.read('META-INF/container.xml'))
+    opf_path = container.xpath('//c:rootfile/@full-path', namespaces=_CONTAINER_NS)[0]
+    return opf_path, etree.fromstring(book.read(opf_path))
+
+def _resolve(opf_path: str, href: str) -> str:
+    return posixpath.normpath(posixpath.join(posixpath.dirname(opf_path), unquote(href)))
+
+def spine_paths(book: zipfile.ZipFile) -> List[str]:
+    """Zip paths of the book's content documents, in reading order"""
+    opf_path, opf = _package(book)
+    manifest = {
+        item.get('id'): item.get('href')
+        for item in opf.xpath('//opf:manifest/opf:item', namespaces=_OPF_NS)
+    }
+    return [
+        _resolve(opf_path, manifest[ref])
+        for ref in opf.xpath('//opf:spine/opf:itemref/@idref', namespaces=_OPF_NS)
+        if ref in manifest
+    ]
+
+def metadata(book: zipfile.ZipFile) -> Dict[str, str]:
+    """Dublin Core title, creator, description and language that the book declares"""
+    _, opf = _package(book)
+    info = {}
+    for field, element in (('title', 'title'), ('author', 'creator'),
+                           ('description', 'description'), ('language', 'language')):
+        values = opf.xpath(f'//opf:metadata/dc:{element}/text()', namespaces=_OPF_NS)
+        if values and values[0].strip():
+            info[field] = values[0].strip()
+    return info
+
+def cover_image(book: zipfile.ZipFile) -> Optional[bytes]:
+    """Bytes of the cover image (EPUB 3 ``cover-image`` item or EPUB 2 cover meta), if any"""
+    opf_path, opf = _package(book)
+    hrefs = opf.xpath('//opf:manifest/opf:item[contains(concat(" ", @properties, " "), " cover-image ")]/@href',
+                      namespaces=_OPF_NS)
+    if not hrefs:
+        cover_ids = opf.xpath('//opf:metadata/opf:meta[@name="cover"]/@content', namespaces=_OPF_NS)
+        if cover_ids:
+            hrefs = opf.xpath('//opf:manifest/opf:item[@id=$id]/@href', namespaces=_OPF_NS, id=cover_ids[0])
+    if not hrefs:
+        return None
+    try:
+        return book.read(_resolve(opf_path, hrefs[0]))
+    except KeyError:
+        return None
+
+def chapter_text(document: bytes) -> Tuple[str, str]:
+    """(title, text) of one content document; paragraphs separated by blank lines.
+
+    The tree is built and flattened by lxml in C: skipped elements are
+    stripped, every block element gets a break marker on either side, and
+    ``text_content`` produces the whole string in one go.
+    """
+    root = lxml.html.document_fromstring(document, parser=_PARSER)
+    etree.strip_elements(root, *SKIP_TAGS, with_tail=False)
+    heading = next(root.iter(*_HEADINGS), None)
+    title = ' '.join(heading.text_content().split()) if heading is not None else ''
+    for element in root.iter(*BLOCK_TAGS):
+        element.text = _BREAK + (element.text or '')
+        element.tail = _BREAK + (element.tail or '')
+    paragraphs = (' '.join(block.split()) for block in root.text_content().split(_BREAK))
+    return title, '\n\n'.join(paragraph for paragraph in paragraphs if paragraph)
+
+def _chapter_text_or_empty(document: bytes) -> Tuple[str, str]:
+    try:
+        return chapter_text(document)
+    except Exception as e:
+        logger.warning(f"Skipping unreadable EPUB chapter: {e}")
+        return '', ''
+
+class EpubTextExtractor:
+    """Plain text of an EPUB, read straight from the zip in spine order.
+
+    Chapters are parsed with lxml across ``WORKERS`` spawned processes
+    (most of the per-chapter work is Python, so threads would serialize
+    on the GIL) and joined once at the end, remembering the offset at
+    which each chapter starts. Short books, or a single worker, are
+    parsed inline.
+    """
+    WORKERS = int(os.environ.get('EPUB_WORKERS', os.cpu_count() or 2))
+    PARALLEL_MIN_CHAPTERS = 16
+    CHAPTER_SEPARATOR = '\n\n'
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    # Spawned rather than forked: the app process runs threads
+                    cls._executor = ProcessPoolExecutor(
+                        max_workers=cls.WORKERS, mp_context=multiprocessing.get_context('spawn')
+                    )
+        return cls._executor
+
+    @classmethod
+    def extract(cls, source: Union[str, bytes, BinaryIO]) -> EpubText:
+        """Text and chapter offsets of an EPUB given as a path, bytes or a file object"""
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        with zipfile.ZipFile(source) as book:
+            paths = spine_paths(book)
+            documents = [book.read(path) for path in paths]
+
+        parts = []
+        chapters = []
+        offset = 0
+        for path, (title, text) in zip(paths, cls._chapter_texts(documents)):
+            if not text:
+                continue
+            if parts:
+                offset += len(cls.CHAPTER_SEPARATOR)
+            chapters.append(Chapter(path, title, offset))
+            parts.append(text)
+            offset += len(text)
+        return EpubText(cls.CHAPTER_SEPARATOR.join(parts), chapters)
+
+    @classmethod
+    def _chapter_texts(cls, documents: List[bytes]) -> List[Tuple[str, str]]:
+        if len(documents) < cls.PARALLEL_MIN_CHAPTERS or cls.WORKERS <= 1:
+            return [_chapter_text_or_empty(document) for document in documents]
+        try:
+            chunksize = max(1, len(documents) // (cls.WORKERS * 4))
+            return list(cls._get_executor().map(_chapter_text_or_empty, documents, chunksize=chunksize))
+        except Exception as e:
+            # e.g. a worker died; start a fresh pool next time
+            logger.error(f"Parallel EPUB extraction failed, parsing inline: {e}")
+            with cls._lock:
+                cls._executor = None
+            return [_chapter_text_or_empty(document) for document in documents]
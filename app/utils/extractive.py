@@ -0,0 +1,382 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+from app.utils.content_store import StoredText
+from app.utils.disk_cache import cache_folder
+
+logger = logging.getLogger(__name__)
+
+# Runs of letters/digits, for when NLTK's punkt data is missing
+TOKEN_RE = re.compile(r'[^\W_]+')
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+class Analysis(NamedTuple):
+    sentences: List[str]
+    # Score of each sentence: the summed weight of its words
+    sentence_scores: np.ndarray
+    # Distinct words in order of first appearance, with their weights
+    terms: List[str]
+    term_weights: np.ndarray
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+class DocumentFrequencies:
+    """How many books of the corpus each word appears in, for IDF weighting.
+
+    ``flask build-idf`` stores the table under ``<CACHE_FOLDER>/idf`` as
+    raw little-endian arrays that readers map with ``numpy.memmap``, so
+    loading it costs nothing and its pages are shared between processes:
+    ``keys.u64`` holds the sorted 64-bit hashes of the words, ``df.u32``
+    their counts in the same order, and ``counted.u64`` the sorted hashes
+    of every text counted so far, so a book is counted once per content
+    however late its text arrives. ``vocab.txt`` lists the words themselves
+    in key order (line number = position) and is only read on demand.
+    ``meta.json`` holds the number of books and words.
+    """
+    FOLDER = 'idf'
+    # Longer "words" are OCR noise or URLs and would only bloat the vocabulary
+    MAX_TERM_LENGTH = 40
+    # How often (seconds) ``current`` looks for a rebuilt table
+    RELOAD_SECONDS = 60
+
+    _current: Optional['DocumentFrequencies'] = None
+    _checked_at = 0.0
+    _loaded_mtime: Optional[float] = None
+    _lock = threading.Lock()
+
+    def __init__(self, terms: Iterable[str], counts: Iterable[int], documents: int,
+                 counted: Optional[np.ndarray] = None):
+        terms = list(terms)
+        keys = np.array([self.term_key(term) for term in terms], dtype='<u8')
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.counts = np.asarray(counts, dtype='<u4')[order]
+        self.documents = documents
+        self.counted = counted if counted is not None else np.zeros(0, dtype='<u8')
+        self._terms: Optional[List[str]] = [terms[i] for i in order]
+        self._folder: Optional[str] = None
+
+    @classmethod
+    def _mapped(cls, folder: str, meta: Dict) -> 'DocumentFrequencies':
+        table = cls.__new__(cls)
+        size = meta['terms']
+        table.keys = cls._map(folder, 'keys.u64', '<u8', size)
+        table.counts = cls._map(folder, 'df.u32', '<u4', size)
+        table.counted = cls._map(folder, 'counted.u64', '<u8', meta['counted'])
+        table.documents = meta['documents']
+        table._terms = None
+        table._folder = folder
+        return table
+
+    @staticmethod
+    def _map(folder: str, name: str, dtype: str, size: int) -> np.ndarray:
+        if not size:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(folder, name), dtype=dtype, mode='r', shape=(size,))
+
+    @staticmethod
+    def term_key(term: str) -> int:
+        return _hash64(term.encode('utf-8'))
+
+    @staticmethod
+    def text_key(text: Union[str, StoredText]) -> int:
+        """Hash of a text, or of a ``StoredText`` read block by block; both give the same key"""
+        if isinstance(text, str):
+            return _hash64(text.encode('utf-8'))
+        digest = hashlib.blake2b(digest_size=8)
+        for block in text.blocks():
+            digest.update(block)
+        return int.from_bytes(digest.digest(), 'little')
+
+    @staticmethod
+    def _pieces(text: Union[str, StoredText]) -> Iterator[str]:
+        """A text in pieces cut at whitespace, one block of a ``StoredText`` at a time"""
+        if isinstance(text, str):
+            yield text
+            return
+        carry = b''
+        for block in text.blocks():
+            data = carry + block
+            # Never split a word (or a UTF-8 sequence) across pieces
+            cut = max(data.rfind(b' '), data.rfind(b'\n'))
+            if cut < 0:
+                carry = data
+                continue
+            carry = data[cut + 1:]
+            yield data[:cut].decode('utf-8')
+        if carry:
+            yield carry.decode('utf-8')
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def terms(self) -> List[str]:
+        """The words, in table order; read from ``vocab.txt`` on first use"""
+        if self._terms is None:
+            with open(os.path.join(self._folder, 'vocab.txt'), encoding='utf-8') as f:
+                self._terms = f.read().split('\n')[:len(self.keys)]
+        return self._terms
+
+    def idf(self, terms: List[str]) -> np.ndarray:
+        """Smoothed inverse document frequency; unseen words get the highest value"""
+        df = np.zeros(len(terms), dtype=np.float64)
+        if len(self.keys) and terms:
+            keys = np.fromiter((self.term_key(t) for t in terms), dtype='<u8', count=len(terms))
+            positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+            found = self.keys[positions] == keys
+            df[found] = self.counts[positions[found]]
+        return np.log((1 + self.documents) / (1 + df)) + 1
+
+    @classmethod
+    def folder(cls) -> str:
+        return os.path.join(cache_folder(), cls.FOLDER)
+
+    @classmethod
+    def load(cls, folder: Optional[str] = None) -> Optional['DocumentFrequencies']:
+        """The stored table, memory-mapped; None if none was built"""
+        folder = folder or cls.folder()
+        try:
+            with open(os.path.join(folder, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            return cls._mapped(folder, meta)
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.error(f"Error loading document frequencies from {folder}: {e}")
+            return None
+
+    @classmethod
+    def current(cls) -> Optional['DocumentFrequencies']:
+        """The stored table, reloaded at most every ``RELOAD_SECONDS`` if it was rebuilt"""
+        if time.time() - cls._checked_at < cls.RELOAD_SECONDS:
+            return cls._current
+        with cls._lock:
+            if time.time() - cls._checked_at >= cls.RELOAD_SECONDS:
+                try:
+                    mtime = os.path.getmtime(os.path.join(cls.folder(), 'meta.json'))
+                except OSError:
+                    mtime = None
+                if mtime != cls._loaded_mtime:
+                    cls._current = cls.load() if mtime else None
+                    cls._loaded_mtime = mtime
+                cls._checked_at = time.time()
+        return cls._current
+
+    @classmethod
+    def update(cls, texts: Iterable[Union[str, StoredText]], scorer: 'ExtractiveScorer',
+               folder: Optional[str] = None, rebuild: bool = False) -> Tuple[int, 'DocumentFrequencies']:
+        """Count the words of ``texts`` into the stored table.
+
+        ``texts`` are strings or ``StoredText`` handles, which are read a
+        block at a time. Texts counted before (by content hash) are skipped,
+        so ``texts`` may simply be every book there is. Returns how many
+        were added and the updated table.
+        """
+        folder = folder or cls.folder()
+        table = None if rebuild else cls.load(folder)
+        terms = list(table.terms) if table else []
+        index = {term: i for i, term in enumerate(terms)}
+        counts = table.counts.tolist() if table else []
+        documents = table.documents if table else 0
+        counted = set(table.counted.tolist()) if table else set()
+
+        added = 0
+        for text in texts:
+            if not text:
+                continue
+            key = cls.text_key(text)
+            if key in counted:
+                continue
+            words = set()
+            for piece in cls._pieces(text):
+                words.update(scorer.words(piece))
+            for word in words:
+                if len(word) > cls.MAX_TERM_LENGTH:
+                    continue
+                i = index.get(word)
+                if i is None:
+                    index[word] = len(terms)
+                    terms.append(word)
+                    counts.append(1)
+                else:
+                    counts[i] += 1
+            counted.add(key)
+            documents += 1
+            added += 1
+
+        updated = cls(terms, counts, documents, np.array(sorted(counted), dtype='<u8'))
+        if added or table is None:
+            updated._write(folder)
+        return added, updated
+
+    def _write(self, folder: str) -> None:
+        os.makedirs(folder, exist_ok=True)
+        meta = {'documents': self.documents, 'terms': len(self.keys), 'counted': len(self.counted),
+                'built_at': time.time()}
+        # Each file is swapped in whole and meta.json last, so readers never
+        # see a half-written table (mapped old files stay valid until closed)
+        for name, write in (
+            ('vocab.txt', lambda f: f.write('\n'.join(self.terms).encode('utf-8'))),
+            ('keys.u64', lambda f: f.write(self.keys.astype('<u8').tobytes())),
+            ('df.u32', lambda f: f.write(self.counts.astype('<u4').tobytes())),
+            ('counted.u64', lambda f: f.write(self.counted.astype('<u8').tobytes())),
+            ('meta.json', lambda f: f.write(json.dumps(meta).encode('utf-8'))),
+        ):
+            fd, tmp = tempfile.mkstemp(dir=folder, prefix=f".{name}.")
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp, os.path.join(folder, name))
+
+class ExtractiveScorer:
+    """Word-frequency sentence scoring shared by every extractive summary.
+
+    Words are found with ``word_tokenize`` (alphanumeric tokens only,
+    filtered against a frozen stop-word set), once over the whole text for
+    the counts and once per sentence for the scores, and the scoring itself
+    is a couple of ``numpy.bincount`` calls. With a
+    ``DocumentFrequencies`` table, word counts are weighted by IDF so words
+    common to every book stop dominating. The shared scorer uses the table
+    built by ``flask build-idf`` when there is one (``EXTRACTIVE_TFIDF``
+    turns this off).
+    """
+    USE_CORPUS_IDF = os.environ.get('EXTRACTIVE_TFIDF', 'true').lower() == 'true'
+    # Bump when scoring changes so cached extractive summaries are recomputed
+    VERSION = 2
+
+    _shared: Optional['ExtractiveScorer'] = None
+    _punkt_missing = False
+    _lock = threading.Lock()
+
+    def __init__(self, stop_words: Optional[Iterable[str]] = None,
+                 document_frequencies: Optional[DocumentFrequencies] = None,
+                 corpus_idf: bool = False):
+        self.stop_words: FrozenSet[str] = frozenset(
+            self.default_stop_words() if stop_words is None else stop_words
+        )
+        self._document_frequencies = document_frequencies
+        self.corpus_idf = corpus_idf
+
+    @property
+    def document_frequencies(self) -> Optional[DocumentFrequencies]:
+        if self._document_frequencies is None and self.corpus_idf:
+            return DocumentFrequencies.current()
+        return self._document_frequencies
+
+    @classmethod
+    def shared(cls) -> 'ExtractiveScorer':
+        """The process-wide scorer: NLTK English stop words, corpus IDF if built"""
+        if cls._shared is None:
+            with cls._lock:
+                if cls._shared is None:
+                    cls._shared = cls(corpus_idf=cls.USE_CORPUS_IDF)
+        return cls._shared
+
+    def version(self) -> str:
+        """Identifies what scores come out of this scorer, for cache keys"""
+        frequencies = self.document_frequencies
+        weighting = f"idf{frequencies.documents}-{len(frequencies)}" if frequencies else 'tf'
+        return f"extractive{self.VERSION}-{weighting}"
+
+    @staticmethod
+    def default_stop_words() -> FrozenSet[str]:
+        try:
+            from nltk.corpus import stopwords
+            return frozenset(stopwords.words('english'))
+        except Exception as e:
+            logger.warning(f"NLTK stopwords unavailable ({type(e).__name__}), scoring without them")
+            return frozenset()
+
+    @staticmethod
+    def split_sentences(text: str) -> List[str]:
+        try:
+            sentences = sent_tokenize(text)
+        except Exception:
+            sentences = SENTENCE_RE.split(text)
+        return [s.strip() for s in sentences if s.strip()]
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        if not cls._punkt_missing:
+            try:
+                return word_tokenize(text)
+            except LookupError:
+                # Looking the data up again on every sentence would be slow
+                logger.warning("NLTK punkt data unavailable, tokenizing words with a regex")
+                cls._punkt_missing = True
+        return TOKEN_RE.findall(text)
+
+    def words(self, text: str) -> List[str]:
+        stop_words = self.stop_words
+        return [word for word in self.tokenize(text.lower()) if word.isalnum() and word not in stop_words]
+
+    def analyze(self, text: Optional[str] = None, sentences: Optional[List[str]] = None) -> Analysis:
+        """Score the sentences of ``text`` (or the given ``sentences``).
+
+        Word counts come from tokenizing the whole text, and each sentence
+        scores the counts of the words it tokenizes to, as the original
+        ``word_tokenize`` implementation did; the two tokenizations differ
+        where punkt splits the lowercased text differently.
+        """
+        if sentences is None:
+            sentences = self.split_sentences(text or '')
+        vocab: Dict[str, int] = {}
+        if text is None:
+            words = [word for sentence in sentences for word in self.words(sentence)]
+        else:
+            words = self.words(text)
+        term_array = np.fromiter((vocab.setdefault(word, len(vocab)) for word in words),
+                                 dtype=np.int64, count=len(words))
+        terms = list(vocab)
+        weights = np.bincount(term_array, minlength=len(terms)).astype(np.float64)
+        frequencies = self.document_frequencies
+        if frequencies is not None and terms:
+            weights *= frequencies.idf(terms)
+
+        term_ids: List[int] = []
+        sentence_ids: List[int] = []
+        for index, sentence in enumerate(sentences):
+            # A word the whole-text pass never saw counts for nothing
+            ids = [i for i in map(vocab.get, self.words(sentence)) if i is not None]
+            term_ids.extend(ids)
+            sentence_ids.extend([index] * len(ids))
+        scores = np.bincount(np.array(sentence_ids, dtype=np.int64),
+                             weights=weights[np.array(term_ids, dtype=np.int64)], minlength=len(sentences))
+        return Analysis(sentences, scores, terms, weights)
+
+    @staticmethod
+    def _top(values: np.ndarray, candidates: np.ndarray, n: int) -> np.ndarray:
+        # Stable, so ties keep their original order
+        return candidates[np.argsort(-values[candidates], kind='stable')[:n]]
+
+    def top_sentences(self, analysis: Analysis, n: int, in_text_order: bool = False,
+                      scored_only: bool = False) -> List[str]:
+        """The ``n`` best scoring sentences; each distinct sentence at most once.
+
+        With ``scored_only``, sentences without a single meaningful word are
+        never picked; otherwise they fill in after the rest, in text order.
+        """
+        first_seen: Dict[str, int] = {}
+        for index, sentence in enumerate(analysis.sentences):
+            first_seen.setdefault(sentence, index)
+        candidates = np.fromiter(first_seen.values(), dtype=np.int64, count=len(first_seen))
+        if scored_only:
+            candidates = candidates[analysis.sentence_scores[candidates] > 0]
+        top = self._top(analysis.sentence_scores, candidates, n)
+        if in_text_order:
+            top = np.sort(top)
+        return [analysis.sentences[i] for i in top]
+
+    def top_terms(self, analysis: Analysis, n: int) -> List[str]:
+        top = self._top(analysis.term_weights, np.arange(len(analysis.terms)), n)
+        return [analysis.terms[i] for i in top]
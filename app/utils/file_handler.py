@@ -1,8 +1,19 @@
+import logging
 import os
+import threading
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
 import PyPDF2
 import ebooklib
 from ebooklib import epub
 
+from app.utils.epub_extract import spine_paths
+
+logger = logging.getLogger(__name__)
+
 ALLOWED_EXTENSIONS = {'pdf', 'epub'}
 
 def allowed_file(filename):
@@ -34,25 +45,140 @@ def process_book_file(filepath):
         
     return book_info
 
+class BookHandle:
+    """An open EPUB or PDF plus its page table, ready for repeated page reads.
+
+    EPUB pages are the spine's content documents, read from the open zip
+    by path; PDF pages come from a reader whose page tree is flattened on
+    open. Reads are serialized per handle, since neither the zip's nor the
+    PDF reader's file position can be shared between threads. ``users``
+    counts the callers holding the handle from ``BookHandleCache.open``;
+    a retired handle is closed when the last of them is done.
+    """
+
+    def __init__(self, filepath: str, stamp: Tuple[int, int]):
+        self.filepath = filepath
+        self.stamp = stamp
+        self.file_type = os.path.splitext(filepath)[1].lower()
+        self.users = 0
+        self.retired = False
+        self._lock = threading.Lock()
+        if self.file_type == '.pdf':
+            self._file = open(filepath, 'rb')
+            self._reader = PyPDF2.PdfReader(self._file)
+            self.page_count = len(self._reader.pages)
+        elif self.file_type == '.epub':
+            self._file = zipfile.ZipFile(filepath)
+            self._documents = spine_paths(self._file)
+            self.page_count = len(self._documents)
+        else:
+            raise ValueError(f"Unsupported book file: {filepath}")
+
+    def page(self, number: int) -> str:
+        """Content of page ``number`` (0-based): PDF page text or EPUB document HTML"""
+        if not 0 <= number < self.page_count:
+            return ""
+        with self._lock:
+            if self.file_type == '.pdf':
+                return self._reader.pages[number].extract_text()
+            return self._file.read(self._documents[number]).decode('utf-8')
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+class BookHandleCache:
+    """Process-wide LRU of open ``BookHandle`` objects, keyed by file path.
+
+    A handle is replaced when its file's mtime or size changes, and the
+    least recently used handle is dropped once more than ``MAX_BOOKS`` are
+    cached. Dropped handles are retired rather than closed while a caller
+    still holds them, so a page read never loses its file mid-way.
+    """
+    MAX_BOOKS = int(os.environ.get('BOOK_HANDLE_CACHE_SIZE', 16))
+
+    _handles: 'OrderedDict[str, BookHandle]' = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    @contextmanager
+    def open(cls, filepath: str) -> Iterator[BookHandle]:
+        """The cached handle for ``filepath``, held open for the ``with`` block"""
+        handle = cls._acquire(filepath)
+        try:
+            yield handle
+        finally:
+            cls._release(handle)
+
+    @classmethod
+    def _acquire(cls, filepath: str) -> BookHandle:
+        filepath = os.path.abspath(filepath)
+        info = os.stat(filepath)
+        stamp = (info.st_mtime_ns, info.st_size)
+        with cls._lock:
+            handle = cls._cached(filepath, stamp)
+            if handle is not None:
+                return handle
+
+        # Parse outside the lock; if another thread cached the same file meanwhile, use its handle
+        opened = BookHandle(filepath, stamp)
+        retired = []
+        with cls._lock:
+            handle = cls._cached(filepath, stamp)
+            if handle is None:
+                previous = cls._handles.pop(filepath, None)
+                if previous is not None:
+                    retired.append(previous)
+                cls._handles[filepath] = opened
+                while len(cls._handles) > cls.MAX_BOOKS:
+                    retired.append(cls._handles.popitem(last=False)[1])
+                opened.users += 1
+                handle = opened
+            else:
+                retired.append(opened)
+            closing = [h for h in retired if cls._retire(h)]
+        for stale in closing:
+            stale.close()
+        return handle
+
+    @classmethod
+    def _cached(cls, filepath: str, stamp: Tuple[int, int]) -> Optional[BookHandle]:
+        """Take a reference to the cached handle if it's current. Call with ``_lock`` held."""
+        handle = cls._handles.get(filepath)
+        if handle is None or handle.stamp != stamp:
+            return None
+        cls._handles.move_to_end(filepath)
+        handle.users += 1
+        return handle
+
+    @staticmethod
+    def _retire(handle: BookHandle) -> bool:
+        """Mark a handle dropped from the cache; True if nobody holds it and it can close now"""
+        handle.retired = True
+        return handle.users == 0
+
+    @classmethod
+    def _release(cls, handle: BookHandle) -> None:
+        with cls._lock:
+            handle.users -= 1
+            closing = handle.retired and handle.users == 0
+        if closing:
+            handle.close()
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            handles = list(cls._handles.values())
+            cls._handles.clear()
+            closing = [h for h in handles if cls._retire(h)]
+        for handle in closing:
+            handle.close()
+
 def get_book_content(filepath, page_number):
     """Extract content from a specific page of the book"""
-    file_ext = os.path.splitext(filepath)[1].lower()
-    content = ""
-    
     try:
-        if file_ext == '.pdf':
-            with open(filepath, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                if 0 <= page_number < len(pdf_reader.pages):
-                    content = pdf_reader.pages[page_number].extract_text()
-                    
-        elif file_ext == '.epub':
-            book = epub.read_epub(filepath)
-            documents = book.get_items_of_type(ebooklib.ITEM_DOCUMENT)
-            if 0 <= page_number < len(documents):
-                content = documents[page_number].get_content().decode('utf-8')
-                
+        with BookHandleCache.open(filepath) as handle:
+            return handle.page(page_number)
     except Exception as e:
-        print(f"Error extracting content: {e}")
-        
-    return content
+        logger.error(f"Error extracting content from {filepath}: {e}")
+        return ""
@@ -1,4 +1,4 @@
-import requests
+from app.utils.http_client import HttpClient
 from typing import List, Dict, Optional
 
 class GoogleBooksAPI:
@@ -14,7 +14,7 @@ class GoogleBooksAPI:
                 'maxResults': max_results,
                 'key': cls.API_KEY
             }
-            response = requests.get(url, params=params)
+            response = HttpClient.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -44,7 +44,7 @@ class GoogleBooksAPI:
         try:
             url = f"{cls.BASE_URL}/volumes/{book_id}"
             params = {'key': cls.API_KEY}
-            response = requests.get(url, params=params)
+            response = HttpClient.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -1,5 +1,6 @@
-import requests
-from bs4 import BeautifulSoup
+from app.utils.http_client import HttpClient
+from app.utils.cover_cache import CoverCache
+from app.utils.html_parsing import parse_html
 from typing import List, Dict, Optional
 import logging
 import re
@@ -28,9 +29,9 @@ class GutenbergAPI:
         """Get all available formats for a book"""
         try:
             url = f"{cls.BASE_URL}/ebooks/{book_id}"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, "//table[contains(concat(' ', @class, ' '), ' files ')]")
                 formats = {}
                 
                 # First try to get the high quality cover
@@ -40,15 +41,10 @@ class GutenbergAPI:
                     f"{cls.BASE_URL}/cache/epub/{book_id}/images/cover.jpg",
                 ]
                 
-                # Test each cover URL until we find one that works
-                for cover_url in cover_patterns:
-                    try:
-                        cover_response = requests.head(cover_url)
-                        if cover_response.status_code == 200:
-                            formats['cover'] = cover_url
-                            break
-                    except Exception:
-                        continue
+                # Use the first cover URL that works (checked concurrently, cached)
+                cover_url = CoverCache.first_existing(cover_patterns)
+                if cover_url:
+                    formats['cover'] = cover_url
                 
                 # Find all download links
                 for link in soup.select('table.files a'):
@@ -82,10 +78,10 @@ class GutenbergAPI:
         """Get top/featured books from Gutenberg"""
         try:
             url = f"{cls.BASE_URL}{cls.ENDPOINTS['most_downloaded']}"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                books = []
+                soup = parse_html(response.text, 'booklink')
+                candidates = []
                 
                 # Find all book entries
                 for book_entry in soup.select('.booklink'):
@@ -124,36 +120,28 @@ class GutenbergAPI:
                         # Get cover URL
                         cover_url = f"{cls.BASE_URL}/cache/epub/{book_id}/pg{book_id}.cover.medium.jpg"
                         
-                        # Verify cover exists
-                        try:
-                            cover_response = requests.head(cover_url)
-                            if cover_response.status_code != 200:
-                                continue  # Skip books without covers
-                        except Exception:
-                            continue
-                        
-                        books.append({
+                        candidates.append({
                             'id': book_id,
                             'title': title,
                             'author': author,
                             'cover_url': cover_url,
                             'source': 'gutenberg'
                         })
-                        
-                        if len(books) >= limit:
-                            break
                             
                     except Exception as e:
                         logger.error(f"Error processing book entry: {e}")
                         continue
                 
+                # Skip books without covers; covers are checked concurrently
+                books = CoverCache.filter_books(candidates, limit)
+                
                 # If we don't have enough books, try the latest books endpoint
                 if len(books) < limit:
                     latest_url = f"{cls.BASE_URL}{cls.ENDPOINTS['latest']}"
                     try:
-                        response = requests.get(latest_url)
+                        response = HttpClient.get(latest_url)
                         if response.status_code == 200:
-                            soup = BeautifulSoup(response.text, 'html.parser')
+                            soup = parse_html(response.text, 'booklink')
                             for book_entry in soup.select('.booklink'):
                                 # (Same book processing logic as above)
                                 # ... (Copy the same book processing logic here)
@@ -173,9 +161,9 @@ class GutenbergAPI:
         """Get books from a specific bookshelf/category"""
         try:
             url = f"{cls.BASE_URL}/ebooks/bookshelf/{bookshelf}"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'booklink')
                 books = []
                 
                 for item in soup.select('.booklink')[:limit]:
@@ -209,10 +197,10 @@ class GutenbergAPI:
         try:
             formats = cls.get_book_formats(book_id)
             if format in formats:
-                response = requests.get(formats[format])
+                response = HttpClient.get(formats[format])
                 if response.status_code == 200:
                     if format == 'html':
-                        soup = BeautifulSoup(response.text, 'html.parser')
+                        soup = parse_html(response.text)
                         # Remove navigation and header elements
                         for elem in soup.select('pre'):
                             elem.decompose()
@@ -227,9 +215,9 @@ class GutenbergAPI:
         """Search for books"""
         try:
             url = f"{cls.BASE_URL}/ebooks/search/?query={query}&submit_search=Go%21"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'booklink')
                 books = []
                 
                 for item in soup.select('.booklink')[:limit]:
@@ -261,9 +249,9 @@ class GutenbergAPI:
         """Get just titles without fetching covers"""
         try:
             url = f"{cls.BASE_URL}/ebooks/bookshelf/{category}"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'booklink')
                 books = []
                 
                 for link in soup.select('.booklink a')[:limit]:
@@ -295,9 +283,9 @@ class GutenbergAPI:
         """Get all available bookshelves/categories from Gutenberg"""
         try:
             url = f"{cls.BASE_URL}/ebooks/bookshelf/"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, "//ul[contains(concat(' ', @class, ' '), ' results ')]")
                 bookshelves = []
                 
                 # Find all bookshelf links
@@ -331,9 +319,9 @@ class GutenbergAPI:
         """Get basic book information"""
         try:
             url = f"{cls.BASE_URL}/ebooks/{book_id}"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # Get title and author
                 title_elem = soup.select_one('h1')
@@ -367,9 +355,9 @@ class GutenbergAPI:
         """Get all available categories"""
         try:
             url = f"{cls.BASE_URL}/browse/scores/top"
-            response = requests.get(url)
+            response = HttpClient.get(url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'category')
                 categories = []
                 
                 for link in soup.select('.category a'):
@@ -0,0 +1,52 @@
+from functools import lru_cache
+from typing import Iterable, Optional, Union
+
+import lxml.html
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# Backend used for every scraped page; much faster than 'html.parser'
+PARSER = 'lxml'
+
+_UTF8_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+@lru_cache(maxsize=None)
+def _class_xpath(classes: tuple) -> etree.XPath:
+    """Outermost elements carrying any of ``classes``"""
+    test = ' or '.join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in classes
+    )
+    return etree.XPath(f"//*[{test}][not(ancestor::*[{test}])]")
+
+@lru_cache(maxsize=None)
+def _xpath(expression: str) -> etree.XPath:
+    return etree.XPath(expression)
+
+def parse_html(markup: Union[str, bytes],
+               only: Optional[Union[str, Iterable[str]]] = None) -> BeautifulSoup:
+    """Parse a scraped page, building soup only for the subtrees that are needed.
+
+    ``only`` is a CSS class name, several class names, or an XPath
+    expression (anything starting with ``/``). The page is first parsed
+    by lxml in C, the matching elements are picked out with XPath, and only
+    they are turned into BeautifulSoup objects. They become the top-level
+    nodes of the returned soup, so ``soup.select('.booklink')`` and friends
+    work as on a full tree.
+    """
+    if only is None:
+        return BeautifulSoup(markup, PARSER)
+    if not markup or not markup.strip():
+        return BeautifulSoup('', PARSER)
+
+    if isinstance(only, str) and only.startswith('/'):
+        find = _xpath(only)
+    else:
+        find = _class_xpath((only,) if isinstance(only, str) else tuple(only))
+
+    if isinstance(markup, str):
+        # lxml refuses str input that carries an XML encoding declaration
+        root = lxml.html.document_fromstring(markup.encode('utf-8'), parser=_UTF8_PARSER)
+    else:
+        root = lxml.html.document_fromstring(markup)
+    fragment = ''.join(etree.tostring(node, encoding='unicode', with_tail=False) for node in find(root))
+    return BeautifulSoup(fragment, PARSER)
@@ -0,0 +1,161 @@
+import codecs
+import logging
+from typing import Iterable, Iterator, List, Optional
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Size of the pieces a streamed download is read in
+CHUNK_SIZE = 64 * 1024
+
+# Elements whose text never belongs to the book body
+SKIP_TAGS = frozenset({'head', 'nav', 'header', 'script', 'style', 'noscript'})
+
+# Elements that start a new paragraph
+BLOCK_TAGS = frozenset({
+    'p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'dt', 'dd', 'tr',
+    'blockquote', 'pre', 'table', 'ul', 'ol', 'dl', 'br', 'hr', 'section',
+    'article', 'body'
+})
+
+class _ParagraphTarget:
+    """lxml parser target turning start/end/data events into paragraphs.
+
+    No tree is built: text is buffered only until the next block boundary,
+    so memory is bounded by the longest paragraph rather than the document.
+    """
+
+    def __init__(self, skip_tags: Iterable[str], block_tags: Iterable[str],
+                 word_tags: Iterable[str] = ()):
+        self.skip_tags = frozenset(skip_tags)
+        self.block_tags = frozenset(block_tags)
+        self.word_tags = frozenset(word_tags)
+        self.paragraphs: List[str] = []
+        self._buffer: List[str] = []
+        self._skip_depth = 0
+        self._pre_depth = 0
+
+    @staticmethod
+    def _name(tag) -> str:
+        # Drop any XML namespace and normalise case
+        return str(tag).rsplit('}', 1)[-1].lower()
+
+    def start(self, tag, attrib) -> None:
+        name = self._name(tag)
+        if self._skip_depth or name in self.skip_tags:
+            self._skip_depth += 1
+            return
+        if name in self.block_tags:
+            self._flush()
+        if name == 'pre':
+            self._pre_depth += 1
+
+    def end(self, tag) -> None:
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+        name = self._name(tag)
+        if name in self.block_tags:
+            self._flush()
+        elif name in self.word_tags:
+            self._buffer.append(' ')
+        if name == 'pre' and self._pre_depth:
+            self._pre_depth -= 1
+
+    def data(self, text: str) -> None:
+        if not self._skip_depth:
+            self._buffer.append(text)
+
+    def comment(self, text: str) -> None:
+        pass
+
+    def close(self) -> None:
+        self._flush()
+
+    def _flush(self) -> None:
+        text = ''.join(self._buffer)
+        self._buffer = []
+        if self._pre_depth:
+            # Preformatted text keeps its line structure
+            self.paragraphs.extend(line.strip() for line in text.split('\n') if line.strip())
+            return
+        text = ' '.join(text.split())
+        if text:
+            self.paragraphs.append(text)
+
+    def drain(self) -> List[str]:
+        paragraphs, self.paragraphs = self.paragraphs, []
+        return paragraphs
+
+def _stream(parser, target: _ParagraphTarget, chunks: Iterable[bytes]) -> Iterator[str]:
+    # libxml2's push parser loses track of raw-text elements such as
+    # <style> when a chunk ends inside their closing tag, so only ever
+    # feed up to the last '>' seen and carry the rest over
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        cut = pending.rfind(b'>') + 1
+        if cut:
+            parser.feed(pending[:cut])
+            pending = pending[cut:]
+            yield from target.drain()
+    if pending:
+        parser.feed(pending)
+    parser.close()
+    yield from target.drain()
+
+def iter_html_paragraphs(chunks: Iterable[bytes], encoding: Optional[str] = None,
+                         skip_tags: Iterable[str] = SKIP_TAGS) -> Iterator[str]:
+    """Yield the paragraphs of an HTML document fed in as byte chunks.
+
+    Navigation, headers, scripts and styles are dropped as they are parsed;
+    each paragraph is yielded as soon as its closing tag has been read.
+    """
+    target = _ParagraphTarget(skip_tags, BLOCK_TAGS)
+    parser = etree.HTMLParser(target=target, encoding=encoding, recover=True,
+                              remove_comments=True, no_network=True)
+    return _stream(parser, target, chunks)
+
+def iter_xml_paragraphs(chunks: Iterable[bytes], paragraph_tag: str = 'PARAGRAPH',
+                        word_tag: str = 'WORD') -> Iterator[str]:
+    """Yield paragraphs of an OCR XML document (e.g. Internet Archive ``_djvu.xml``)"""
+    # Words and lines only separate words; a paragraph boundary ends a paragraph
+    target = _ParagraphTarget((), {paragraph_tag.lower()}, {word_tag.lower(), 'line'})
+    parser = etree.XMLParser(target=target, recover=True, huge_tree=True,
+                             resolve_entities=False, no_network=True)
+    return _stream(parser, target, chunks)
+
+def iter_text_lines(chunks: Iterable[bytes], encoding: str = 'utf-8') -> Iterator[str]:
+    """Decode a plain-text download incrementally and yield its lines"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        yield from (line.rstrip('\r') for line in lines)
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+def _declared_encoding(response) -> Optional[str]:
+    # requests assumes ISO-8859-1 for any text/* response without a charset;
+    # only trust an explicit one and let the parser sniff the rest
+    if 'charset=' in response.headers.get('Content-Type', '').lower():
+        return response.encoding
+    return None
+
+def iter_response_paragraphs(response, xml: bool = False) -> Iterator[str]:
+    """Paragraphs of a streamed ``requests`` response, closing it when done"""
+    with response:
+        chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+        if xml:
+            yield from iter_xml_paragraphs(chunks)
+        else:
+            yield from iter_html_paragraphs(chunks, _declared_encoding(response))
+
+def iter_response_lines(response) -> Iterator[str]:
+    """Lines of a streamed plain-text ``requests`` response, closing it when done"""
+    with response:
+        yield from iter_text_lines(response.iter_content(chunk_size=CHUNK_SIZE),
+                                   _declared_encoding(response) or 'utf-8')
@@ -0,0 +1,138 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from app.utils.rate_limiter import RateLimiter
+from app.utils.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+class HttpClient:
+    """Shared HTTP layer used by every fetcher and scraper.
+
+    Keeps one pooled keep-alive ``Session`` per host, applies connect/read
+    timeouts to every call, retries 5xx/429 responses and connection errors
+    with jittered exponential backoff, caps how many requests may be in
+    flight against a single host at once, and throttles each host through
+    the shared ``RateLimiter``.
+    """
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 30
+    MAX_RETRIES = 3
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 10.0
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    MAX_PER_HOST = 4
+    USER_AGENT = 'BookSurfer/1.0 (+https://github.com/Parthivkoli/BookSurfer)'
+
+    # What a failed call raises, so callers needn't import requests themselves
+    Error = requests.RequestException
+
+    # Replaces the pooled HTTPAdapter on new sessions, e.g. to replay recorded fixtures
+    transport: Optional[BaseAdapter] = None
+
+    _sessions: Dict[str, requests.Session] = {}
+    _host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def use_transport(cls, transport: Optional[BaseAdapter]) -> None:
+        """Send all further requests through ``transport`` (None restores the network)"""
+        with cls._lock:
+            cls.transport = transport
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
+            cls._host_slots.clear()
+
+    @classmethod
+    def _host(cls, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    @classmethod
+    def session_for(cls, url: str) -> requests.Session:
+        """Get (or create) the pooled session for the host of ``url``"""
+        host = cls._host(url)
+        session = cls._sessions.get(host)
+        if session is None:
+            with cls._lock:
+                session = cls._sessions.get(host)
+                if session is None:
+                    session = requests.Session()
+                    adapter = cls.transport or HTTPAdapter(pool_connections=1, pool_maxsize=cls.MAX_PER_HOST)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers['User-Agent'] = cls.USER_AGENT
+                    cls._sessions[host] = session
+                    cls._host_slots[host] = threading.BoundedSemaphore(cls.MAX_PER_HOST)
+        return session
+
+    @classmethod
+    def _backoff(cls, attempt: int, response: Optional[requests.Response] = None) -> float:
+        # Honour Retry-After when the server sends a number of seconds
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), cls.BACKOFF_MAX)
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(cls.BACKOFF_MAX, cls.BACKOFF_BASE * (2 ** attempt)))
+
+    @classmethod
+    def request(cls, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the pooled session for the url's host.
+
+        Accepts the same keyword arguments as ``requests.request``. A
+        response with a retryable status is returned as-is once retries are
+        exhausted; connection errors and timeouts are re-raised.
+        """
+        kwargs.setdefault('timeout', (cls.CONNECT_TIMEOUT, cls.READ_TIMEOUT))
+        session = cls.session_for(url)
+        slots = cls._host_slots[cls._host(url)]
+        rate_key = urlsplit(url).netloc.lower()
+
+        for attempt in range(cls.MAX_RETRIES + 1):
+            response = None
+            try:
+                # Wait for a token before taking a slot so throttled calls
+                # don't hold a connection hostage
+                RateLimiter.acquire(rate_key)
+                with slots:
+                    response = session.request(method, url, **kwargs)
+                if response.status_code not in cls.RETRY_STATUSES or attempt == cls.MAX_RETRIES:
+                    return response
+                response.close()
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == cls.MAX_RETRIES:
+                    raise
+                logger.warning(f"{method} {url} failed ({e}), retrying")
+            time.sleep(cls._backoff(attempt, response))
+
+    @classmethod
+    def get(cls, url: str, **kwargs) -> requests.Response:
+        """GET ``url``, answering from ``ResponseCache`` when it has a rule for it"""
+        if kwargs.get('stream') or kwargs.get('headers'):
+            return cls.request('GET', url, **kwargs)
+
+        params = kwargs.pop('params', None)
+        full_url = requests.Request('GET', url, params=params).prepare().url if params else url
+        if ResponseCache.policy_for(full_url) is None:
+            return cls.request('GET', full_url, **kwargs)
+
+        def send(conditional_headers):
+            return cls.request('GET', full_url, headers=conditional_headers, **kwargs)
+
+        return ResponseCache.fetch(full_url, send)
+
+    @classmethod
+    def head(cls, url: str, **kwargs) -> requests.Response:
+        # Match requests.head, which does not follow redirects by default
+        kwargs.setdefault('allow_redirects', False)
+        return cls.request('HEAD', url, **kwargs)
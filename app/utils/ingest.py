@@ -0,0 +1,325 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, Optional, Tuple
+
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from app.utils import epub_extract
+from app.utils.book_preview import BookPreview
+from app.utils.content_store import ContentStore
+from app.utils.disk_cache import DiskCache, cache_folder
+from app.utils.epub_extract import EpubTextExtractor
+from app.utils.pagination import PAGE_SIZE, PageIndex, book_key
+from app.utils.pdf_extract import PdfTextExtractor
+
+logger = logging.getLogger(__name__)
+
+# ``Book.source`` of uploaded files; their ``source_id`` is the file's SHA-256
+UPLOAD_SOURCE = 'upload'
+
+CHUNK_SIZE = 1024 * 1024
+THUMBNAIL_SIZE = (300, 450)
+
+def save_upload(stream: BinaryIO, folder: str, filename: str) -> Tuple[str, str]:
+    """Copy an upload to ``folder`` a chunk at a time, hashing it on the way.
+
+    Returns the saved path and the file's SHA-256. Files are named after
+    their hash, so uploading the same file twice doesn't overwrite a
+    different book that happened to share its name.
+    """
+    digest = hashlib.sha256()
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                f.write(chunk)
+        content_hash = digest.hexdigest()
+        path = os.path.join(folder, f"{content_hash[:16]}_{filename}")
+        os.replace(tmp_path, path)
+        return path, content_hash
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def thumbnail_path(content_hash: str) -> str:
+    return os.path.join(cache_folder(), 'covers', f"{content_hash}.jpg")
+
+def _epub_info(path: str) -> Tuple[Dict, Optional[bytes]]:
+    with zipfile.ZipFile(path) as book:
+        return epub_extract.metadata(book), epub_extract.cover_image(book)
+
+def _pdf_info(path: str) -> Tuple[Dict, Optional[bytes]]:
+    reader = PdfReader(path)
+    info = {}
+    if reader.metadata:
+        for field, key in (('title', '/Title'), ('author', '/Author')):
+            value = str(reader.metadata.get(key) or '').strip()
+            if value:
+                info[field] = value
+    cover = None
+    try:
+        # No PDF renderer here, so the cover is the first picture on page one
+        images = reader.pages[0].images if reader.pages else []
+        cover = images[0].data if images else None
+    except Exception as e:
+        logger.info(f"No cover image in {path}: {e}")
+    return info, cover
+
+def _extract_text(path: str, file_type: str, content_hash: str) -> str:
+    if file_type == 'epub':
+        return EpubTextExtractor.extract(path).text
+    # Pool workers read the saved upload in place, each page under the
+    # extractor's timeouts, which can't run on this ingest thread
+    return PdfTextExtractor.extract(path, content_hash=content_hash)
+
+def _save_thumbnail(image: bytes, path: str) -> bool:
+    try:
+        with Image.open(io.BytesIO(image)) as cover:
+            cover.thumbnail(THUMBNAIL_SIZE)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            cover.convert('RGB').save(tmp_path, 'JPEG', quality=85)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not make a cover thumbnail: {e}")
+        return False
+
+def ingest_file(path: str, content_hash: str, page_size: int = PAGE_SIZE,
+                progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """Everything the app needs from an uploaded EPUB or PDF, extracted once.
+
+    Steps: metadata, full text into the ``ContentStore``, the reader's page
+    index, preview fields and a cover thumbnail. Text and index are keyed
+    by ``content_hash``, so a file that was ingested before skips straight
+    through. Returns the metadata found plus ``total_pages``, the
+    ``BookPreview`` fields and ``has_cover``.
+    """
+    progress = progress or (lambda step: None)
+    file_type = os.path.splitext(path)[1][1:].lower()
+
+    progress('metadata')
+    info, cover = _epub_info(path) if file_type == 'epub' else _pdf_info(path)
+
+    progress('text')
+    if not ContentStore.has(UPLOAD_SOURCE, content_hash):
+        text = _extract_text(path, file_type, content_hash)
+        if not text.strip() or not ContentStore.put(UPLOAD_SOURCE, content_hash, text):
+            raise ValueError('No text could be extracted from the file')
+
+    progress('index')
+    stored = ContentStore.open(UPLOAD_SOURCE, content_hash)
+    if stored is None:
+        raise ValueError('Extracted text could not be stored')
+    try:
+        offsets = PageIndex.load_or_build(book_key(UPLOAD_SOURCE, content_hash), stored, page_size)
+        info.update(BookPreview.from_text(stored, page_size, page_count=len(offsets) - 1))
+    finally:
+        stored.close()
+    info['total_pages'] = info['estimated_pages']
+
+    progress('cover')
+    thumbnail = thumbnail_path(content_hash)
+    info['has_cover'] = os.path.exists(thumbnail) or (cover is not None and _save_thumbnail(cover, thumbnail))
+    return info
+
+class IngestQueue:
+    """Background ingest of uploaded books, so an upload returns as soon as it's saved.
+
+    Jobs run ``ingest_file`` on a small thread pool (text extraction
+    itself fans out to the PDF and EPUB process pools) and then fill in
+    the ``Book`` row and set its ``ingest_status`` to ``ready``. Jobs and
+    their progress are kept in a disk cache keyed by book id, so any
+    worker process can answer a status poll. While a process holds a job
+    it touches the entry every ``HEARTBEAT_SECONDS``; a job whose entry
+    goes ``STALE_SECONDS`` without one was lost with its process, and
+    ``resume`` queues it again.
+    """
+    WORKERS = int(os.environ.get('INGEST_WORKERS', 2))
+    STALE_SECONDS = int(os.environ.get('INGEST_STALE_SECONDS', 300))
+    HEARTBEAT_SECONDS = max(1, STALE_SECONDS // 5)
+    # Book fields an upload form can set; the file's own metadata only fills blanks
+    FORM_FIELDS = ('title', 'author', 'description')
+
+    store = DiskCache('ingest_jobs', 8 * 1024 * 1024)
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _heartbeat: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+    _counts = defaultdict(int)
+    # Jobs queued or running in this process, by book id
+    _active: Dict[int, Dict] = {}
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._heartbeat = threading.Thread(target=cls._beat, name='ingest-heartbeat', daemon=True)
+                    cls._heartbeat.start()
+                    cls._executor = ThreadPoolExecutor(max_workers=cls.WORKERS, thread_name_prefix='ingest')
+        return cls._executor
+
+    @classmethod
+    def submit(cls, app, book, page_size: int = PAGE_SIZE, cover_url: Optional[str] = None,
+               fill: Iterable[str] = FORM_FIELDS) -> None:
+        """Queue ingest of an uploaded ``Book`` (already committed, with ``file_path`` and ``source_id``).
+
+        ``fill`` names the fields the file's metadata may set; ``cover_url``
+        is stored on the book if a thumbnail is made.
+        """
+        job = {
+            'book_id': book.id,
+            'path': book.file_path,
+            'hash': book.source_id,
+            'page_size': page_size,
+            'cover_url': cover_url,
+            'fill': list(fill),
+            'submitted_at': time.time(),
+        }
+        cls._enqueue(app, job)
+        cls._count('submitted')
+
+    @classmethod
+    def resume(cls, app, book, page_size: int = PAGE_SIZE, cover_url: Optional[str] = None) -> bool:
+        """Queue ``book`` again if it's still waiting on an ingest that no live process holds.
+
+        Jobs only live in the memory of the process that took them, so a
+        restart leaves their books 'queued' or 'processing'. The stored job
+        is resubmitted as it was; if it was evicted, one is rebuilt from the
+        row, and ``page_size`` and ``cover_url`` are used. Returns True if
+        the book was queued again.
+        """
+        if book.ingest_status not in ('queued', 'processing'):
+            return False
+        with cls._lock:
+            if book.id in cls._active:
+                return False
+        entry = cls.store.get(str(book.id))
+        if entry is not None and time.time() - entry.stored_at < cls.STALE_SECONDS:
+            return False
+        try:
+            job = json.loads(entry.value)
+        except (AttributeError, ValueError):
+            job = {
+                'book_id': book.id,
+                'path': book.file_path,
+                'hash': book.source_id,
+                'page_size': page_size,
+                'cover_url': cover_url,
+                'fill': [field for field in cls.FORM_FIELDS if not getattr(book, field)],
+                'submitted_at': time.time(),
+            }
+        logger.info(f"Resuming ingest of book {book.id}, lost in status {book.ingest_status!r}")
+        cls._enqueue(app, job)
+        cls._count('resumed')
+        return True
+
+    @classmethod
+    def status(cls, book_id: int) -> Optional[Dict]:
+        """The job's state and current step, plus ``error`` if it failed"""
+        entry = cls.store.get(str(book_id))
+        return dict(entry.meta, book_id=book_id) if entry is not None else None
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls._lock:
+            return dict(cls._counts, active=len(cls._active), workers=cls.WORKERS)
+
+    @classmethod
+    def _count(cls, stat: str) -> None:
+        with cls._lock:
+            cls._counts[stat] += 1
+
+    @classmethod
+    def _enqueue(cls, app, job: Dict) -> None:
+        with cls._lock:
+            cls._active[job['book_id']] = job
+        cls._save(job, 'queued')
+        cls._get_executor().submit(cls._run, app, job)
+
+    @classmethod
+    def _beat(cls) -> None:
+        """Keep this process's jobs from looking stale to the others"""
+        while True:
+            time.sleep(cls.HEARTBEAT_SECONDS)
+            with cls._lock:
+                book_ids = list(cls._active)
+            for book_id in book_ids:
+                cls.store.touch(str(book_id))
+
+    @classmethod
+    def _save(cls, job: Dict, status: str, step: Optional[str] = None, error: Optional[str] = None) -> None:
+        meta = {'status': status, 'submitted_at': job['submitted_at']}
+        if step:
+            meta['step'] = step
+        if error:
+            meta['error'] = error
+        if status in ('ready', 'error'):
+            meta['finished_at'] = time.time()
+        cls.store.set(str(job['book_id']), json.dumps(job).encode('utf-8'), meta)
+
+    @classmethod
+    def _run(cls, app, job: Dict) -> None:
+        from app import db
+        from app.models import Book
+
+        with app.app_context():
+            try:
+                cls._set_book_status(job['book_id'], 'processing')
+                info = ingest_file(job['path'], job['hash'], job['page_size'],
+                                   progress=lambda step: cls._save(job, 'processing', step=step))
+                book = Book.query.get(job['book_id'])
+                if book is None:
+                    # Deleted while it was being ingested; nothing is left to report on
+                    cls.store.delete(str(job['book_id']))
+                    cls._count('dropped')
+                    return
+                for field in job['fill']:
+                    if info.get(field):
+                        setattr(book, field, info[field])
+                if info.get('language') and not book.language:
+                    book.language = info['language']
+                book.total_pages = info['total_pages']
+                BookPreview.apply(book, info)
+                if info['has_cover'] and job['cover_url']:
+                    book.cover_url = job['cover_url']
+                book.ingest_status = 'ready'
+                db.session.commit()
+                cls._save(job, 'ready')
+                cls._count('ready')
+            except Exception as e:
+                logger.error(f"Error ingesting book {job['book_id']}: {e}")
+                db.session.rollback()
+                cls._save(job, 'error', error=str(e))
+                cls._count('failed')
+                cls._set_book_status(job['book_id'], 'error')
+            finally:
+                with cls._lock:
+                    cls._active.pop(job['book_id'], None)
+                db.session.remove()
+
+    @staticmethod
+    def _set_book_status(book_id: int, status: str) -> None:
+        from app import db
+        from app.models import Book
+
+        try:
+            book = Book.query.get(book_id)
+            if book is not None:
+                book.ingest_status = status
+                db.session.commit()
+        except Exception as e:
+            logger.error(f"Error updating ingest status of book {book_id}: {e}")
+            db.session.rollback()
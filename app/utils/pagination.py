@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from app.utils.disk_cache import cache_folder
+
+logger = logging.getLogger(__name__)
+
+# Roughly this many characters of text per reader page
+PAGE_SIZE = 2000
+
+_LINE_RE = re.compile(rb'[^\n]+')
+
+class PageOffsetBuilder:
+    """``build_page_offsets`` for text that arrives a piece at a time.
+
+    Only the current unfinished line is buffered, so a book can be
+    paginated while it downloads or block by block from the store.
+    """
+
+    def __init__(self, page_size: int = PAGE_SIZE):
+        self.page_size = page_size
+        self.offsets = array('Q', [0])
+        self.size = 0
+        self._pending = bytearray()
+        self._length = 0
+        self._finished = False
+
+    def feed(self, data: bytes) -> None:
+        start = self.size - len(self._pending)
+        self.size += len(data)
+        end = data.rfind(b'\n') + 1
+        if not end:
+            self._pending += data
+            return
+        lines = bytes(self._pending) + data[:end] if self._pending else data[:end]
+        for match in _LINE_RE.finditer(lines):
+            self._add_line(start + match.start(), match.group())
+        self._pending = bytearray(data[end:])
+
+    def _add_line(self, start: int, line: bytes) -> None:
+        length = len(line.decode('utf-8', 'replace').strip())
+        if not length:
+            return
+        if self._length + length > self.page_size and self._length:
+            self.offsets.append(start)
+            self._length = 0
+        self._length += length
+
+    def finish(self) -> array:
+        """The offsets of everything fed so far, ending with the text's length"""
+        if not self._finished:
+            self._finished = True
+            if self._pending:
+                self._add_line(self.size - len(self._pending), bytes(self._pending))
+                self._pending = bytearray()
+            if self._length:
+                self.offsets.append(self.size)
+        return self.offsets
+
+def build_page_offsets(data, page_size: int = PAGE_SIZE) -> array:
+    """Byte offsets where each page of the UTF-8 text ``data`` starts.
+
+    Pages are whole lines grouped until adding the next non-blank line
+    would push the page past ``page_size`` stripped characters. The last
+    element is ``len(data)``, so page ``n`` spans
+    ``offsets[n]:offsets[n + 1]``; text with no non-blank lines has no
+    pages. ``data`` is bytes or a ``StoredText``, read a block at a time.
+    """
+    builder = PageOffsetBuilder(page_size)
+    for block in (data.blocks() if hasattr(data, 'blocks') else [data]):
+        builder.feed(block)
+    return builder.finish()
+
+def render_page(chunk: str) -> str:
+    """Drop blank lines and surrounding whitespace from a slice of book text"""
+    return '\n'.join(p.strip() for p in chunk.split('\n') if p.strip())
+
+def book_key(source: str, book_id: str) -> str:
+    """Stable file-name-safe key for a book from an external source"""
+    return hashlib.sha1(f"{source}:{book_id}".encode('utf-8')).hexdigest()
+
+class PageIndex:
+    """Page offsets persisted next to a book's content, one file per page size.
+
+    The file is the raw offset array; its last element is the byte length
+    of the text it was built for, which lets a stale index be detected and
+    rebuilt when the content changes.
+    """
+
+    @staticmethod
+    def path(key: str, page_size: int) -> str:
+        return os.path.join(cache_folder(), 'books', f"{key}.{page_size}.idx")
+
+    @classmethod
+    def load(cls, key: str, page_size: int, size: int) -> Optional[array]:
+        path = cls.path(key, page_size)
+        try:
+            offsets = array('Q')
+            with open(path, 'rb') as f:
+                offsets.frombytes(f.read())
+        except OSError:
+            return None
+        # An index for the same text always ends at its length
+        if len(offsets) < 1 or (len(offsets) > 1 and offsets[-1] != size):
+            logger.info(f"Discarding stale page index {path}")
+            return None
+        return offsets
+
+    @classmethod
+    def save(cls, key: str, page_size: int, offsets: array) -> None:
+        path = cls.path(key, page_size)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                offsets.tofile(f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error saving page index {path}: {e}")
+
+    @classmethod
+    def load_or_build(cls, key: str, data, page_size: int = PAGE_SIZE) -> array:
+        """Stored offsets for ``data`` (bytes or a ``StoredText``), building them on a miss"""
+        offsets = cls.load(key, page_size, len(data))
+        if offsets is None:
+            offsets = build_page_offsets(data, page_size)
+            cls.save(key, page_size, offsets)
+        return offsets
+
+class BookPager:
+    """Random access to the pages of one book via its offset index.
+
+    The text is either held once as UTF-8 bytes or read straight from a
+    memory-mapped ``StoredText``; a page read decodes only that page's
+    slice. With a ``key`` the index is persisted via ``PageIndex`` so it
+    is built only once per book and page size. ``users`` and ``retired``
+    are ``PagerCache``'s bookkeeping, as for ``BookHandle``.
+    """
+
+    def __init__(self, text, page_size: int = PAGE_SIZE, key: Optional[str] = None):
+        self.data = text.encode('utf-8') if isinstance(text, str) else text
+        self.users = 0
+        self.retired = False
+        if key:
+            self.offsets = PageIndex.load_or_build(key, self.data, page_size)
+        else:
+            self.offsets = build_page_offsets(self.data, page_size)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def get_page(self, number: int) -> str:
+        """Page ``number`` (1-based)"""
+        if not 1 <= number <= self.page_count:
+            raise IndexError(number)
+        start, end = self.offsets[number - 1], self.offsets[number]
+        chunk = self.data.read(start, end) if hasattr(self.data, 'read') else self.data[start:end]
+        return render_page(chunk.decode('utf-8', 'replace'))
+
+    def get_pages(self, start: int, count: int) -> List[str]:
+        end = min(start + count, self.page_count + 1)
+        return [self.get_page(number) for number in range(max(start, 1), end)]
+
+    def close(self) -> None:
+        """Unmap the stored text, if the pager reads from one"""
+        if hasattr(self.data, 'close'):
+            self.data.close()
+
+class PagerCache:
+    """Process-wide LRU of ``BookPager`` objects for recently read books.
+
+    Pagers dropped from the cache are closed, unmapping their text, once
+    the last caller holding one from ``open`` is done with it.
+    """
+    MAX_BOOKS = 8
+
+    _pagers: 'OrderedDict[Tuple[str, str, int], BookPager]' = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    @contextmanager
+    def open(cls, source: str, book_id: str, load_text: Callable[[], Optional[object]],
+             page_size: int = PAGE_SIZE) -> Iterator[Optional[BookPager]]:
+        """Pager for a book, held for the ``with`` block; None if it has no text.
+
+        ``load_text`` is called on a miss and may return a string or a
+        ``StoredText`` handle.
+        """
+        pager = cls._acquire(source, book_id, load_text, page_size)
+        try:
+            yield pager
+        finally:
+            if pager is not None:
+                cls._release(pager)
+
+    @classmethod
+    def _acquire(cls, source: str, book_id: str, load_text: Callable[[], Optional[object]],
+                 page_size: int) -> Optional[BookPager]:
+        key = (source, book_id, page_size)
+        with cls._lock:
+            pager = cls._cached(key)
+            if pager is not None:
+                return pager
+
+        text = load_text()
+        if not text:
+            return None
+        built = BookPager(text, page_size, key=book_key(source, book_id))
+
+        retired = []
+        with cls._lock:
+            # Another thread may have built the same pager meanwhile; keep theirs
+            pager = cls._cached(key)
+            if pager is None:
+                cls._pagers[key] = pager = built
+                pager.users += 1
+                while len(cls._pagers) > cls.MAX_BOOKS:
+                    retired.append(cls._pagers.popitem(last=False)[1])
+            else:
+                retired.append(built)
+            closing = [p for p in retired if cls._retire(p)]
+        for stale in closing:
+            stale.close()
+        return pager
+
+    @classmethod
+    def _cached(cls, key: Tuple[str, str, int]) -> Optional[BookPager]:
+        """Take a reference to the cached pager. Call with ``_lock`` held."""
+        pager = cls._pagers.get(key)
+        if pager is not None:
+            cls._pagers.move_to_end(key)
+            pager.users += 1
+        return pager
+
+    @staticmethod
+    def _retire(pager: BookPager) -> bool:
+        """Mark a pager dropped from the cache; True if nobody holds it and it can close now"""
+        pager.retired = True
+        return pager.users == 0
+
+    @classmethod
+    def _release(cls, pager: BookPager) -> None:
+        with cls._lock:
+            pager.users -= 1
+            closing = pager.retired and pager.users == 0
+        if closing:
+            pager.close()
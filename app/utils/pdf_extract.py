@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import zlib
+from concurrent.futures import (BrokenExecutor, CancelledError, Future, ProcessPoolExecutor,
+                                TimeoutError as FutureTimeout, wait)
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from PyPDF2 import PdfReader
+
+from app.utils.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+class PageTimeout(Exception):
+    pass
+
+# Worker processes keep the last PDF they opened, since consecutive shards
+# of the same file usually land on the same worker
+_open_reader: Tuple[Optional[str], Optional[PdfReader]] = (None, None)
+
+def _raise_timeout(signum, frame):
+    raise PageTimeout()
+
+def _page_text(reader: PdfReader, number: int, timeout: float) -> str:
+    """Text of one page; empty if it fails or takes longer than ``timeout`` seconds"""
+    # SIGALRM can only be used from a process's main thread, and not at all on
+    # Windows; there the shard's result timeout is the only limit
+    use_alarm = (timeout > 0 and hasattr(signal, 'SIGALRM')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return reader.pages[number].extract_text() or ''
+    except PageTimeout:
+        logger.warning(f"Gave up on PDF page {number + 1} after {timeout}s")
+        return ''
+    except Exception as e:
+        logger.warning(f"Error extracting PDF page {number + 1}: {e}")
+        return ''
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _reader(path: str) -> PdfReader:
+    """The worker's reader for ``path``, reopened if the file at that path changed"""
+    global _open_reader
+    info = os.stat(path)
+    key = f"{path}:{info.st_mtime_ns}:{info.st_size}"
+    if _open_reader[0] != key:
+        _open_reader = (key, PdfReader(path))
+    return _open_reader[1]
+
+def _page_count(path: str) -> int:
+    """Runs in a worker process: number of pages, leaving the file open for its shards"""
+    return len(_reader(path).pages)
+
+def _extract_pages(path: str, start: int, end: int, timeout: float) -> List[str]:
+    """Runs in a worker process: text of pages ``start`` to ``end`` (exclusive)"""
+    reader = _reader(path)
+    return [_page_text(reader, number, timeout) for number in range(start, end)]
+
+class PdfTextExtractor:
+    """Text of whole PDFs, extracted across a process pool and cached by file hash.
+
+    Pages are split into shards of ``SHARD_PAGES`` and extracted by
+    ``WORKERS`` spawned processes, each page under a ``PAGE_TIMEOUT`` alarm
+    so one pathological page can't hang a worker; such pages come back
+    empty. Every PDF goes through the pool, even a short one, since the
+    alarm only works on a process's main thread: the caller is usually a
+    request or ingest thread. A shard whose hang outlasts the alarm (stuck
+    in C code, say) is abandoned after ``_shard_timeout``, its pages left
+    empty, and the pool is replaced. Results are joined once at the end,
+    and the text of a fully extracted PDF is stored compressed under the
+    SHA-256 of the file, so the same upload is only ever extracted once.
+    """
+    WORKERS = int(os.environ.get('PDF_WORKERS', os.cpu_count() or 2))
+    PAGE_TIMEOUT = float(os.environ.get('PDF_PAGE_TIMEOUT', 10))
+    # Allowance for a worker to open the file, on top of its pages' timeouts
+    OPEN_TIMEOUT = float(os.environ.get('PDF_OPEN_TIMEOUT', 60))
+    SHARD_PAGES = 16
+
+    cache = DiskCache('pdf_text', 256 * 1024 * 1024)
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _lock = threading.Lock()
+    _counts: Dict[str, int] = {'hits': 0, 'misses': 0, 'timeouts': 0, 'incomplete': 0}
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    # Spawned rather than forked: the app process runs threads
+                    cls._executor = ProcessPoolExecutor(
+                        max_workers=max(1, cls.WORKERS), mp_context=multiprocessing.get_context('spawn')
+                    )
+        return cls._executor
+
+    @classmethod
+    def _discard_executor(cls, executor: ProcessPoolExecutor) -> None:
+        """Stop a pool with a hung or dead worker; the next extraction starts a fresh one"""
+        with cls._lock:
+            if cls._executor is executor:
+                cls._executor = None
+        # A hung worker never picks up the shutdown sentinel, so stop the processes outright
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _count(cls, stat: str) -> None:
+        with cls._lock:
+            cls._counts[stat] += 1
+
+    @classmethod
+    def _shard_timeout(cls, pages: int) -> float:
+        """Longest a call covering ``pages`` may take once a worker has taken it.
+
+        The pool queues one call ahead of its workers, so the clock may
+        start while the call still waits behind a full shard.
+        """
+        return cls.PAGE_TIMEOUT * (pages + cls.SHARD_PAGES) + 2 * cls.OPEN_TIMEOUT
+
+    @staticmethod
+    def _result(future: Future, timeout: float):
+        """``future.result(timeout)``, with the clock started once a worker has taken the call"""
+        while not future.running() and not future.done():
+            wait([future], timeout=0.1)
+        return future.result(timeout=timeout)
+
+    @classmethod
+    def extract(cls, file: Union[str, bytes, BinaryIO], content_hash: Optional[str] = None) -> str:
+        """All page texts of a PDF, one page per line break.
+
+        ``file`` is bytes, a file object, or the path of a PDF on disk,
+        which workers then read in place; pass its SHA-256 as
+        ``content_hash`` if it's already known.
+        """
+        if isinstance(file, str):
+            key = content_hash or _file_hash(file)
+        else:
+            data = file if isinstance(file, bytes) else file.read()
+            key = hashlib.sha256(data).hexdigest()
+        entry = cls.cache.get(key)
+        if entry is not None:
+            cls._count('hits')
+            return zlib.decompress(entry.value).decode('utf-8')
+        cls._count('misses')
+
+        if isinstance(file, str):
+            pages, complete = cls._extract(os.path.abspath(file))
+        else:
+            # Workers read the file from disk rather than getting it pickled per shard
+            fd, path = tempfile.mkstemp(suffix='.pdf')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                pages, complete = cls._extract(path)
+            finally:
+                os.unlink(path)
+        text = ''.join(f"{page}\n" for page in pages)
+        if complete:
+            cls.cache.set(key, zlib.compress(text.encode('utf-8')), {'pages': len(pages)})
+        else:
+            # Leave it uncached so a later request tries the missing pages again
+            cls._count('incomplete')
+        return text
+
+    @classmethod
+    def _extract(cls, path: str) -> Tuple[List[str], bool]:
+        """Page texts of the PDF at ``path``, and whether every shard finished"""
+        executor = cls._get_executor()
+        try:
+            count = cls._result(executor.submit(_page_count, path), cls._shard_timeout(0))
+        except (FutureTimeout, BrokenExecutor, CancelledError):
+            cls._discard_executor(executor)
+            raise ValueError('The PDF could not be opened in time')
+        except Exception as e:
+            # Corrupt or encrypted: PyPDF2's own errors, raised in the worker
+            raise ValueError(f'The PDF could not be opened: {e}') from e
+
+        shards = [(start, min(start + cls.SHARD_PAGES, count)) for start in range(0, count, cls.SHARD_PAGES)]
+        texts: Dict[Tuple[int, int], List[str]] = {}
+        complete = True
+        # A pool broken by another shard's hang gets one retry on a fresh pool
+        for attempt in range(2):
+            executor = cls._get_executor()
+            futures = {
+                shard: executor.submit(_extract_pages, path, shard[0], shard[1], cls.PAGE_TIMEOUT)
+                for shard in shards if shard not in texts
+            }
+            for (start, end), future in futures.items():
+                try:
+                    texts[start, end] = cls._result(future, cls._shard_timeout(end - start))
+                except FutureTimeout:
+                    logger.warning(f"Gave up on PDF pages {start + 1}-{end} of {path}")
+                    cls._count('timeouts')
+                    texts[start, end] = [''] * (end - start)
+                    complete = False
+                    cls._discard_executor(executor)
+                except (BrokenExecutor, CancelledError) as e:
+                    # Left out of ``texts``, so the retry extracts it
+                    logger.warning(f"PDF worker pool failed on pages {start + 1}-{end}: {e}")
+                    cls._discard_executor(executor)
+            if len(texts) == len(shards):
+                break
+        for start, end in shards:
+            if (start, end) not in texts:
+                texts[start, end] = [''] * (end - start)
+                complete = False
+        return [page for shard in shards for page in texts[shard]], complete
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls._lock:
+            return dict(cls._counts, workers=cls.WORKERS)
@@ -1,7 +1,13 @@
 import ebooklib
 from ebooklib import epub
 from bs4 import BeautifulSoup
+import hashlib
+import logging
 import os
+import zipfile
+from app.utils.epub_extract import metadata, spine_paths
+
+logger = logging.getLogger(__name__)
 
 def process_book_file(filepath):
     """Process an EPUB file and extract metadata"""
@@ -39,4 +45,33 @@ def process_book_file(filepath):
             'description': '',
             'total_pages': 0,
             'cover_image': None
-        } 
\ No newline at end of file
+        }
+
+def scan_epub(filepath, known_hash=None):
+    """Hash an EPUB and read its metadata from the package document alone.
+
+    Used by library scans, possibly in a worker process. Returns
+    ``(sha256, info)``; when the hash equals ``known_hash`` the book is
+    unchanged and ``info`` is None. Both are None if the file or its
+    metadata can't be read, so the scan leaves it out and retries it.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError as e:
+        logger.warning(f"Error reading {filepath}: {e}")
+        return None, None
+    content_hash = digest.hexdigest()
+    if content_hash == known_hash:
+        return content_hash, None
+
+    try:
+        with zipfile.ZipFile(filepath) as book:
+            info = metadata(book)
+            info['total_pages'] = len(spine_paths(book))
+    except Exception as e:
+        logger.warning(f"Error reading EPUB metadata from {filepath}: {e}")
+        return None, None
+    return content_hash, info
@@ -0,0 +1,116 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Token-bucket rate limiter keyed by host.
+
+    Each host refills at ``rate`` tokens per second up to ``capacity``, so an
+    idle host can be hit immediately and only sustained bursts are slowed
+    down. Buckets live in process memory by default; set ``RATE_LIMIT_DB``
+    to a SQLite file path to share them between processes (e.g. gunicorn
+    workers).
+    """
+    DEFAULT_RATE = float(os.environ.get('RATE_LIMIT_RATE', 1.0))
+    DEFAULT_CAPACITY = float(os.environ.get('RATE_LIMIT_BURST', 5))
+    # Per-host (rate, capacity) overrides
+    HOST_LIMITS: Dict[str, Tuple[float, float]] = {
+        'www.gutenberg.org': (2.0, 10),
+        'gutenberg.org': (2.0, 10),
+        'archive.org': (2.0, 10),
+        'annas-archive.org': (0.5, 2),
+    }
+    DB_PATH = os.environ.get('RATE_LIMIT_DB')
+
+    _buckets: Dict[str, list] = {}
+    _metrics: Dict[str, Dict[str, float]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def limits_for(cls, key: str) -> Tuple[float, float]:
+        return cls.HOST_LIMITS.get(key, (cls.DEFAULT_RATE, cls.DEFAULT_CAPACITY))
+
+    @staticmethod
+    def _reserve(tokens: float, updated: float, now: float, rate: float, capacity: float) -> Tuple[float, float]:
+        """Take one token, returning the new balance and how long to wait for it.
+
+        The balance may go negative: the caller then owns a token that will
+        only exist ``-balance / rate`` seconds from now, which keeps waiters
+        in arrival order without holding the lock while sleeping.
+        """
+        tokens = min(capacity, tokens + (now - updated) * rate) - 1
+        wait = -tokens / rate if tokens < 0 else 0.0
+        return tokens, wait
+
+    @classmethod
+    def _reserve_local(cls, key: str) -> float:
+        rate, capacity = cls.limits_for(key)
+        now = time.monotonic()
+        with cls._lock:
+            bucket = cls._buckets.setdefault(key, [capacity, now])
+            bucket[0], wait = cls._reserve(bucket[0], bucket[1], now, rate, capacity)
+            bucket[1] = now
+        return wait
+
+    @classmethod
+    def _reserve_shared(cls, key: str) -> float:
+        rate, capacity = cls.limits_for(key)
+        conn = sqlite3.connect(cls.DB_PATH, timeout=30, isolation_level=None)
+        try:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets '
+                '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            # Wall clock, since monotonic time is not comparable across processes
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, wait = cls._reserve(tokens, updated, now, rate, capacity)
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            conn.execute('COMMIT')
+            return wait
+        finally:
+            conn.close()
+
+    @classmethod
+    def acquire(cls, key: str) -> float:
+        """Block until a request to ``key`` is allowed; returns seconds waited"""
+        try:
+            wait = cls._reserve_shared(key) if cls.DB_PATH else cls._reserve_local(key)
+        except sqlite3.Error as e:
+            logger.error(f"Shared rate limiter unavailable, using local bucket: {e}")
+            wait = cls._reserve_local(key)
+
+        if wait > 0:
+            time.sleep(wait)
+
+        with cls._lock:
+            stats = cls._metrics.setdefault(key, {'requests': 0, 'throttled': 0, 'wait_seconds': 0.0})
+            stats['requests'] += 1
+            if wait > 0:
+                stats['throttled'] += 1
+                stats['wait_seconds'] += wait
+        return wait
+
+    @classmethod
+    def metrics(cls, key: Optional[str] = None) -> Dict:
+        """Request and wait-time counters per key (or for a single key)"""
+        with cls._lock:
+            if key is not None:
+                return dict(cls._metrics.get(key, {}))
+            return {k: dict(v) for k, v in cls._metrics.items()}
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._buckets.clear()
+            cls._metrics.clear()
@@ -0,0 +1,181 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from app.utils.disk_cache import CacheEntry, DiskCache
+
+logger = logging.getLogger(__name__)
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+class ResponseCache:
+    """Disk-backed cache for GET responses of slow-changing listing pages.
+
+    Only URLs matching ``RULES`` are cached. A fresh entry (younger than its
+    TTL) is served without touching the network; a stale entry still inside
+    its stale-while-revalidate window is served immediately while a
+    background conditional GET refreshes it; anything older is revalidated
+    inline with ``If-None-Match``/``If-Modified-Since`` so an unchanged page
+    costs a 304 instead of a full download.
+
+    Set ``HTTP_CACHE_OFFLINE=1`` to serve every cached entry regardless of
+    age and never touch the network, e.g. for tests against a seeded cache.
+    """
+    # (url pattern, ttl seconds, stale-while-revalidate seconds)
+    RULES = [
+        (r'gutenberg\.org/ebooks/bookshelf/', DAY, 7 * DAY),
+        (r'gutenberg\.org/browse/scores/top', 6 * HOUR, 7 * DAY),
+        (r'gutenberg\.org/ebooks/search/', HOUR, DAY),
+        (r'gutenberg\.org/ebooks/\d+$', 7 * DAY, 30 * DAY),
+        (r'gutendex\.com/books', DAY, 7 * DAY),
+        (r'archive\.org/advancedsearch\.php', 6 * HOUR, 3 * DAY),
+        (r'archive\.org/metadata/', DAY, 7 * DAY),
+        (r'archive\.org/details/texts', 6 * HOUR, 3 * DAY),
+        (r'openlibrary\.org/search\.json', HOUR, DAY),
+        (r'standardebooks\.org/ebooks/$', DAY, 7 * DAY),
+    ]
+    MAX_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    OFFLINE = os.environ.get('HTTP_CACHE_OFFLINE', '').lower() in ('1', 'true', 'yes')
+    # Response headers worth keeping alongside the body
+    STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+    store = DiskCache('http_responses', MAX_BYTES)
+
+    _compiled = None
+    _refreshing = set()
+    _lock = threading.Lock()
+    _stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'revalidated': 0}
+
+    @classmethod
+    def policy_for(cls, url: str) -> Optional[Tuple[int, int]]:
+        """(ttl, stale-while-revalidate) for ``url``, or None if not cacheable"""
+        if cls._compiled is None:
+            cls._compiled = [(re.compile(p), ttl, swr) for p, ttl, swr in cls.RULES]
+        for pattern, ttl, swr in cls._compiled:
+            if pattern.search(url):
+                return ttl, swr
+        return None
+
+    @classmethod
+    def _count(cls, stat: str) -> None:
+        with cls._lock:
+            cls._stats[stat] += 1
+
+    @staticmethod
+    def _to_response(url: str, entry: CacheEntry) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry.meta.get('status', 200)
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry.meta.get('headers', {}))
+        response.encoding = entry.meta.get('encoding')
+        response.url = url
+        response._content = entry.value
+        return response
+
+    @classmethod
+    def store_response(cls, url: str, response: requests.Response) -> None:
+        cls.store.set(url, response.content, {
+            'status': response.status_code,
+            'encoding': response.encoding,
+            'headers': {h: response.headers[h] for h in cls.STORED_HEADERS if h in response.headers}
+        })
+
+    @classmethod
+    def seed(cls, url: str, body: bytes, headers: Optional[Dict] = None,
+             encoding: str = 'utf-8', stored_at: Optional[float] = None) -> None:
+        """Pre-populate the cache, e.g. from recorded fixture pages"""
+        cls.store.set(url, body, {'status': 200, 'encoding': encoding, 'headers': headers or {}},
+                      stored_at=stored_at)
+
+    @staticmethod
+    def _conditional_headers(entry: CacheEntry) -> Dict[str, str]:
+        headers = {}
+        stored = entry.meta.get('headers', {})
+        if stored.get('ETag'):
+            headers['If-None-Match'] = stored['ETag']
+        if stored.get('Last-Modified'):
+            headers['If-Modified-Since'] = stored['Last-Modified']
+        return headers
+
+    @classmethod
+    def _revalidate(cls, url: str, entry: Optional[CacheEntry],
+                    send: Callable[[Dict[str, str]], requests.Response]) -> requests.Response:
+        headers = cls._conditional_headers(entry) if entry else {}
+        try:
+            response = send(headers)
+        except requests.RequestException:
+            if entry is None:
+                raise
+            # Upstream is down: a stale page beats an error page
+            logger.warning(f"Serving stale cache for {url} after fetch error")
+            return cls._to_response(url, entry)
+
+        if response.status_code == 304 and entry is not None:
+            cls._count('revalidated')
+            cls.store.touch(url)
+            return cls._to_response(url, entry)
+        if response.status_code == 200:
+            cls.store_response(url, response)
+            return response
+        if entry is not None and response.status_code >= 500:
+            logger.warning(f"Serving stale cache for {url} after HTTP {response.status_code}")
+            return cls._to_response(url, entry)
+        return response
+
+    @classmethod
+    def _revalidate_in_background(cls, url: str, entry: CacheEntry,
+                                  send: Callable[[Dict[str, str]], requests.Response]) -> None:
+        with cls._lock:
+            if url in cls._refreshing:
+                return
+            cls._refreshing.add(url)
+
+        def refresh():
+            try:
+                cls._revalidate(url, entry, send)
+            except Exception as e:
+                logger.error(f"Background revalidation of {url} failed: {e}")
+            finally:
+                with cls._lock:
+                    cls._refreshing.discard(url)
+
+        threading.Thread(target=refresh, name='cache-revalidate', daemon=True).start()
+
+    @classmethod
+    def fetch(cls, url: str, send: Callable[[Dict[str, str]], requests.Response]) -> requests.Response:
+        """Answer a GET for ``url`` from the cache, calling ``send`` as needed.
+
+        ``send`` receives any conditional request headers to add and must
+        perform the actual network GET.
+        """
+        ttl, swr = cls.policy_for(url) or (0, 0)
+        entry = cls.store.get(url)
+
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if cls.OFFLINE or age < ttl:
+                cls._count('hits')
+                return cls._to_response(url, entry)
+            if age < ttl + swr:
+                cls._count('stale_hits')
+                cls._revalidate_in_background(url, entry, send)
+                return cls._to_response(url, entry)
+        elif cls.OFFLINE:
+            raise requests.ConnectionError(f"Offline mode: {url} is not in the response cache")
+
+        cls._count('misses')
+        return cls._revalidate(url, entry, send)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls._lock:
+            stats = dict(cls._stats)
+        stats.update(cls.store.stats())
+        return stats
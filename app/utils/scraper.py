@@ -1,24 +1,23 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+from app.utils.http_client import HttpClient
+from app.utils.rate_limiter import RateLimiter
+from app.utils.html_parsing import parse_html
 import re
+import logging
+from functools import wraps
 from urllib.parse import urljoin, quote
 from typing import List, Dict, Optional
 
+logger = logging.getLogger(__name__)
+
 # OpenLibrary Scraper
 class OpenLibraryScraper:
     BASE_URL = 'https://openlibrary.org'
 
-    @staticmethod
-    def _delay():
-        time.sleep(1)  # Add 1 second delay between requests
-
     @classmethod
     def search_books(cls, query):
-        cls._delay()  # Add delay before request
         search_url = f'{cls.BASE_URL}/search.json?q={query}'
         try:
-            response = requests.get(search_url)
+            response = HttpClient.get(search_url)
             if response.status_code == 200:
                 data = response.json()
                 books = []
@@ -41,7 +40,7 @@ class OpenLibraryScraper:
     def fetch_book_content(work_key):
         book_url = f'{OpenLibraryScraper.BASE_URL}/works/{work_key}.json'
         try:
-            response = requests.get(book_url)
+            response = HttpClient.get(book_url)
             if response.status_code == 200:
                 data = response.json()
                 return data.get('description', {}).get('value', 'No content available')
@@ -54,7 +53,7 @@ class OpenLibraryScraper:
         try:
             # First try to get the Internet Archive ID
             work_url = f'{OpenLibraryScraper.BASE_URL}/works/{work_key}.json'
-            response = requests.get(work_url)
+            response = HttpClient.get(work_url)
             if response.status_code == 200:
                 work_data = response.json()
                 ia_id = work_data.get('ocaid')  # Internet Archive ID
@@ -69,7 +68,7 @@ class OpenLibraryScraper:
                     
                     for format_url in formats:
                         try:
-                            content_response = requests.get(format_url)
+                            content_response = HttpClient.get(format_url)
                             if content_response.status_code == 200:
                                 return {
                                     'content': content_response.text,
@@ -100,7 +99,7 @@ class OpenLibraryScraper:
         try:
             # Search for popular books
             search_url = f'{cls.BASE_URL}/search.json?q=popular&limit={limit}'
-            response = requests.get(search_url)
+            response = HttpClient.get(search_url)
             if response.status_code == 200:
                 data = response.json()
                 books = []
@@ -132,19 +131,14 @@ class GutenbergScraper:
     BASE_URL = 'https://www.gutenberg.org'
     MIRROR_URL = 'https://www.gutenberg.org/cache/epub'
 
-    @staticmethod
-    def _delay():
-        time.sleep(1)  # Add 1 second delay between requests
-
     @classmethod
     def search_books(cls, query, limit=10):
         """Search books with limit parameter"""
-        cls._delay()
         try:
             search_url = f'{cls.BASE_URL}/ebooks/search/?query={quote(query)}&submit_search=Go%21'
-            response = requests.get(search_url)
+            response = HttpClient.get(search_url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'booklink')
                 books = []
                 
                 for book_entry in soup.select('.booklink')[:limit]:
@@ -194,15 +188,14 @@ class GutenbergScraper:
     @classmethod
     def get_book_content(cls, book_id):
         """Get full book content with metadata"""
-        cls._delay()
         try:
             # Get book metadata
             metadata_url = f'{cls.BASE_URL}/ebooks/{book_id}'
-            response = requests.get(metadata_url)
+            response = HttpClient.get(metadata_url)
             if response.status_code != 200:
                 return None
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_html(response.text)
             
             # Extract metadata
             title = soup.select_one('h1').text.strip()
@@ -211,7 +204,7 @@ class GutenbergScraper:
             
             # Get book content
             content_url = f'{cls.MIRROR_URL}/{book_id}/pg{book_id}.txt'
-            response = requests.get(content_url)
+            response = HttpClient.get(content_url)
             if response.status_code != 200:
                 return None
 
@@ -268,21 +261,16 @@ class GutenbergScraper:
 class GoodreadsScraper:
     BASE_URL = 'https://www.goodreads.com'
 
-    @staticmethod
-    def _delay():
-        time.sleep(1)  # Add 1 second delay between requests
-
     @classmethod
     def search_books(cls, query):
-        cls._delay()  # Add delay before request
         search_url = f'{cls.BASE_URL}/search?q={query}'
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         try:
-            response = requests.get(search_url, headers=headers)
+            response = HttpClient.get(search_url, headers=headers)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, "//tr[@itemtype='http://schema.org/Book']")
                 books = []
                 for result in soup.select('tr[itemtype="http://schema.org/Book"]'):
                     title_element = result.select_one('.bookTitle')
@@ -304,18 +292,13 @@ class GoodreadsScraper:
 class InternetArchiveScraper:
     BASE_URL = 'https://archive.org'
 
-    @staticmethod
-    def _delay():
-        time.sleep(1)  # Add 1 second delay between requests
-
     @classmethod
     def search_books(cls, query):
-        cls._delay()  # Add delay before request
         search_url = f'{cls.BASE_URL}/search.php?query={query}&and[]=mediatype:texts'
         try:
-            response = requests.get(search_url)
+            response = HttpClient.get(search_url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'result-item')
                 books = []
                 for result in soup.select('.result-item'):
                     title = result.select_one('.ttl').text.strip()
@@ -337,7 +320,7 @@ class InternetArchiveScraper:
     def fetch_book_content(book_id):
         book_url = f'{InternetArchiveScraper.BASE_URL}/download/{book_id}'
         try:
-            response = requests.get(book_url)
+            response = HttpClient.get(book_url)
             if response.status_code == 200:
                 return response.text
         except Exception as e:
@@ -349,7 +332,7 @@ class InternetArchiveScraper:
         try:
             # Get metadata
             metadata_url = f'{InternetArchiveScraper.BASE_URL}/metadata/{identifier}'
-            metadata_response = requests.get(metadata_url)
+            metadata_response = HttpClient.get(metadata_url)
             if metadata_response.status_code == 200:
                 metadata = metadata_response.json()
                 
@@ -362,7 +345,7 @@ class InternetArchiveScraper:
                 
                 for format_url in formats:
                     try:
-                        content_response = requests.get(format_url)
+                        content_response = HttpClient.get(format_url)
                         if content_response.status_code == 200:
                             return {
                                 'content': content_response.text,
@@ -382,8 +365,8 @@ class InternetArchiveScraper:
     @classmethod
     def get_featured_books(cls, limit: int = 5) -> List[Dict]:
         try:
-            response = requests.get(f"{cls.BASE_URL}/details/texts")
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = HttpClient.get(f"{cls.BASE_URL}/details/texts")
+            soup = parse_html(response.text, 'item-ia')
             books = []
             
             for book in soup.select('.item-ia')[:limit]:
@@ -417,18 +400,13 @@ class InternetArchiveScraper:
 class StandardEbooksScraper:
     BASE_URL = 'https://standardebooks.org'
 
-    @staticmethod
-    def _delay():
-        time.sleep(1)  # Add 1 second delay between requests
-
     @classmethod
     def search_books(cls, query):
-        cls._delay()  # Add delay before request
         search_url = f'{cls.BASE_URL}/search?q={query}'
         try:
-            response = requests.get(search_url)
+            response = HttpClient.get(search_url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'book')
                 books = []
                 for result in soup.select('.book'):
                     title = result.select_one('.title').text.strip()
@@ -449,8 +427,8 @@ class StandardEbooksScraper:
     @classmethod
     def get_featured_books(cls, limit: int = 5) -> List[Dict]:
         try:
-            response = requests.get(f"{cls.BASE_URL}/ebooks/")
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = HttpClient.get(f"{cls.BASE_URL}/ebooks/")
+            soup = parse_html(response.text, 'ebook')
             books = []
             
             for book in soup.select('.ebook')[:limit]:
@@ -484,18 +462,13 @@ class StandardEbooksScraper:
 class ManyBooksScraper:
     BASE_URL = 'https://manybooks.net'
 
-    @staticmethod
-    def _delay():
-        time.sleep(1)  # Add 1 second delay between requests
-
     @classmethod
     def search_books(cls, query):
-        cls._delay()  # Add delay before request
         search_url = f'{cls.BASE_URL}/search?q={query}'
         try:
-            response = requests.get(search_url)
+            response = HttpClient.get(search_url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'book')
                 books = []
                 for result in soup.select('.book'):
                     title = result.select_one('.title').text.strip()
@@ -517,19 +490,14 @@ class ManyBooksScraper:
 class SmashwordsScraper:
     BASE_URL = 'https://www.smashwords.com'
 
-    @staticmethod
-    def _delay():
-        time.sleep(1)  # Add 1 second delay between requests
-
     @classmethod
     def search_books(cls, query):
-        cls._delay()  # Add delay before request
         search_url = f'{cls.BASE_URL}/books/search'
         params = {'q': query}
         try:
-            response = requests.get(search_url, params=params)
+            response = HttpClient.get(search_url, params=params)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text, 'book')
                 books = []
                 for result in soup.select('.book'):
                     title = result.select_one('.title').text.strip()
@@ -549,8 +517,10 @@ class SmashwordsScraper:
 
 # Rate-limiting function
 def rate_limit_request(func):
+    """Throttle calls to ``func`` through its own token bucket"""
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        time.sleep(1)  # Sleep for 1 second between requests
+        RateLimiter.acquire(func.__qualname__)
         return func(*args, **kwargs)
     return wrapper
 
@@ -561,8 +531,8 @@ class NoteGPTScraper:
     @classmethod
     def get_featured_books(cls, limit: int = 5) -> List[Dict]:
         try:
-            response = requests.get(f"{cls.BASE_URL}/books")
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = HttpClient.get(f"{cls.BASE_URL}/books")
+            soup = parse_html(response.text, 'book-card')
             books = []
             
             # Adjust the selector based on the actual HTML structure
@@ -594,8 +564,8 @@ class NoteGPTScraper:
     def get_books_by_category(cls, category: str, limit: int = 5) -> List[Dict]:
         try:
             # Adjust URL based on actual category endpoint
-            response = requests.get(f"{cls.BASE_URL}/books/category/{category.lower()}")
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = HttpClient.get(f"{cls.BASE_URL}/books/category/{category.lower()}")
+            soup = parse_html(response.text, 'book-card')
             books = []
             
             for book in soup.select('.book-card')[:limit]:
@@ -621,8 +591,8 @@ class NoteGPTScraper:
     @classmethod
     def get_book_content(cls, book_id: str) -> Optional[Dict]:
         try:
-            response = requests.get(f"{cls.BASE_URL}/books/{book_id}")
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = HttpClient.get(f"{cls.BASE_URL}/books/{book_id}")
+            soup = parse_html(response.text)
             
             title = soup.select_one('.book-title').text.strip()
             author = soup.select_one('.book-author').text.strip()
@@ -646,19 +616,14 @@ class AnnasArchiveScraper:
     BASE_URL = "https://annas-archive.org"
     API_URL = "https://annas-archive.org/api"
 
-    @staticmethod
-    def _delay():
-        time.sleep(1)  # Add 1 second delay between requests
-
     @classmethod
     def search_books(cls, query, limit=10):
-        cls._delay()
         try:
             # Encode query for URL
             encoded_query = quote(query)
             search_url = f"{cls.API_URL}/search/all?q={encoded_query}&limit={limit}"
             
-            response = requests.get(search_url)
+            response = HttpClient.get(search_url)
             if response.status_code == 200:
                 data = response.json()
                 books = []
@@ -688,11 +653,10 @@ class AnnasArchiveScraper:
 
     @classmethod
     def get_book_content(cls, md5_hash):
-        cls._delay()
         try:
             # Get book details
             detail_url = f"{cls.API_URL}/book/{md5_hash}"
-            response = requests.get(detail_url)
+            response = HttpClient.get(detail_url)
             
             if response.status_code == 200:
                 data = response.json()
@@ -700,7 +664,7 @@ class AnnasArchiveScraper:
                 # Get download link
                 download_url = data.get('download_url')
                 if download_url:
-                    content_response = requests.get(download_url)
+                    content_response = HttpClient.get(download_url)
                     if content_response.status_code == 200:
                         return {
                             'content': content_response.content,
@@ -0,0 +1,97 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ParallelSearchExecutor:
+    """Run several source searches concurrently with a per-source deadline"""
+    MAX_WORKERS = 16
+    DEFAULT_TIMEOUT = 8.0
+    # Searches one source may have running at once; a hung source keeps
+    # its threads past the deadline, and must not take the whole pool
+    MAX_PER_SOURCE = int(os.environ.get('SEARCH_MAX_PER_SOURCE', 4))
+
+    _executor = None
+    _in_flight: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        # Shared pool so a burst of searches can't spawn unbounded threads
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=cls.MAX_WORKERS,
+                        thread_name_prefix='search'
+                    )
+        return cls._executor
+
+    @classmethod
+    def _submit(cls, executor: ThreadPoolExecutor, name: str, search: Callable[[], List[Dict]]):
+        """Start ``search`` unless ``name`` already has ``MAX_PER_SOURCE`` running; None if so"""
+        with cls._lock:
+            if cls._in_flight.get(name, 0) >= cls.MAX_PER_SOURCE:
+                return None
+            cls._in_flight[name] = cls._in_flight.get(name, 0) + 1
+        try:
+            future = executor.submit(search)
+        except Exception:
+            cls._finished(name)
+            raise
+        future.add_done_callback(lambda _: cls._finished(name))
+        return future
+
+    @classmethod
+    def _finished(cls, name: str) -> None:
+        with cls._lock:
+            cls._in_flight[name] -= 1
+
+    @classmethod
+    def run(cls, searches: Dict[str, Callable[[], List[Dict]]],
+            timeout: Optional[float] = None,
+            timeouts: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, List[Dict]], List[str]]:
+        """Run every search at once and collect what finishes in time.
+
+        ``searches`` maps a source name to a zero-argument callable. Each
+        source gets ``timeouts[name]`` seconds (falling back to ``timeout``)
+        measured from the moment all searches were submitted. A source
+        that still has ``MAX_PER_SOURCE`` earlier searches running isn't
+        started and counts as timed out. Returns the results per source
+        and the names of the sources that timed out.
+        """
+        timeout = cls.DEFAULT_TIMEOUT if timeout is None else timeout
+        timeouts = timeouts or {}
+        executor = cls._get_executor()
+
+        started = time.monotonic()
+        futures = {name: cls._submit(executor, name, search) for name, search in searches.items()}
+
+        results = {}
+        timed_out = []
+        for name in [n for n, future in futures.items() if future is None]:
+            del futures[name]
+            timed_out.append(name)
+            results[name] = []
+            logger.warning(f"Search source {name} skipped: {cls.MAX_PER_SOURCE} searches still running")
+        # Wait on the tightest deadlines first so no source waits on another
+        for name in sorted(futures, key=lambda n: timeouts.get(n, timeout)):
+            deadline = started + timeouts.get(name, timeout)
+            future = futures[name]
+            try:
+                results[name] = future.result(timeout=max(0, deadline - time.monotonic())) or []
+            except TimeoutError:
+                # Leave the thread to finish on its own; its result is dropped
+                future.cancel()
+                timed_out.append(name)
+                results[name] = []
+                logger.warning(f"Search source {name} timed out")
+            except Exception as e:
+                results[name] = []
+                logger.error(f"Error searching {name}: {e}")
+
+        return results, timed_out
@@ -1,38 +1,215 @@
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
-from nltk.probability import FreqDist
 from nltk.tokenize.treebank import TreebankWordDetokenizer
-from collections import defaultdict
-from heapq import nlargest
-from transformers import pipeline
+from typing import Dict, List, Optional, Tuple
+import gc
+import hashlib
+import logging
 import nltk
+import os
 import re
+import threading
+import time
+
+from app.utils.disk_cache import DiskCache
+from app.utils.extractive import ExtractiveScorer
+
+logger = logging.getLogger(__name__)
+
+# Returned when summarization itself breaks; never worth caching
+SUMMARY_ERROR = "An error occurred during summarization. Please try again."
+
+class SummarizerRegistry:
+    """Process-wide owner of the NLTK data and the abstractive model.
+
+    Both are loaded lazily on first use and only once per process; the
+    model can also be preloaded (e.g. from gunicorn's ``post_fork``) and is
+    unloaded again after ``IDLE_SECONDS`` without use to give its memory
+    back. Inference holds the model lock, so an idle unload never races a
+    running summary.
+    """
+    MODEL_NAME = os.environ.get('SUMMARIZER_MODEL', 'facebook/bart-large-cnn')
+    # Unload the model after this many idle seconds; 0 keeps it loaded
+    IDLE_SECONDS = float(os.environ.get('SUMMARIZER_IDLE_SECONDS', 0))
+    # After a failed load, wait this long before trying again
+    RETRY_SECONDS = 300
+    NLTK_RESOURCES = {
+        'punkt': 'tokenizers/punkt',
+        'stopwords': 'corpora/stopwords',
+        'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+        'maxent_ne_chunker': 'chunkers/maxent_ne_chunker',
+        'words': 'corpora/words',
+    }
+
+    _summarizer = None
+    _pipeline = None
+    _nltk_ready = False
+    _failed_at: Optional[float] = None
+    _last_used = 0.0
+    _loads = 0
+    _reaper: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+    _model_lock = threading.RLock()
+
+    @classmethod
+    def get(cls) -> 'TextSummarizer':
+        """The shared ``TextSummarizer`` for this process"""
+        if cls._summarizer is None:
+            with cls._lock:
+                if cls._summarizer is None:
+                    cls.ensure_nltk_data()
+                    cls._summarizer = TextSummarizer()
+        return cls._summarizer
+
+    @classmethod
+    def ensure_nltk_data(cls) -> None:
+        """Download whichever NLTK resources are missing, once per process"""
+        if cls._nltk_ready:
+            return
+        for package, path in cls.NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                try:
+                    nltk.download(package, quiet=True)
+                except Exception as e:
+                    logger.error(f"Error downloading NLTK data {package}: {e}")
+        cls._nltk_ready = True
+
+    @classmethod
+    def _load(cls):
+        if cls._pipeline is None:
+            if cls._failed_at and time.time() - cls._failed_at < cls.RETRY_SECONDS:
+                return None
+            try:
+                # Imported here so the app starts without paying for torch
+                from transformers import pipeline
+                started = time.time()
+                cls._pipeline = pipeline("summarization", model=cls.MODEL_NAME)
+                cls._failed_at = None
+                cls._loads += 1
+                logger.info(f"Loaded {cls.MODEL_NAME} in {time.time() - started:.1f}s")
+            except Exception as e:
+                cls._failed_at = time.time()
+                logger.error(f"Error loading abstractive summarizer: {e}")
+                return None
+            cls._start_reaper()
+        cls._last_used = time.time()
+        return cls._pipeline
+
+    @classmethod
+    def model_version(cls) -> Optional[str]:
+        """The model abstractive summaries come from; None while it can't be loaded"""
+        if cls._pipeline is None and cls._failed_at and time.time() - cls._failed_at < cls.RETRY_SECONDS:
+            return None
+        return cls.MODEL_NAME
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the abstractive model is (or can now be) loaded"""
+        with cls._model_lock:
+            return cls._load() is not None
+
+    @classmethod
+    def run(cls, text, **kwargs):
+        """Call the abstractive pipeline, loading it first if needed.
+
+        Returns None if the model can't be loaded.
+        """
+        with cls._model_lock:
+            model = cls._load()
+            if model is None:
+                return None
+            try:
+                return model(text, **kwargs)
+            finally:
+                cls._last_used = time.time()
+
+    @classmethod
+    def preload(cls) -> None:
+        cls.get()
+        cls.available()
+
+    @classmethod
+    def unload(cls) -> None:
+        """Drop the model so its memory can be reclaimed; it reloads on next use"""
+        with cls._model_lock:
+            if cls._pipeline is None:
+                return
+            cls._pipeline = None
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        logger.info(f"Unloaded {cls.MODEL_NAME}")
+
+    @classmethod
+    def _start_reaper(cls) -> None:
+        if cls.IDLE_SECONDS <= 0 or (cls._reaper and cls._reaper.is_alive()):
+            return
+
+        def reap():
+            while cls._pipeline is not None:
+                time.sleep(min(cls.IDLE_SECONDS, 60))
+                if time.time() - cls._last_used >= cls.IDLE_SECONDS:
+                    # Don't wait behind a running summary; check again later
+                    if cls._model_lock.acquire(blocking=False):
+                        try:
+                            if time.time() - cls._last_used >= cls.IDLE_SECONDS:
+                                cls.unload()
+                        finally:
+                            cls._model_lock.release()
+
+        cls._reaper = threading.Thread(target=reap, name='summarizer-reaper', daemon=True)
+        cls._reaper.start()
+
+    @classmethod
+    def stats(cls) -> Dict:
+        return {
+            'model': cls.MODEL_NAME,
+            'loaded': cls._pipeline is not None,
+            'loads': cls._loads,
+            'idle_seconds': round(time.time() - cls._last_used, 1) if cls._last_used else None,
+        }
 
 class TextSummarizer:
+    """Extractive and abstractive summaries.
+
+    Use ``SummarizerRegistry.get()`` rather than constructing one per
+    request; the abstractive model is shared through the registry either way.
+    """
+    # Summary bounds (in tokens) per requested length
+    MAX_LENGTH = {'short': 130, 'medium': 250, 'long': 400}
+    MIN_LENGTH = {'short': 30, 'medium': 100, 'long': 200}
+    # Input is truncated to this many characters before it reaches the model
+    MODEL_INPUT_CHARS = 1024
+
+    # Hierarchical mode: chunk size in (estimated) model tokens, how many
+    # times summaries are summarized again, and a cap on chunk summaries
+    # computed per call. Intermediate levels always use 'short' summaries.
+    CHUNK_TOKENS = int(os.environ.get('SUMMARY_CHUNK_TOKENS', 900))
+    MAX_DEPTH = int(os.environ.get('SUMMARY_MAX_DEPTH', 3))
+    MAX_CHUNKS = int(os.environ.get('SUMMARY_MAX_CHUNKS', 64))
+    CHUNK_BATCH_SIZE = 8
+    CHUNK_LENGTH = 'short'
+    # Bumped when the reduce strategy changes, so cached whole-text summaries are redone
+    HIERARCHICAL_REVISION = 2
+    # A sentence whose hash is divisible by this starts a new chunk (once the
+    # current one is half full), so an edit only shifts nearby boundaries
+    ANCHOR_EVERY = 8
+
+    chunk_cache = DiskCache('summary_chunks', 64 * 1024 * 1024)
+
     def __init__(self):
-        # Download all required NLTK data
-        try:
-            nltk.download('punkt')
-            nltk.download('stopwords')
-            nltk.download('averaged_perceptron_tagger')
-            nltk.download('maxent_ne_chunker')
-            nltk.download('words')
-        except Exception as e:
-            print(f"Error downloading NLTK data: {e}")
-        
-        try:
-            self.stop_words = set(stopwords.words('english'))
-        except Exception:
-            self.stop_words = set()  # Fallback to empty set if stopwords fail
-            
+        SummarizerRegistry.ensure_nltk_data()
+        self.scorer = ExtractiveScorer.shared()
         self.detokenizer = TreebankWordDetokenizer()
-        
-        # Initialize transformers pipeline with error handling
-        try:
-            self.abstractive_summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-        except Exception as e:
-            print(f"Error loading abstractive summarizer: {e}")
-            self.abstractive_summarizer = None
+
+    @property
+    def abstractive_summarizer(self):
+        """The shared abstractive pipeline, loaded on first use (None if unavailable)"""
+        return SummarizerRegistry.run if SummarizerRegistry.available() else None
 
     def clean_text(self, text):
         if not text:
@@ -51,34 +228,9 @@ class TextSummarizer:
             if '.' not in text:
                 return text[:500] + "..."  # Return first 500 chars if no sentences
                 
-            # Try NLTK tokenization, fall back to basic split if it fails
-            try:
-                sentences = sent_tokenize(text)
-            except Exception:
-                sentences = [s.strip() for s in text.split('.') if s.strip()]
-                
-            if not sentences:
+            analysis = self.scorer.analyze(text)
+            if not analysis.sentences:
                 return text[:500] + "..."
-                
-            # Simple word tokenization if NLTK fails
-            try:
-                words = word_tokenize(text.lower())
-            except Exception:
-                words = text.lower().split()
-            
-            # Remove stop words if available
-            word_tokens = [word for word in words 
-                         if word not in self.stop_words and word.isalnum()]
-            
-            # Calculate word frequency
-            freq = FreqDist(word_tokens)
-            
-            # Score sentences
-            scores = defaultdict(int)
-            for i, sentence in enumerate(sentences):
-                for word in sentence.lower().split():
-                    if word in freq:
-                        scores[i] += freq[word]
             
             # Determine summary length
             length_ratio = {
@@ -86,13 +238,13 @@ class TextSummarizer:
                 'medium': 0.3,
                 'long': 0.5
             }
-            num_sentences = max(1, int(len(sentences) * length_ratio.get(length, 0.3)))
+            num_sentences = max(1, int(len(analysis.sentences) * length_ratio.get(length, 0.3)))
             
-            # Get top sentences
-            top_sentences = nlargest(num_sentences, scores, key=scores.get)
-            top_sentences.sort()
+            # Get top sentences, in the order they appear; as before, only ones with a scored word
+            top_sentences = self.scorer.top_sentences(analysis, num_sentences, in_text_order=True,
+                                                      scored_only=True)
             
-            summary = ' '.join([sentences[i] for i in top_sentences])
+            summary = ' '.join(top_sentences)
             return summary if summary else text[:500] + "..."
             
         except Exception as e:
@@ -104,25 +256,14 @@ class TextSummarizer:
             return self.extractive_summarize(text, length)
             
         try:
-            max_length = {
-                'short': 130,
-                'medium': 250,
-                'long': 400
-            }
-            min_length = {
-                'short': 30,
-                'medium': 100,
-                'long': 200
-            }
-            
             # Handle text length limitations
-            if len(text) > 1024:
-                text = text[:1024]  # Truncate to avoid model limitations
+            if len(text) > self.MODEL_INPUT_CHARS:
+                text = text[:self.MODEL_INPUT_CHARS]  # Truncate to avoid model limitations
                 
             summary = self.abstractive_summarizer(
                 text,
-                max_length=max_length.get(length, 250),
-                min_length=min_length.get(length, 100),
+                max_length=self.MAX_LENGTH.get(length, 250),
+                min_length=self.MIN_LENGTH.get(length, 100),
                 do_sample=False
             )[0]['summary_text']
             return summary
@@ -130,6 +271,187 @@ class TextSummarizer:
             print(f"Error in abstractive summarization: {e}")
             return self.extractive_summarize(text, length)
 
+    def abstractive_summarize_batch(self, texts: List[str], length='medium') -> List[str]:
+        """Summarize several texts with a single call into the model.
+
+        The pipeline batches list inputs on its own, which is far cheaper
+        than one call per text. Falls back to extractive summaries if the
+        model is unavailable or fails; ``summarize_batch`` says which.
+        """
+        return [summary for summary, _ in self.summarize_batch(texts, length)]
+
+    def summarize_batch(self, texts: List[str], length='medium') -> List[Tuple[str, str]]:
+        """``abstractive_summarize_batch``, with the method that actually produced each summary"""
+        cleaned = [self.clean_text(text) for text in texts]
+        todo = [i for i, text in enumerate(cleaned) if text]
+        summaries = [("No text provided for summarization.", 'extractive')] * len(texts)
+        if not todo:
+            return summaries
+
+        results = None
+        if self.abstractive_summarizer:
+            try:
+                results = self.abstractive_summarizer(
+                    [cleaned[i][:self.MODEL_INPUT_CHARS] for i in todo],
+                    max_length=self.MAX_LENGTH.get(length, 250),
+                    min_length=self.MIN_LENGTH.get(length, 100),
+                    do_sample=False,
+                    batch_size=len(todo)
+                )
+            except Exception as e:
+                logger.error(f"Error in batched abstractive summarization, falling back to extractive: {e}")
+        for n, i in enumerate(todo):
+            summaries[i] = ((results[n]['summary_text'], 'abstractive') if results
+                            else (self.extractive_summarize(cleaned[i], length), 'extractive'))
+        return summaries
+
+    def split_sentences(self, text: str) -> List[str]:
+        return self.scorer.split_sentences(text)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough subword count; BART-style tokenizers average ~1.3 tokens per word"""
+        return int(len(text.split()) * 1.3) + 1
+
+    def chunk_text(self, text: str, max_tokens: Optional[int] = None) -> List[str]:
+        """Split text into chunks of whole sentences of at most ``max_tokens`` each"""
+        max_tokens = max_tokens or self.CHUNK_TOKENS
+        chunks, current, size = [], [], 0
+        for sentence in self.split_sentences(text):
+            tokens = self.estimate_tokens(sentence)
+            if tokens > max_tokens:
+                # A runaway "sentence" (lists, missing punctuation) is cut by words
+                words = sentence.split()
+                step = max(1, int(max_tokens / 1.3) - 1)
+                pieces = [' '.join(words[i:i + step]) for i in range(0, len(words), step)]
+            else:
+                pieces = [sentence]
+            for piece in pieces:
+                tokens = self.estimate_tokens(piece)
+                anchor = (size >= max_tokens // 2 and
+                          int(hashlib.md5(piece.encode('utf-8')).hexdigest(), 16) % self.ANCHOR_EVERY == 0)
+                if current and (size + tokens > max_tokens or anchor):
+                    chunks.append(' '.join(current))
+                    current, size = [], 0
+                current.append(piece)
+                size += tokens
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+
+    def _summarize_chunks(self, chunks: List[str], length: str) -> Tuple[List[str], int]:
+        """Summarize each chunk, reusing cached results; returns summaries and the number computed"""
+        abstractive = self.abstractive_summarizer is not None
+        mode = f"abstractive:{SummarizerRegistry.MODEL_NAME}" if abstractive else self.scorer.version()
+
+        def key(chunk):
+            return hashlib.sha256(f"{mode}|{length}|{chunk}".encode('utf-8')).hexdigest()
+
+        summaries: List[Optional[str]] = []
+        for chunk in chunks:
+            entry = self.chunk_cache.get(key(chunk))
+            summaries.append(entry.value.decode('utf-8') if entry else None)
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if not missing:
+            return summaries, 0
+
+        results = None
+        if abstractive:
+            try:
+                results = [r['summary_text'] for r in self.abstractive_summarizer(
+                    [chunks[i] for i in missing],
+                    max_length=self.MAX_LENGTH.get(length, 250),
+                    min_length=self.MIN_LENGTH.get(length, 100),
+                    do_sample=False,
+                    truncation=True,
+                    batch_size=self.CHUNK_BATCH_SIZE
+                )]
+            except Exception as e:
+                logger.error(f"Error summarizing {len(missing)} chunks: {e}")
+                mode = self.scorer.version()
+        if results is None:
+            results = [self.extractive_summarize(chunks[i], length) for i in missing]
+
+        for i, summary in zip(missing, results):
+            summaries[i] = summary
+            self.chunk_cache.set(key(chunks[i]), summary.encode('utf-8'), {'mode': mode, 'length': length})
+        return summaries, len(missing)
+
+    @staticmethod
+    def _spread(items: List[str], count: int) -> List[str]:
+        """``count`` items sampled evenly from first to last"""
+        if len(items) <= count:
+            return items
+        step = (len(items) - 1) / max(1, count - 1)
+        return [items[round(i * step)] for i in range(count)]
+
+    def _level_cap(self, budget: int, levels_left: int) -> int:
+        """Most chunks one level may summarize and still leave budget and depth to reduce them to one.
+
+        A chunk holds about ``fan_in`` chunk summaries, so ``n`` chunks here
+        cost roughly ``n / (fan_in - 1)`` more in the levels below, and
+        ``levels_left`` levels can reduce at most ``fan_in ** levels_left``.
+        """
+        fan_in = max(2, self.CHUNK_TOKENS // self.MAX_LENGTH.get(self.CHUNK_LENGTH, 250))
+        return max(1, min(budget * (fan_in - 1) // fan_in, fan_in ** levels_left))
+
+    def _fit_one_chunk(self, summaries: List[str]) -> str:
+        """Join an even sample of ``summaries`` that fits into one model pass"""
+        count = len(summaries)
+        picked = summaries
+        while count > 1 and sum(self.estimate_tokens(s) for s in picked) > self.CHUNK_TOKENS:
+            count -= 1
+            picked = self._spread(summaries, count)
+        return ' '.join(picked)
+
+    def hierarchical_summarize(self, text, length='medium', max_depth: Optional[int] = None,
+                               max_chunks: Optional[int] = None) -> str:
+        """Map-reduce summary of a text of any length, such as a whole book.
+
+        The text is cut into sentence-aligned chunks that fit the model,
+        the chunks are summarized in batches, and the joined summaries are
+        chunked and summarized again, up to ``max_depth`` times, until they
+        fit into one final pass at the requested ``length``. At most
+        ``max_chunks`` chunk summaries are computed, and each level leaves
+        enough of them for the levels below it; past its share, a level
+        samples chunks evenly across its text. If summaries still don't fit
+        one pass at the end, an even sample of them is used, so the final
+        pass always covers the whole text. Chunk summaries are cached, so a
+        different ``length`` or a lightly edited text reuses most of the work.
+        Without the abstractive model, chunks are summarized extractively.
+        """
+        if not text:
+            return "No text provided for summarization."
+        max_depth = self.MAX_DEPTH if max_depth is None else max_depth
+        budget = self.MAX_CHUNKS if max_chunks is None else max_chunks
+
+        try:
+            summaries = None
+            for depth in range(max_depth):
+                chunks = self.chunk_text(text)
+                if len(chunks) <= 1:
+                    break
+                chunks = self._spread(chunks, self._level_cap(budget, max_depth - depth))
+                summaries, computed = self._summarize_chunks(chunks, self.CHUNK_LENGTH)
+                budget -= computed
+                text = ' '.join(summaries)
+            if summaries is not None and self.estimate_tokens(text) > self.CHUNK_TOKENS:
+                text = self._fit_one_chunk(summaries)
+            summary, _ = self._summarize_chunks([text], length)
+            return summary[0]
+        except Exception as e:
+            logger.error(f"Error in hierarchical summarization: {e}")
+            return self.extractive_summarize(text, length)
+
+    def version(self, method='extractive') -> str:
+        """Identifies what produces ``method`` summaries right now, for cache keys"""
+        version = self.scorer.version()
+        if method in ('abstractive', 'hierarchical'):
+            version = SummarizerRegistry.model_version() or version
+        if method == 'hierarchical':
+            version += f"|{self.CHUNK_TOKENS}-{self.MAX_DEPTH}-{self.MAX_CHUNKS}-r{self.HIERARCHICAL_REVISION}"
+        return version
+
     def summarize(self, text, method='extractive', length='medium'):
         cleaned_text = self.clean_text(text)
         
@@ -137,10 +459,12 @@ class TextSummarizer:
             return "No text provided for summarization."
         
         try:
+            if method == 'hierarchical':
+                return self.hierarchical_summarize(cleaned_text, length)
             if method == 'abstractive' and self.abstractive_summarizer:
                 return self.abstractive_summarize(cleaned_text, length)
             else:
                 return self.extractive_summarize(cleaned_text, length)
         except Exception as e:
             print(f"Error in summarization: {e}")
-            return "An error occurred during summarization. Please try again."
\ No newline at end of file
+            return SUMMARY_ERROR
\ No newline at end of file
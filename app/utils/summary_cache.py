@@ -0,0 +1,48 @@
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Dict, Optional, Union
+
+from app.utils.disk_cache import DiskCache
+
+class SummaryCache:
+    """Finished summaries, keyed by what they were made from and how.
+
+    A key is the SHA-256 of the input (the text, or the uploaded file's
+    bytes), the method, the length and a version string naming the model
+    or scorer that produced it, so a new model or IDF table never serves
+    stale results. Values are JSON, so a summary can be a plain string or
+    a dict such as ``ContentProcessor.generate_summary``'s. Least recently
+    used summaries are evicted once the store grows past its size.
+    """
+    store = DiskCache('summaries', 128 * 1024 * 1024)
+
+    _counts = defaultdict(int)
+
+    @staticmethod
+    def content_hash(content: Union[str, bytes]) -> str:
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def key(content_hash: str, method: str, length: str, version: str) -> str:
+        return f"{content_hash}|{method}|{length}|{version}"
+
+    @classmethod
+    def get(cls, content_hash: str, method: str, length: str, version: str) -> Optional[Any]:
+        entry = cls.store.get(cls.key(content_hash, method, length, version))
+        if entry is None:
+            cls._counts['misses'] += 1
+            return None
+        cls._counts['hits'] += 1
+        return json.loads(entry.value)
+
+    @classmethod
+    def set(cls, content_hash: str, method: str, length: str, version: str, summary: Any) -> None:
+        cls.store.set(cls.key(content_hash, method, length, version),
+                      json.dumps(summary).encode('utf-8'), {'method': method, 'version': version})
+
+    @classmethod
+    def stats(cls) -> Dict:
+        return dict(cls._counts, **cls.store.stats())
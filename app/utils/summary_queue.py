@@ -0,0 +1,373 @@
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from app.utils.content_store import ContentStore
+from app.utils.disk_cache import DiskCache
+from app.utils.summarizer import SUMMARY_ERROR, SummarizerRegistry
+from app.utils.summary_cache import SummaryCache
+
+logger = logging.getLogger(__name__)
+
+class JobTexts(ContentStore):
+    """Texts of unfinished summary jobs, kept apart from the library's book texts"""
+    FOLDER = 'summary_jobs'
+
+def _extractive_summary(text: str, length: str) -> str:
+    """Runs in a worker process, which keeps its own shared summarizer"""
+    return SummarizerRegistry.get().summarize(text, method='extractive', length=length)
+
+class SummaryQueue:
+    """Background summarization so requests can return a job id right away.
+
+    A dispatcher thread drains the queue. Abstractive jobs that arrive
+    within ``BATCH_WAIT`` seconds of each other are grouped by length and
+    sent to the model as one list call on a single model thread (the model
+    runs one batch at a time anyway); hierarchical jobs run on that thread
+    too, batching their own chunks. Extractive jobs are CPU bound and go
+    to a pool of ``WORKERS`` processes; with ``WORKERS = 0`` they run on a
+    thread pool instead.
+
+    Job states are kept on disk, so any worker process can answer a status
+    poll. Unfinished jobs (``queued``, ``running``) are small records in
+    ``live``, which never evicts; they leave it once finished (``done``,
+    ``error``) and move, with their summary, to the size-bounded ``store``.
+    The dispatcher copies each job's text to ``JobTexts`` under
+    ``TEXT_SOURCE`` and its content hash, off the request thread. The
+    process running a job touches its record every ``HEARTBEAT_SECONDS``;
+    a job whose record goes ``STALE_SECONDS`` without one was lost with its
+    process (a restart, say), and the next status poll queues it again from
+    the stored text. Its ``on_done`` callback is lost with it.
+    """
+    BATCH_SIZE = int(os.environ.get('SUMMARY_BATCH_SIZE', 8))
+    BATCH_WAIT = float(os.environ.get('SUMMARY_BATCH_WAIT', 0.05))
+    WORKERS = int(os.environ.get('SUMMARY_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+    STALE_SECONDS = int(os.environ.get('SUMMARY_STALE_SECONDS', 300))
+    HEARTBEAT_SECONDS = max(1, STALE_SECONDS // 5)
+
+    # Where job texts are kept until the job finishes, keyed by content hash
+    TEXT_SOURCE = 'summary-job'
+
+    store = DiskCache('summary_jobs', 32 * 1024 * 1024)
+    # Records of unfinished jobs hold no text and are deleted as jobs finish,
+    # so this one is never trimmed: a live job can't be evicted
+    live = DiskCache('summary_jobs_live', sys.maxsize)
+
+    _queue: 'queue.Queue[Dict]' = queue.Queue()
+    _dispatcher: Optional[threading.Thread] = None
+    _model_executor: Optional[ThreadPoolExecutor] = None
+    _extractive_executor = None
+    _callback_executor: Optional[ThreadPoolExecutor] = None
+    _heartbeat: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+    _counts = defaultdict(int)
+    # Jobs queued or running in this process, by id
+    _active: Dict[str, Dict] = {}
+
+    @classmethod
+    def submit(cls, text: str, method: str = 'extractive', length: str = 'medium',
+               on_done: Optional[Callable[[str], None]] = None) -> str:
+        """Queue a summary and return its job id.
+
+        ``on_done`` is called with the summary from a background thread once
+        the job succeeds; it must set up its own app context if it needs one.
+        A summary already in ``SummaryCache`` finishes the job right away,
+        without queueing anything; ``on_done`` still runs in the background.
+        """
+        job = {
+            'id': uuid.uuid4().hex,
+            'text': text,
+            'hash': SummaryCache.content_hash(text or ''),
+            'method': method if method in ('abstractive', 'hierarchical') else 'extractive',
+            'length': length,
+            'on_done': on_done,
+            'submitted_at': time.time(),
+        }
+        cached = SummaryCache.get(job['hash'], job['method'], length,
+                                  SummarizerRegistry.get().version(job['method']))
+        if cached is not None:
+            cls._count('cached')
+            cls._complete(job, cached, store=False)
+            return job['id']
+
+        cls._enqueue(job)
+        cls._count('submitted')
+        return job['id']
+
+    @classmethod
+    def status(cls, job_id: str) -> Optional[Dict]:
+        """The job's state, plus its ``summary`` or ``error`` once finished.
+
+        A job lost to a restart is queued again here.
+        """
+        entry = cls.live.get(job_id)
+        if entry is not None and cls._stale(job_id, entry.stored_at):
+            cls._resume(job_id, entry)
+            entry = cls.live.get(job_id)
+        if entry is None:
+            # Finished, possibly just now
+            entry = cls.store.get(job_id)
+        if entry is None:
+            return None
+        status = dict(entry.meta, id=job_id)
+        status.pop('hash', None)
+        if status['status'] == 'done':
+            status['summary'] = entry.value.decode('utf-8')
+        return status
+
+    @classmethod
+    def wait(cls, job_id: str, timeout: float = 30.0) -> Optional[Dict]:
+        """Poll until the job finishes or ``timeout`` passes; returns its last status"""
+        deadline = time.monotonic() + timeout
+        status = cls.status(job_id)
+        while status and status['status'] in ('queued', 'running') and time.monotonic() < deadline:
+            time.sleep(0.02)
+            status = cls.status(job_id)
+        return status
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls._lock:
+            return dict(cls._counts, pending=cls._queue.qsize(), active=len(cls._active), workers=cls.WORKERS)
+
+    @classmethod
+    def _count(cls, stat: str) -> None:
+        with cls._lock:
+            cls._counts[stat] += 1
+
+    @classmethod
+    def _enqueue(cls, job: Dict) -> None:
+        with cls._lock:
+            cls._active[job['id']] = job
+        cls._save(job, 'queued')
+        cls._start()
+        cls._queue.put(job)
+
+    @classmethod
+    def _stale(cls, job_id: str, stored_at: float) -> bool:
+        with cls._lock:
+            if job_id in cls._active:
+                return False
+        return time.time() - stored_at >= cls.STALE_SECONDS
+
+    @classmethod
+    def _resume(cls, job_id: str, entry) -> None:
+        text = JobTexts.get_text(cls.TEXT_SOURCE, entry.meta['hash'])
+        if text is None:
+            # Lost before the dispatcher stored its text
+            logger.error(f"Can't resume summary job {job_id}: its text wasn't stored")
+            cls.store.set(job_id, b'', dict(entry.meta, status='error', error='Job was lost',
+                                             finished_at=time.time()))
+            cls.live.delete(job_id)
+            return
+        job = {
+            'id': job_id,
+            'text': text,
+            'hash': entry.meta['hash'],
+            'stored': True,
+            'method': entry.meta['method'],
+            'length': entry.meta['length'],
+            'on_done': None,
+            'submitted_at': entry.meta['submitted_at'],
+        }
+        logger.info(f"Resuming summary job {job_id}, lost in status {entry.meta['status']!r}")
+        cls._enqueue(job)
+        cls._count('resumed')
+
+    @classmethod
+    def _beat(cls) -> None:
+        """Keep this process's jobs from looking stale to the others"""
+        while True:
+            time.sleep(cls.HEARTBEAT_SECONDS)
+            with cls._lock:
+                job_ids = list(cls._active)
+            for job_id in job_ids:
+                cls.live.touch(job_id)
+
+    @classmethod
+    def _save(cls, job: Dict, status: str, summary: str = '', error: Optional[str] = None,
+              summarized_with: Optional[str] = None) -> None:
+        meta = {'status': status, 'method': job['method'], 'length': job['length'],
+                'submitted_at': job['submitted_at']}
+        if error:
+            meta['error'] = error
+        if summarized_with and summarized_with != job['method']:
+            meta['summarized_with'] = summarized_with
+        if status in ('done', 'error'):
+            meta['finished_at'] = time.time()
+            # Stored before the live record goes, so a poll always finds one of them
+            cls.store.set(job['id'], summary.encode('utf-8'), meta)
+            cls.live.delete(job['id'])
+        else:
+            # The hash finds the stored text, should another process run it again
+            cls.live.set(job['id'], b'', dict(meta, hash=job['hash']))
+
+    @classmethod
+    def _store_text(cls, job: Dict) -> None:
+        """Keep the job's text where another process can find it, until the job finishes"""
+        if not job.get('stored'):
+            JobTexts.put(cls.TEXT_SOURCE, job['hash'], job['text'] or '')
+            job['stored'] = True
+
+    @classmethod
+    def _start(cls) -> None:
+        if cls._dispatcher is not None and cls._dispatcher.is_alive():
+            return
+        with cls._lock:
+            if cls._dispatcher is not None and cls._dispatcher.is_alive():
+                return
+            cls._model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='summary-model')
+            if cls.WORKERS > 0:
+                # Spawned rather than forked: this process already runs threads
+                cls._extractive_executor = ProcessPoolExecutor(
+                    max_workers=cls.WORKERS, mp_context=multiprocessing.get_context('spawn')
+                )
+            else:
+                cls._extractive_executor = ThreadPoolExecutor(
+                    max_workers=os.cpu_count() or 2, thread_name_prefix='summary'
+                )
+            cls._dispatcher = threading.Thread(target=cls._dispatch, name='summary-dispatcher', daemon=True)
+            cls._dispatcher.start()
+            if cls._heartbeat is None or not cls._heartbeat.is_alive():
+                cls._heartbeat = threading.Thread(target=cls._beat, name='summary-heartbeat', daemon=True)
+                cls._heartbeat.start()
+
+    @classmethod
+    def _get_callback_executor(cls) -> ThreadPoolExecutor:
+        if cls._callback_executor is None:
+            with cls._lock:
+                if cls._callback_executor is None:
+                    cls._callback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='summary-callback')
+        return cls._callback_executor
+
+    @classmethod
+    def _next_batch(cls) -> List[Dict]:
+        """Block for one job, then take whatever else arrives within ``BATCH_WAIT``"""
+        batch = [cls._queue.get()]
+        deadline = time.monotonic() + cls.BATCH_WAIT
+        while len(batch) < cls.BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(cls._queue.get(timeout=remaining) if remaining > 0 else cls._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @classmethod
+    def _dispatch(cls) -> None:
+        while True:
+            batch = cls._next_batch()
+            by_length = defaultdict(list)
+            for job in batch:
+                cls._store_text(job)
+                if job['method'] == 'abstractive':
+                    by_length[job['length']].append(job)
+                elif job['method'] == 'hierarchical':
+                    # Batches its own chunks, so it gets the model thread to itself
+                    cls._save(job, 'running')
+                    cls._model_executor.submit(cls._run_hierarchical, job)
+                else:
+                    cls._run_extractive(job)
+            for length, jobs in by_length.items():
+                for job in jobs:
+                    cls._save(job, 'running')
+                cls._model_executor.submit(cls._run_abstractive, jobs, length)
+
+    @classmethod
+    def _run_extractive(cls, job: Dict) -> None:
+        cls._save(job, 'running')
+        try:
+            future = cls._extractive_executor.submit(_extractive_summary, job['text'], job['length'])
+        except Exception as e:
+            # e.g. a broken process pool; don't lose the job over it
+            logger.error(f"Extractive worker pool unavailable, summarizing inline: {e}")
+            future = Future()
+            try:
+                future.set_result(_extractive_summary(job['text'], job['length']))
+            except Exception as inline_error:
+                future.set_exception(inline_error)
+        future.add_done_callback(lambda f: cls._finish(job, f))
+
+    @classmethod
+    def _run_abstractive(cls, jobs: List[Dict], length: str) -> None:
+        try:
+            summaries = SummarizerRegistry.get().summarize_batch([job['text'] for job in jobs], length)
+            cls._count('batches')
+        except Exception as e:
+            logger.error(f"Error summarizing batch of {len(jobs)}: {e}")
+            for job in jobs:
+                cls._fail(job, e)
+            return
+        for job, (summary, method) in zip(jobs, summaries):
+            if method != job['method']:
+                cls._count('fallbacks')
+            cls._complete(job, summary, method=method)
+
+    @classmethod
+    def _run_hierarchical(cls, job: Dict) -> None:
+        try:
+            summary = SummarizerRegistry.get().summarize(job['text'], method='hierarchical',
+                                                         length=job['length'])
+        except Exception as e:
+            logger.error(f"Error summarizing job {job['id']}: {e}")
+            cls._fail(job, e)
+            return
+        cls._complete(job, summary)
+
+    @classmethod
+    def _finish(cls, job: Dict, future: Future) -> None:
+        try:
+            summary = future.result()
+        except Exception as e:
+            logger.error(f"Error summarizing job {job['id']}: {e}")
+            cls._fail(job, e)
+            return
+        cls._complete(job, summary)
+
+    @classmethod
+    def _complete(cls, job: Dict, summary: str, store: bool = True, method: Optional[str] = None) -> None:
+        """Finish a job; ``method`` is what actually produced the summary, if not the job's own"""
+        method = method or job['method']
+        if store and summary != SUMMARY_ERROR:
+            # Filed under the method that produced it, so an extractive
+            # fallback is never served as an abstractive summary. Cached
+            # before the job reads as done, so a poller that sees it finish
+            # and resubmits gets the cached copy
+            SummaryCache.set(job['hash'], method, job['length'],
+                             SummarizerRegistry.get().version(method), summary)
+        cls._save(job, 'done', summary=summary, summarized_with=method)
+        cls._finished(job)
+        cls._count('done')
+        if job['on_done'] is not None:
+            # Never on the caller's thread: a cache hit finishes inside a request
+            cls._get_callback_executor().submit(cls._call_back, job, summary)
+
+    @staticmethod
+    def _call_back(job: Dict, summary: str) -> None:
+        try:
+            job['on_done'](summary)
+        except Exception as e:
+            logger.error(f"Error in callback for summary job {job['id']}: {e}")
+
+    @classmethod
+    def _fail(cls, job: Dict, error: Exception) -> None:
+        cls._save(job, 'error', error=str(error))
+        cls._finished(job)
+        cls._count('failed')
+
+    @classmethod
+    def _finished(cls, job: Dict) -> None:
+        """Forget a finished job, and its stored text unless another job here has the same"""
+        with cls._lock:
+            cls._active.pop(job['id'], None)
+            shared = any(other['hash'] == job['hash'] for other in cls._active.values())
+        if job.get('stored') and not shared:
+            JobTexts.delete(cls.TEXT_SOURCE, job['hash'])
@@ -0,0 +1,67 @@
+"""EPUB text extraction: ebooklib + BeautifulSoup against ``EpubTextExtractor``.
+
+Times the previous ``extract_text_from_epub`` (``epub.read_epub`` then
+``BeautifulSoup(..., 'html.parser').get_text()`` per document, kept below
+as ``reference_text``) and the lxml spine extractor, and checks they
+produce the same words. Whitespace differs by design: the extractor
+normalises it to one paragraph per block, and it drops ``<nav>`` blocks
+(Gutenberg's tables of contents), which account for the missing words.
+
+    python -m benchmarks.bench_epub [--book NAME] [--repeat N] [--workers N]
+"""
+import argparse
+import os
+import statistics
+import time
+from collections import Counter
+
+import ebooklib
+from bs4 import BeautifulSoup
+from ebooklib import epub
+
+from app.utils.epub_extract import EpubTextExtractor
+from benchmarks.replay import ROOT
+
+def reference_text(path: str) -> str:
+    book = epub.read_epub(path)
+    text = ""
+    for item in book.get_items():
+        if item.get_type() == ebooklib.ITEM_DOCUMENT:
+            soup = BeautifulSoup(item.get_content(), 'html.parser')
+            text += soup.get_text() + "\n"
+    return text
+
+def median_time(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--book', default='pg2600-images-3.epub')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=EpubTextExtractor.WORKERS)
+    args = parser.parse_args()
+
+    EpubTextExtractor.WORKERS = args.workers
+    path = os.path.join(ROOT, 'epub', args.book)
+    # Start the worker processes outside the timing, as a long-running app would have
+    EpubTextExtractor.extract(path)
+    before_text, result = reference_text(path), EpubTextExtractor.extract(path)
+    before_words, after_words = Counter(before_text.split()), Counter(result.text.split())
+    missing = sum((before_words - after_words).values())
+    extra = sum((after_words - before_words).values())
+
+    before = median_time(lambda: reference_text(path), args.repeat)
+    after = median_time(lambda: EpubTextExtractor.extract(path), args.repeat)
+    print(f"{args.book}: {len(result.chapters)} chapters, {sum(after_words.values())} words, "
+          f"{args.workers} workers")
+    print(f"ebooklib + bs4 {before:8.2f}s")
+    print(f"lxml spine     {after:8.2f}s  ({before / after:.1f}x)")
+    print(f"words missing {missing}, extra {extra} (of {sum(before_words.values())})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Time of ``ContentProcessor.generate_summary`` on the sample EPUBs.
+
+Compares the original implementation (three ``word_tokenize`` passes and
+dict-based scoring, kept below as ``reference_summary``) with the shared
+``ExtractiveScorer`` (one ``word_tokenize`` pass, NumPy scoring), and
+checks both return the same summary, key sentences and topics.
+
+    python -m benchmarks.bench_extractive [--repeat N] [--untrained-punkt]
+
+``--untrained-punkt`` swaps in NLTK's data-free Punkt tokenizer and a
+small stopword list, for machines without the ``punkt``/``stopwords`` data.
+"""
+import argparse
+import os
+import statistics
+import time
+
+import nltk.tokenize
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from app.utils import extractive
+from app.utils.content_processor import ContentProcessor
+from app.utils.extractive import ExtractiveScorer
+from benchmarks.replay import ROOT
+
+EPUBS = ['pg132-images-3.epub', 'pg2600-images-3.epub', 'pg66706-images-3.epub']
+FALLBACK_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'had', 'has', 'have',
+    'he', 'her', 'his', 'i', 'in', 'is', 'it', 'its', 'not', 'of', 'on', 'or', 'she', 'that',
+    'the', 'their', 'they', 'this', 'to', 'was', 'were', 'which', 'with', 'you',
+}
+
+def reference_summary(processor, content, max_length=1000):
+    """``generate_summary`` as it was before the shared scorer"""
+    word_tokenize, sent_tokenize = nltk.tokenize.word_tokenize, nltk.tokenize.sent_tokenize
+    stop_words = processor.scorer.stop_words
+    cleaned_content = processor.preprocess_text(content)
+
+    sentences = sent_tokenize(cleaned_content)
+    word_freq = {}
+    for word in word_tokenize(cleaned_content.lower()):
+        if word.isalnum() and word not in stop_words:
+            word_freq[word] = word_freq.get(word, 0) + 1
+    sentence_scores = {}
+    for sentence in sentences:
+        score = 0
+        for word in word_tokenize(sentence.lower()):
+            if word.isalnum() and word not in stop_words:
+                score += word_freq.get(word, 0)
+        sentence_scores[sentence] = score
+    key_sentences = [s for s, _ in sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:5]]
+
+    topic_freq = {}
+    for word in word_tokenize(cleaned_content.lower()):
+        if word.isalnum() and word not in stop_words:
+            topic_freq[word] = topic_freq.get(word, 0) + 1
+    main_topics = sorted(topic_freq.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    summary = " ".join(key_sentences)
+    if len(summary) > max_length:
+        summary = summary[:max_length] + "..."
+    return {'summary': summary, 'key_sentences': key_sentences,
+            'main_topics': [topic[0] for topic in main_topics], 'full_text': cleaned_content}
+
+def use_untrained_punkt():
+    tokenizer = PunktSentenceTokenizer()
+    # word_tokenize looks sent_tokenize up in its own module
+    nltk.tokenize.sent_tokenize = extractive.sent_tokenize = \
+        lambda text, language='english': tokenizer.tokenize(text)
+
+def make_processor(untrained):
+    if untrained:
+        return ContentProcessor(ExtractiveScorer(stop_words=FALLBACK_STOPWORDS))
+    return ContentProcessor()
+
+def median_time(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--untrained-punkt', action='store_true')
+    args = parser.parse_args()
+
+    if args.untrained_punkt:
+        use_untrained_punkt()
+    processor = make_processor(args.untrained_punkt)
+
+    print(f"{'book':24} {'words':>8} {'before s':>9} {'after s':>8} {'speedup':>8}")
+    for name in EPUBS:
+        text = processor.extract_text_from_epub(os.path.join(ROOT, 'epub', name))
+        if reference_summary(processor, text) != processor.generate_summary(text):
+            raise SystemExit(f"{name}: shared scorer's summary differs from the reference")
+        before = median_time(lambda: reference_summary(processor, text), args.repeat)
+        after = median_time(lambda: processor.generate_summary(text), args.repeat)
+        print(f"{name:24} {len(text.split()):8} {before:9.2f} {after:8.2f} {before / after:7.1f}x")
+
+if __name__ == '__main__':
+    main()
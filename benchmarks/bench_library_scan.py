@@ -0,0 +1,109 @@
+"""Local library scans: the old per-file parse against the incremental scanner.
+
+Fills a temporary upload folder with ``--books`` small EPUBs and a
+temporary SQLite database, then times ``BookCache.cache_local_books``
+on the empty database (every file is new), on an unchanged folder, and
+after ``--touch`` files were rewritten. The old loop, ``process_book_file``
+plus one ``Book`` query per file, is timed on ``--sample`` files and
+scaled up to the whole folder.
+
+    python -m benchmarks.bench_library_scan [--books N] [--sample N] [--touch N] [--workers N]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import time
+import zipfile
+
+from config import Config
+
+CONTAINER = ('<?xml version="1.0"?><container version="1.0" '
+             'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+             '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+             '</rootfiles></container>')
+
+def write_epub(path: str, number: int, revision: int = 0) -> None:
+    chapters = range(5)
+    with zipfile.ZipFile(path, 'w') as book:
+        book.writestr('mimetype', 'application/epub+zip')
+        book.writestr('META-INF/container.xml', CONTAINER)
+        book.writestr('OEBPS/content.opf', (
+            '<package xmlns="http://www.idpf.org/2007/opf" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<metadata><dc:title>Book {number}.{revision}</dc:title><dc:creator>Author {number % 97}</dc:creator>'
+            '</metadata><manifest>'
+            + ''.join(f'<item id="c{i}" href="c{i}.xhtml" media-type="application/xhtml+xml"/>' for i in chapters)
+            + '</manifest><spine>' + ''.join(f'<itemref idref="c{i}"/>' for i in chapters) + '</spine></package>'
+        ))
+        for i in chapters:
+            book.writestr(f'OEBPS/c{i}.xhtml', '<html><body>' + f'<p>Chapter {i} of book {number}.</p>' * 50
+                          + '</body></html>')
+
+def reference_scan(folder: str, names) -> None:
+    """``cache_local_books`` as it was: parse every file, then query for it"""
+    from app.models import Book
+    from app.utils.process_book_file import process_book_file
+
+    # process_book_file prints its errors
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in names:
+            filepath = os.path.join(folder, name)
+            process_book_file(filepath)
+            Book.query.filter_by(file_path=filepath).first()
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=10000)
+    parser.add_argument('--sample', type=int, default=200)
+    parser.add_argument('--touch', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    folder = os.path.join(work, 'epub')
+    os.makedirs(folder)
+    os.environ['CACHE_FOLDER'] = os.path.join(work, 'cache')
+    names = [f'book{number:05d}.epub' for number in range(args.books)]
+    for number, name in enumerate(names):
+        write_epub(os.path.join(folder, name), number)
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(work, 'app.db')
+        UPLOAD_FOLDER = folder
+        CACHE_FOLDER = os.environ['CACHE_FOLDER']
+        SCHEDULER_ENABLED = False
+
+    from app import create_app, db
+    from app.utils.book_cache import BookCache
+
+    logging.getLogger('app').setLevel(logging.WARNING)
+    if args.workers is not None:
+        BookCache.LIBRARY_SCAN_WORKERS = args.workers
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        sample = names[:args.sample]
+        reference, _ = timed(lambda: reference_scan(folder, sample))
+        estimate = reference * args.books / len(sample)
+
+        first, added = timed(BookCache.cache_local_books)
+        rescan, _ = timed(BookCache.cache_local_books)
+        for number in range(args.touch):
+            write_epub(os.path.join(folder, names[number]), number, revision=1)
+        touched, _ = timed(BookCache.cache_local_books)
+
+    print(f"{args.books} EPUBs, {BookCache.LIBRARY_SCAN_WORKERS} workers")
+    print(f"old loop (est.)   {estimate:8.2f}s  ({reference / len(sample) * 1000:.1f} ms per file)")
+    print(f"first scan        {first:8.2f}s  ({added} books added)")
+    print(f"unchanged rescan  {rescan:8.2f}s")
+    print(f"{args.touch} files changed   {touched:8.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Per-page parse time and allocations of the listing scrapers.
+
+Compares the old full ``html.parser`` tree against ``parse_html`` (lxml,
+restricted to the subtrees each extractor reads) on the saved pages in
+``benchmarks/fixtures/pages``, and checks both extract the same data.
+Allocations are the Python heap peak seen by ``tracemalloc``; libxml2's
+own short-lived buffers are not included.
+
+    python -m benchmarks.bench_parsing [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from app.utils.html_parsing import parse_html
+
+PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+
+def booklinks(soup):
+    return [
+        (item.find('a')['href'], item.find(class_='title').get_text().strip(),
+         item.find(class_='subtitle').get_text().strip())
+        for item in soup.select('.booklink')
+    ]
+
+def book_files(soup):
+    return [(link['href'], link.get_text().strip()) for link in soup.select('table.files a')]
+
+def standard_ebooks(soup):
+    return [
+        (item.select_one('.title').text.strip(), item.select_one('.author').text.strip(),
+         item.select_one('img')['src'])
+        for item in soup.select('.ebook-list li')
+    ]
+
+def archive_items(soup):
+    return [
+        (item['data-id'], item.select_one('.title').text.strip(), item.select_one('.creator').text.strip())
+        for item in soup.select('.item-ia')
+    ]
+
+# (fixture page, subtrees kept by the scraper, extractor)
+CASES = [
+    ('gutenberg_search_downloads.html', 'booklink', booklinks),
+    ('gutenberg_bookshelf_fiction.html', 'booklink', booklinks),
+    ('gutenberg_ebook_1342.html', "//table[contains(concat(' ', @class, ' '), ' files ')]", book_files),
+    ('standardebooks_ebooks.html', 'ebook-list', standard_ebooks),
+    ('archive_details_texts.html', 'item-ia', archive_items),
+]
+
+def measure(parse, extract, markup, repeat):
+    """(median seconds, peak traced bytes, extracted data) for parse + extract"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(parse(markup))
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    data = extract(parse(markup))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak, data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'page':36} {'before ms':>10} {'after ms':>9} {'speedup':>8} "
+          f"{'before KiB':>11} {'after KiB':>10}")
+    for page, only, extract in CASES:
+        with open(os.path.join(PAGES, page), encoding='utf-8') as f:
+            markup = f.read()
+        before = measure(lambda m: BeautifulSoup(m, 'html.parser'), extract, markup, args.repeat)
+        after = measure(lambda m: parse_html(m, only), extract, markup, args.repeat)
+        if before[2] != after[2]:
+            raise SystemExit(f"{page}: restricted parse extracted different data")
+        print(f"{page:36} {before[0] * 1000:10.2f} {after[0] * 1000:9.2f} "
+              f"{before[0] / after[0]:7.1f}x {before[1] / 1024:11.0f} {after[1] / 1024:10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""PDF text extraction: the old serial page loop against ``PdfTextExtractor``.
+
+Generates a PDF of ``--pages`` text-filled pages with reportlab, then
+times the serial ``text += page.extract_text()`` loop, a cold parallel
+extraction (pool already started, empty cache) and a cached one, and
+checks the serial and parallel texts match.
+
+    python -m benchmarks.bench_pdf [--pages N] [--workers N]
+"""
+import argparse
+import io
+import tempfile
+import time
+
+from PyPDF2 import PdfReader
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from app.utils.disk_cache import DiskCache
+from app.utils.pdf_extract import PdfTextExtractor
+
+LINE = "It is a truth universally acknowledged, that a single man in possession of a good fortune"
+
+def make_pdf(pages: int) -> bytes:
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for number in range(pages):
+        for line in range(45):
+            pdf.drawString(40, 750 - line * 16, f"{number + 1}.{line + 1} {LINE}")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+def serial(data: bytes) -> str:
+    text = ""
+    for page in PdfReader(io.BytesIO(data)).pages:
+        text += page.extract_text() + "\n"
+    return text
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=600)
+    parser.add_argument('--workers', type=int, default=PdfTextExtractor.WORKERS)
+    args = parser.parse_args()
+
+    PdfTextExtractor.WORKERS = args.workers
+    PdfTextExtractor.cache = DiskCache('pdf_text', 256 * 1024 * 1024, folder=tempfile.mkdtemp())
+    data = make_pdf(args.pages)
+    # Start the worker processes outside the timing, as a long-running app would have
+    warm_up = PdfTextExtractor.SHARD_PAGES * args.workers * 2
+    PdfTextExtractor.extract(make_pdf(warm_up))
+
+    before, expected = timed(lambda: serial(data))
+    cold, text = timed(lambda: PdfTextExtractor.extract(data))
+    cached, _ = timed(lambda: PdfTextExtractor.extract(data))
+    if text != expected:
+        raise SystemExit("Parallel extraction returned different text")
+    print(f"{args.pages} pages, {len(data) / 1024 / 1024:.1f} MiB, {args.workers} workers")
+    print(f"serial loop  {before:8.2f}s")
+    print(f"parallel     {cold:8.2f}s  ({before / cold:.1f}x)")
+    print(f"cached       {cached:8.3f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Replay recorded HTTP fixtures through ``HttpClient`` without touching the network.
+
+``benchmarks/fixtures/http/manifest.json`` lists the responses to serve:
+
+    {"url": "<regex matched against the full url>", "method": "GET",
+     "status": 200, "content_type": "text/html; charset=utf-8",
+     "body": "<file under benchmarks/fixtures>"}
+
+An entry may name an ``"epub"`` (relative to the repository root) instead
+of a ``"body"``; it is served as one HTML page made of the book's spine,
+the way Gutenberg serves its ``-images.html`` editions. URLs without an
+entry get a 404.
+
+With ``record=True`` every request goes to the real network and its
+response is saved as a new exact-url entry, which is how the fixtures are
+refreshed from the live sites.
+"""
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import threading
+import zipfile
+from http.client import responses as REASONS
+from typing import Dict, List, Optional
+
+import requests
+from lxml import etree
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+MANIFEST = os.path.join(FIXTURES, 'http', 'manifest.json')
+
+_CONTAINER_NS = {'c': 'urn:oasis:names:tc:opendocument:xmlns:container'}
+_OPF_NS = {'opf': 'http://www.idpf.org/2007/opf'}
+
+def epub_as_html(path: str) -> bytes:
+    """Concatenate the ``<body>`` of every spine document of an EPUB into one page"""
+    with zipfile.ZipFile(path) as book:
+        container = etree.fromstring(book.read('META-INF/container.xml'))
+        opf_path = container.xpath('//c:rootfile/@full-path', namespaces=_CONTAINER_NS)[0]
+        opf = etree.fromstring(book.read(opf_path))
+        manifest = {
+            item.get('id'): item.get('href')
+            for item in opf.xpath('//opf:manifest/opf:item', namespaces=_OPF_NS)
+        }
+        base = posixpath.dirname(opf_path)
+        bodies = []
+        for ref in opf.xpath('//opf:spine/opf:itemref/@idref', namespaces=_OPF_NS):
+            document = etree.fromstring(book.read(posixpath.join(base, manifest[ref])))
+            body = document.find('{http://www.w3.org/1999/xhtml}body')
+            if body is not None:
+                bodies.extend(etree.tostring(child, encoding='unicode') for child in body)
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Book</title></head>\n<body>\n'
+        + '\n'.join(bodies) + '\n</body></html>\n'
+    ).encode('utf-8')
+
+class FixtureTransport(BaseAdapter):
+    """``requests`` transport adapter serving responses from the fixture manifest"""
+
+    def __init__(self, manifest: str = MANIFEST, record: bool = False):
+        super().__init__()
+        self.manifest = manifest
+        self.record = record
+        self.misses: List[str] = []
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._live = HTTPAdapter() if record else None
+        with open(manifest, encoding='utf-8') as f:
+            self.entries = json.load(f)
+        for entry in self.entries:
+            entry['_pattern'] = re.compile(entry['url'])
+
+    def _match(self, method: str, url: str) -> Optional[Dict]:
+        for entry in self.entries:
+            if entry.get('method', 'GET') == method and entry['_pattern'].search(url):
+                return entry
+        return None
+
+    def _body(self, entry: Dict) -> bytes:
+        key = entry.get('body') or entry.get('epub')
+        if not key:
+            return b''
+        with self._lock:
+            if key not in self._bodies:
+                if entry.get('epub'):
+                    self._bodies[key] = epub_as_html(os.path.join(ROOT, entry['epub']))
+                else:
+                    with open(os.path.join(FIXTURES, entry['body']), 'rb') as f:
+                        self._bodies[key] = f.read()
+            return self._bodies[key]
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.record:
+            response = self._live.send(request, stream=False, timeout=timeout, verify=verify,
+                                       cert=cert, proxies=proxies)
+            self._save(request, response)
+            return response
+
+        entry = self._match(request.method, request.url)
+        if entry is None:
+            self.misses.append(f"{request.method} {request.url}")
+            status, content_type, body = 404, 'text/plain', b'Not in fixtures'
+        else:
+            status = entry.get('status', 200)
+            content_type = entry.get('content_type', 'text/html; charset=utf-8')
+            body = b'' if request.method == 'HEAD' else self._body(entry)
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = REASONS.get(status, '')
+        response.headers = CaseInsensitiveDict({'Content-Type': content_type,
+                                                'Content-Length': str(len(body))})
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def _save(self, request, response) -> None:
+        content_type = response.headers.get('Content-Type', '')
+        extension = '.json' if 'json' in content_type else '.html'
+        name = f"http/{hashlib.sha1(request.url.encode('utf-8')).hexdigest()[:16]}{extension}"
+        entry = {'url': '^' + re.escape(request.url) + '$', 'method': request.method,
+                 'status': response.status_code, 'content_type': content_type}
+        if request.method != 'HEAD':
+            with open(os.path.join(FIXTURES, name), 'wb') as f:
+                f.write(response.content)
+            entry['body'] = name
+        with self._lock:
+            # Exact recordings take precedence over the hand-written patterns
+            self.entries.insert(0, dict(entry, _pattern=re.compile(entry['url'])))
+            with open(self.manifest, 'w', encoding='utf-8') as f:
+                json.dump([{k: v for k, v in e.items() if k != '_pattern'} for e in self.entries],
+                          f, indent=2)
+                f.write('\n')
+
+    def close(self):
+        if self._live is not None:
+            self._live.close()
@@ -0,0 +1,225 @@
+"""Offline benchmark suite for the scrapers and the content pipeline.
+
+Every case runs in its own fresh process with an empty cache folder and
+with ``HttpClient`` replaying ``benchmarks/fixtures`` (see ``replay.py``).
+The first call of a case is reported as ``cold``; the remaining calls hit
+whatever the app caches (HTTP responses, cover checks, stored texts) and
+give the ``warm`` latency and throughput. Peak RSS is the case process's
+high-water mark, including its setup.
+
+    python -m benchmarks.run                    # run everything
+    python -m benchmarks.run --only fetch_content --repeat 20
+    python -m benchmarks.run --save-baseline    # store results as the baseline
+    python -m benchmarks.run --check            # exit 1 on regressions
+    python -m benchmarks.run --record           # refresh fixtures from the live sites
+
+The per-host rate limits are lifted while replaying, since they exist to
+be polite to the real sites and would otherwise dominate every timing.
+
+``benchmarks/baseline.json`` is checked in, recorded from this tree on a
+single-CPU Linux box with Python 3.11 and without ``transformers``. After
+a change that is meant to move the numbers, or on different hardware,
+regenerate it with ``python -m benchmarks.run --save-baseline`` and commit
+the result.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.replay import FixtureTransport, ROOT
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_TOLERANCE = 0.25
+
+def _book_text(book_id: str) -> str:
+    from app.utils.content_fetcher import BookContentFetcher
+    text = BookContentFetcher.fetch_content({'source': 'gutenberg', 'source_id': book_id})
+    if not text:
+        raise RuntimeError(f"Fixture book {book_id} could not be loaded")
+    return text
+
+def search_gutenberg() -> Callable:
+    from app.utils.gutenberg_fetcher import GutenbergAPI
+    return lambda: GutenbergAPI.search_books('pride and prejudice', limit=20)
+
+def search_archive() -> Callable:
+    from app.utils.archive_fetcher import ArchiveAPI
+    return lambda: ArchiveAPI.search_books('pride and prejudice')
+
+def search_openlibrary() -> Callable:
+    from app.utils.scraper import OpenLibraryScraper
+    return lambda: OpenLibraryScraper.search_books('pride and prejudice')
+
+def top_books_gutenberg() -> Callable:
+    from app.utils.gutenberg_fetcher import GutenbergAPI
+    return lambda: GutenbergAPI.get_top_books(limit=8)
+
+def top_books_archive() -> Callable:
+    from app.utils.archive_fetcher import ArchiveAPI
+    return lambda: ArchiveAPI.get_top_books(limit=8)
+
+def fetch_content() -> Callable:
+    from app.utils.content_fetcher import BookContentFetcher
+    return lambda: BookContentFetcher.fetch_content({'source': 'gutenberg', 'source_id': '2600'})
+
+def process_book_content() -> Callable:
+    from app.routes.books import process_book_content
+    text = _book_text('2600')
+    return lambda: process_book_content(text)
+
+def generate_summary() -> Callable:
+    from app.utils.content_processor import ContentProcessor
+    processor = ContentProcessor()
+    text = _book_text('132')
+    return lambda: processor.generate_summary(text)
+
+def text_summarizer() -> Callable:
+    from app.utils.summarizer import TextSummarizer
+    summarizer = TextSummarizer()
+    text = _book_text('132')
+    return lambda: summarizer.summarize(text, method='extractive')
+
+# name -> setup returning the callable to time
+CASES: Dict[str, Callable[[], Callable]] = {
+    'search_books[gutenberg]': search_gutenberg,
+    'search_books[archive]': search_archive,
+    'search_books[openlibrary]': search_openlibrary,
+    'get_top_books[gutenberg]': top_books_gutenberg,
+    'get_top_books[archive]': top_books_archive,
+    'fetch_content': fetch_content,
+    'process_book_content': process_book_content,
+    'ContentProcessor.generate_summary': generate_summary,
+    'TextSummarizer.summarize': text_summarizer,
+}
+
+def _peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux but in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _describe(error: Exception) -> str:
+    # Some errors (e.g. NLTK's missing-data LookupError) span a whole banner
+    text = re.sub(r'\x1b\[[0-9;]*m', '', str(error))
+    lines = [line.strip() for line in text.splitlines() if any(c.isalnum() for c in line)]
+    return f"{type(error).__name__}: {lines[0] if lines else ''}"
+
+def _run_case(name: str, repeat: int, record: bool) -> Dict:
+    """Run one case; called in a fresh child process"""
+    logging.basicConfig(level=logging.CRITICAL)
+    os.environ['CACHE_FOLDER'] = tempfile.mkdtemp(prefix='booksurfer-bench-')
+
+    from app.utils.http_client import HttpClient
+    from app.utils.rate_limiter import RateLimiter
+
+    transport = FixtureTransport(record=record)
+    HttpClient.use_transport(transport)
+    RateLimiter.HOST_LIMITS = {}
+    RateLimiter.DEFAULT_RATE = RateLimiter.DEFAULT_CAPACITY = float('inf')
+
+    result = {'name': name}
+    try:
+        call = CASES[name]()
+    except Exception as e:
+        result['skipped'] = _describe(e)
+        return result
+
+    timings = []
+    try:
+        for _ in range(repeat + 1):
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+    except Exception as e:
+        result['error'] = _describe(e)
+        return result
+
+    warm = sorted(timings[1:]) or timings
+    result.update({
+        'cold_ms': timings[0] * 1000,
+        'warm_median_ms': statistics.median(warm) * 1000,
+        'warm_p95_ms': warm[min(len(warm) - 1, int(len(warm) * 0.95))] * 1000,
+        'ops_per_sec': 1 / statistics.median(warm) if statistics.median(warm) else float('inf'),
+        'peak_rss_mib': _peak_rss_mib(),
+        'fixture_misses': len(set(transport.misses)),
+    })
+    return result
+
+def run(names: List[str], repeat: int, record: bool = False) -> List[Dict]:
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for name in names:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(_run_case, (name, repeat, record)))
+    return results
+
+def check(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Descriptions of every metric that got worse than baseline by more than ``tolerance``"""
+    regressions = []
+    for result in results:
+        base = baseline.get(result['name'])
+        if not base or 'warm_median_ms' not in result:
+            continue
+        for metric in ('warm_median_ms', 'peak_rss_mib'):
+            if metric in base and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{result['name']}: {metric} {result[metric]:.1f} "
+                                   f"vs baseline {base[metric]:.1f}")
+    return regressions
+
+def report(results: List[Dict]) -> None:
+    print(f"{'case':36} {'cold ms':>9} {'warm ms':>9} {'p95 ms':>9} {'ops/s':>9} {'RSS MiB':>8}")
+    for r in results:
+        if 'warm_median_ms' not in r:
+            print(f"{r['name']:36} {'skipped' if 'skipped' in r else 'error'}: "
+                  f"{r.get('skipped') or r.get('error')}")
+            continue
+        note = f"  ({r['fixture_misses']} urls not in fixtures)" if r['fixture_misses'] else ''
+        print(f"{r['name']:36} {r['cold_ms']:9.1f} {r['warm_median_ms']:9.2f} {r['warm_p95_ms']:9.2f} "
+              f"{r['ops_per_sec']:9.1f} {r['peak_rss_mib']:8.1f}{note}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=list(CASES), help='cases to run')
+    parser.add_argument('--repeat', type=int, default=10, help='warm calls per case')
+    parser.add_argument('--json', help='also write results to this file')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true', help='fail on regressions against the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--record', action='store_true', help='hit the live sites and save their responses')
+    args = parser.parse_args()
+
+    results = run(args.only or list(CASES), args.repeat, record=args.record)
+    report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        baseline = {r['name']: {k: round(r[k], 3) for k in ('cold_ms', 'warm_median_ms', 'peak_rss_mib')}
+                    for r in results if 'warm_median_ms' in r}
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline for {len(baseline)} cases to {args.baseline}")
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        with open(args.baseline) as f:
+            regressions = check(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
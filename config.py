@@ -18,4 +18,17 @@ class Config:
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024
     
     # Allowed file extensions
-    ALLOWED_EXTENSIONS = {'epub', 'pdf', 'txt'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'epub', 'pdf', 'txt'}
+
+    # On-disk caches (HTTP responses, book content, summaries)
+    CACHE_FOLDER = os.environ.get('CACHE_FOLDER', os.path.join(basedir, 'cache'))
+
+    # Approximate characters per page in the paginated reader
+    READER_PAGE_SIZE = int(os.environ.get('READER_PAGE_SIZE', 2000))
+
+    # Background scheduler (book cache and home page snapshot refresh)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    FRONT_PAGE_REFRESH_MINUTES = int(os.environ.get('FRONT_PAGE_REFRESH_MINUTES', 30))
+
+    # Per-source deadline (seconds) for concurrent book searches
+    SEARCH_TIMEOUT = float(os.environ.get('SEARCH_TIMEOUT', 8))
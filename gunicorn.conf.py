@@ -0,0 +1,29 @@
+import os
+
+def post_fork(server, worker):
+    """Elect one worker to run the background jobs, and preload the summarizer.
+
+    The background jobs (book cache, home page snapshot) run in whichever
+    worker holds the scheduler lock file, never in the master, so workers
+    are always forked from a process without scraping threads. The lock is
+    released when its worker exits, and the worker forked to replace it
+    takes it over. Set SCHEDULER_ENABLED=false to turn the jobs off, e.g.
+    when another service runs them.
+
+    With SUMMARIZER_PRELOAD=true each worker also loads the summarization
+    model before it takes requests; otherwise the model loads on the first
+    abstractive summary a worker serves.
+    """
+    from app.tasks import elect_scheduler_process
+    if elect_scheduler_process():
+        server.log.info(f"Worker {worker.pid} elected to run the background scheduler")
+    if os.environ.get('SUMMARIZER_PRELOAD', 'false').lower() == 'true':
+        from app.utils.summarizer import SummarizerRegistry
+        SummarizerRegistry.preload()
+        server.log.info(f"Worker {worker.pid} preloaded {SummarizerRegistry.MODEL_NAME}")
+
+def post_worker_init(worker):
+    """Start the background jobs in the elected worker, on its loaded app"""
+    from app.tasks import elect_scheduler_process, init_scheduler
+    if elect_scheduler_process() and init_scheduler(worker.wsgi):
+        worker.log.info(f"Worker {worker.pid} started the background scheduler")
@@ -1,7 +1,7 @@
 """"Add accessible_without_login to Book model"
 
 Revision ID: 47955b177ec4
-Revises: 
+Revises: xxxx
 Create Date: 2024-12-05 00:23:09.487731
 
 """
@@ -11,12 +11,16 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '47955b177ec4'
-down_revision = None
+down_revision = 'xxxx'
 branch_labels = None
 depends_on = None
 
 
 def upgrade():
+    # Tables created by 'xxxx' already have the column; only older ones need it
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('book')]
+    if 'accessible_without_login' in columns:
+        return
     # ### commands auto generated by Alembic - please adjust! ###
     with op.batch_alter_table('book', schema=None) as batch_op:
         batch_op.add_column(sa.Column('accessible_without_login', sa.Boolean(), nullable=True))
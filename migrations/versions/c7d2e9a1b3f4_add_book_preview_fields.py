@@ -0,0 +1,30 @@
+"""Add preview, word_count and estimated_pages to Book
+
+Revision ID: c7d2e9a1b3f4
+Revises: 47955b177ec4
+Create Date: 2026-10-17 10:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e9a1b3f4'
+down_revision = '47955b177ec4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preview', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('word_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('estimated_pages', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_column('estimated_pages')
+        batch_op.drop_column('word_count')
+        batch_op.drop_column('preview')
@@ -0,0 +1,26 @@
+"""Add summary to Book
+
+Revision ID: d4e8f1a2b5c6
+Revises: c7d2e9a1b3f4
+Create Date: 2026-10-17 14:03:27.518940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e8f1a2b5c6'
+down_revision = 'c7d2e9a1b3f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('summary', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_column('summary')
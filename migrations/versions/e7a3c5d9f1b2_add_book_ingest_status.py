@@ -0,0 +1,26 @@
+"""Add ingest_status to Book
+
+Revision ID: e7a3c5d9f1b2
+Revises: d4e8f1a2b5c6
+Create Date: 2026-10-17 16:41:09.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c5d9f1b2'
+down_revision = 'd4e8f1a2b5c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ingest_status', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_column('ingest_status')
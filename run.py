@@ -3,4 +3,9 @@ from app import create_app
 app = create_app()
 
 if __name__ == '__main__':
+    import os
+    from app.tasks import init_scheduler
+    # With the reloader on, only the child that serves requests runs the jobs
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_scheduler(app)
     app.run(debug=True)
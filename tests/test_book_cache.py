@@ -0,0 +1,72 @@
+import os
+import zipfile
+
+from config import Config
+
+from app import create_app, db
+from app.models import Book
+from app.utils import book_cache
+from app.utils.book_cache import BookCache
+
+def write_epub(path, title):
+    with zipfile.ZipFile(path, 'w') as book:
+        book.writestr('META-INF/container.xml',
+                      '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                      '<rootfile full-path="content.opf"/></rootfiles></container>')
+        book.writestr('content.opf',
+                      '<package xmlns="http://www.idpf.org/2007/opf" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+                      f'<metadata><dc:title>{title}</dc:title><dc:creator>Someone</dc:creator></metadata>'
+                      '<manifest><item id="c1" href="c1.xhtml"/><item id="c2" href="c2.xhtml"/></manifest>'
+                      '<spine><itemref idref="c1"/><itemref idref="c2"/></spine></package>')
+
+def test_rescans_only_read_new_or_changed_files(tmp_path, monkeypatch):
+    folder = tmp_path / 'epub'
+    folder.mkdir()
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'app.db')
+        UPLOAD_FOLDER = str(folder)
+        CACHE_FOLDER = str(tmp_path / 'cache')
+        SCHEDULER_ENABLED = False
+
+    scanned = []
+    scan_epub = book_cache.scan_epub
+    def counting_scan(path, known_hash=None):
+        scanned.append(os.path.basename(path))
+        return scan_epub(path, known_hash)
+    monkeypatch.setattr(book_cache, 'scan_epub', counting_scan)
+
+    write_epub(folder / 'a.epub', 'Book A')
+    write_epub(folder / 'b.epub', 'Book B')
+    (folder / 'notes.txt').write_text('not a book')
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        assert BookCache.cache_local_books() == 2
+        assert sorted(scanned) == ['a.epub', 'b.epub']
+        book = Book.query.filter_by(file_path=os.path.join(str(folder), 'a.epub')).one()
+        assert (book.title, book.author, book.total_pages) == ('Book A', 'Someone', 2)
+
+        scanned.clear()
+        assert BookCache.cache_local_books() == 0
+        assert scanned == []
+
+        # Same size but a new mtime: re-hashed, and unchanged content keeps its metadata
+        stat = os.stat(folder / 'b.epub')
+        os.utime(folder / 'b.epub', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        write_epub(folder / 'c.epub', 'Book C')
+        assert BookCache.cache_local_books() == 1
+        assert sorted(scanned) == ['b.epub', 'c.epub']
+        assert Book.query.count() == 3
+
+        # A file whose metadata can't be read stays out of the manifest and is retried
+        (folder / 'd.epub').write_bytes(b'not a zip')
+        scanned.clear()
+        assert BookCache.cache_local_books() == 0
+        assert BookCache.cache_local_books() == 0
+        assert scanned == ['d.epub', 'd.epub']
+        assert str(folder / 'd.epub') not in BookCache._load_library_manifest()
+        write_epub(folder / 'd.epub', 'Book D')
+        assert BookCache.cache_local_books() == 1
+        assert Book.query.filter_by(title='Book D').count() == 1
+        db.session.remove()
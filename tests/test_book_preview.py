@@ -0,0 +1,42 @@
+from app.utils.book_preview import BookPreview, TextTally
+from app.utils.content_store import ContentStore
+from app.utils.pagination import build_page_offsets
+
+def test_preview_from_full_text():
+    text = '\n\n'.join(f'Paragraph {i} ' + 'word ' * 150 for i in range(10))
+    info = BookPreview.from_text(text)
+    assert info['preview'].startswith('Paragraph 0 ')
+    assert info['preview'].count('\n') == 2
+    assert info['word_count'] == 10 * 152
+    assert info['estimated_pages'] == 5
+
+def test_preview_reads_only_the_head(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    monkeypatch.setattr(BookPreview, 'HEAD_BYTES', 100)
+    ContentStore.put('gutenberg', '7', 'One\n\nTwo\n' + 'x' * 100000)
+    stored = ContentStore.open('gutenberg', '7')
+    assert BookPreview.from_head(stored) == 'One\nTwo\n' + 'x' * 91 + '...'
+    stored.close()
+
+def test_no_preview_for_blank_text():
+    assert BookPreview.snippet('  \n\n') is None
+
+def test_tally_of_pieces_matches_full_text():
+    text = ''.join(f'Para{i} has some wo' + 'rds\n\n' + 'é ' * (i % 7) for i in range(400)).encode('utf-8')
+    tally = TextTally(page_size=300)
+    for start in range(0, len(text), 37):
+        tally.feed(text[start:start + 37])
+    assert tally.info() == BookPreview.from_text(text.decode('utf-8'), page_size=300)
+    assert tally.pages.finish() == build_page_offsets(text, 300)
+
+def test_book_preview_is_filled_from_the_store_without_decoding_it_whole(tmp_path, monkeypatch):
+    from app.models import Book
+    from app.utils.book_cache import BookCache
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    text = '\n\n'.join(f'Paragraph {i} ' + 'word ' * 150 for i in range(10))
+    ContentStore.put('gutenberg', '8', text)
+    monkeypatch.setattr(ContentStore, 'get_text', None)  # must not be used
+
+    book = Book(title='Stored', source='gutenberg', source_id='8')
+    assert BookCache._fill_preview(book)
+    assert (book.preview, book.word_count) == (BookPreview.from_text(text)['preview'], 10 * 152)
@@ -0,0 +1,41 @@
+import threading
+
+from app.utils.content_fetcher import BookContentFetcher
+from app.utils.content_store import ContentStore
+from app.utils.pagination import BookPager, PageIndex, book_key, build_page_offsets
+
+def test_first_page_is_served_while_the_book_downloads(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    release = threading.Event()
+    def paragraphs():
+        for i in range(200):
+            if i == 20:
+                # The rest of the book is still on its way
+                assert release.wait(10)
+            yield f"Paragraph {i} of a book that takes a while to arrive."
+    monkeypatch.setattr(BookContentFetcher, '_fetch_remote', staticmethod(lambda book_data: paragraphs()))
+    book = {'source': 'gutenberg', 'source_id': '99'}
+
+    first = BookContentFetcher.first_page(book, page_size=200)
+    assert not ContentStore.has('gutenberg', '99')
+
+    release.set()
+    stored = BookContentFetcher.open_content(book)
+    try:
+        assert stored.read().decode('utf-8').count('Paragraph') == 200
+        offsets = PageIndex.load(book_key('gutenberg', '99'), 200, len(stored))
+        assert offsets == build_page_offsets(stored, 200)
+        assert first == BookPager(stored, 200).get_page(1)
+    finally:
+        stored.close()
+    # Stored now, so readers go through the pager
+    assert BookContentFetcher.first_page(book, page_size=200) is None
+
+def test_preview_of_other_sources_falls_back_to_the_full_text(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    text = [f"Paragraph {i} of an archive book." for i in range(10)]
+    monkeypatch.setattr(BookContentFetcher, '_fetch_remote', staticmethod(lambda book_data: iter(text)))
+
+    preview = BookContentFetcher.fetch_preview({'source': 'archive', 'source_id': 'abc'})
+    assert preview and preview.startswith('Paragraph 0 of an archive book.')
+    assert ContentStore.has('archive', 'abc')
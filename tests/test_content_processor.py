@@ -0,0 +1,42 @@
+import nltk.tokenize
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from app.utils import extractive
+from app.utils.content_processor import ContentProcessor
+from app.utils.extractive import ExtractiveScorer
+from benchmarks.bench_extractive import FALLBACK_STOPWORDS, reference_summary
+
+TEXT = (
+    "The whale rose from the sea. Ahab watched the whale and the sea. "
+    "Ishmael slept. The crew feared the whale. Ishmael slept. "
+    "Nobody spoke of supper that night, and the sea was calm."
+)
+
+def processor(monkeypatch):
+    # Data-free tokenizers, so the test doesn't need the NLTK downloads
+    tokenizer = PunktSentenceTokenizer()
+    sent_tokenize = lambda text, language='english': tokenizer.tokenize(text)
+    monkeypatch.setattr(nltk.tokenize, 'sent_tokenize', sent_tokenize)
+    monkeypatch.setattr(extractive, 'sent_tokenize', sent_tokenize)
+    monkeypatch.setattr(ExtractiveScorer, '_punkt_missing', False)
+    return ContentProcessor(ExtractiveScorer(stop_words=FALLBACK_STOPWORDS))
+
+def test_single_pass_summary_matches_reference(monkeypatch):
+    p = processor(monkeypatch)
+    result = p.generate_summary(TEXT)
+    assert result == reference_summary(p, TEXT)
+    assert result['key_sentences'][0] == 'Ahab watched the whale and the sea.'
+    assert result['key_sentences'].count('Ishmael slept.') == 1
+    assert result['main_topics'][:2] == ['whale', 'sea']
+
+def test_unscored_sentences_fill_in(monkeypatch):
+    p = processor(monkeypatch)
+    # "It is." has only stop words, but is still picked once the others run out
+    assert p.get_important_sentences("The whale rose. It is. The whale.") == [
+        'The whale rose.', 'The whale.', 'It is.'
+    ]
+
+def test_empty_text(monkeypatch):
+    p = processor(monkeypatch)
+    assert p.get_important_sentences('') == []
+    assert p.generate_summary('')['main_topics'] == []
@@ -0,0 +1,25 @@
+from app.utils.content_store import ContentStore
+from app.utils.pagination import BookPager
+
+def test_round_trip_and_range_reads(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    monkeypatch.setattr(ContentStore, 'BLOCK_SIZE', 1000)
+    text = ''.join(f'Line {i} café\n' for i in range(2000))
+    ContentStore.put('gutenberg', '42', text)
+    assert ContentStore.has('gutenberg', '42')
+    assert ContentStore.get_text('gutenberg', '42') == text
+
+    data = text.encode('utf-8')
+    stored = ContentStore.open('gutenberg', '42')
+    assert len(stored) == len(data)
+    assert stored.read(995, 3010) == data[995:3010]
+    assert stored.read(len(data) - 5) == data[-5:]
+
+    pager = BookPager(stored, page_size=500, key='k')
+    assert pager.get_pages(1, pager.page_count) == BookPager(text, page_size=500).get_pages(1, 10 ** 6)
+    stored.close()
+
+def test_missing_text(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    assert ContentStore.open('archive', 'nope') is None
+    assert ContentStore.get_text('archive', 'nope') is None
@@ -0,0 +1,35 @@
+import pytest
+from app.utils.cover_cache import CoverCache
+from app.utils.disk_cache import DiskCache
+
+@pytest.fixture
+def probes(tmp_path, monkeypatch):
+    monkeypatch.setattr(CoverCache, 'store', DiskCache('covers', 1024 * 1024, folder=str(tmp_path)))
+    calls = []
+
+    def fake_probe(url):
+        calls.append(url)
+        return None if 'flaky' in url else 'missing' not in url
+
+    monkeypatch.setattr(CoverCache, '_probe', classmethod(lambda cls, url: fake_probe(url)))
+    return calls
+
+def test_filter_books_keeps_order_and_stops_early(probes):
+    books = [{'cover_url': f'http://covers/{name}'} for name in ['a', 'missing-b', 'c', 'd', 'e']]
+    CoverCache.MAX_WORKERS, workers = 2, CoverCache.MAX_WORKERS
+    try:
+        kept = CoverCache.filter_books(books, limit=2)
+    finally:
+        CoverCache.MAX_WORKERS = workers
+    assert [b['cover_url'] for b in kept] == ['http://covers/a', 'http://covers/c']
+    assert 'http://covers/e' not in probes
+
+def test_known_covers_are_not_reprobed(probes):
+    urls = ['http://covers/a', 'http://covers/missing', 'http://covers/flaky']
+    assert CoverCache.check_many(urls) == {
+        'http://covers/a': True, 'http://covers/missing': False, 'http://covers/flaky': False
+    }
+    probes.clear()
+    CoverCache.check_many(urls)
+    # Only the URL whose check errored is probed again
+    assert probes == ['http://covers/flaky']
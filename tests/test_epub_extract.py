@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+from app.utils.epub_extract import EpubTextExtractor
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+def make_epub(chapters):
+    """An EPUB whose manifest lists ``chapters`` backwards and whose spine lists them in order"""
+    items = ''.join(f'<item id="c{i}" href="text/ch%20{i}.xhtml" media-type="application/xhtml+xml"/>'
+                    for i in reversed(range(len(chapters))))
+    spine = ''.join(f'<itemref idref="c{i}"/>' for i in range(len(chapters)))
+    opf = (f'<package xmlns="http://www.idpf.org/2007/opf" version="3.0">'
+           f'<manifest>{items}</manifest><spine>{spine}</spine></package>')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as book:
+        book.writestr('mimetype', 'application/epub+zip')
+        book.writestr('META-INF/container.xml', CONTAINER)
+        book.writestr('OEBPS/content.opf', opf)
+        for i, body in enumerate(chapters):
+            book.writestr(f'OEBPS/text/ch {i}.xhtml',
+                          f'<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Book</title>'
+                          f'<style>p {{ margin: 0 }}</style></head><body>{body}</body></html>')
+    return buffer.getvalue()
+
+def test_chapters_follow_the_spine_with_offsets():
+    data = make_epub([
+        '<nav><a href="#">Contents</a></nav><h1>Chapter One</h1><p>It was a  bright\n cold day.</p>',
+        '<div></div>',
+        '<h2>Chapter Two</h2><p>The clocks were <em>striking</em> thirteen.</p><script>x()</script>',
+    ])
+    result = EpubTextExtractor.extract(data)
+
+    assert result.text == ('Chapter One\n\nIt was a bright cold day.\n\n'
+                           'Chapter Two\n\nThe clocks were striking thirteen.')
+    assert [(c.href, c.title) for c in result.chapters] == [
+        ('OEBPS/text/ch 0.xhtml', 'Chapter One'), ('OEBPS/text/ch 2.xhtml', 'Chapter Two')]
+    assert result.text[result.chapters[1].offset:].startswith('Chapter Two')
+
+def test_parallel_extraction_matches_inline(monkeypatch):
+    data = make_epub([f'<h1>Part {i}</h1><p>Paragraph {i}.</p>' for i in range(6)])
+    inline = EpubTextExtractor.extract(io.BytesIO(data))
+    monkeypatch.setattr(EpubTextExtractor, 'WORKERS', 2)
+    monkeypatch.setattr(EpubTextExtractor, 'PARALLEL_MIN_CHAPTERS', 2)
+    assert EpubTextExtractor.extract(data) == inline
+    assert len(inline.chapters) == 6
@@ -0,0 +1,74 @@
+import numpy as np
+
+from app.utils.content_processor import ContentProcessor
+from app.utils.content_store import ContentStore
+from app.utils.extractive import DocumentFrequencies, ExtractiveScorer
+from app.utils.summarizer import TextSummarizer
+
+STOP_WORDS = {'the', 'and', 'of', 'that', 'was', 'at', 'from'}
+TEXT = (
+    "The whale rose from the sea. Ahab watched the whale and the sea. "
+    "Ishmael slept. The crew feared the whale. Ishmael slept. "
+    "Nobody spoke of supper that night, and the sea was calm."
+)
+
+def test_scores_and_topics():
+    scorer = ExtractiveScorer(stop_words=STOP_WORDS)
+    analysis = scorer.analyze(TEXT)
+    assert len(analysis.sentences) == 6
+    assert scorer.top_sentences(analysis, 1) == ['Ahab watched the whale and the sea.']
+    assert scorer.top_terms(analysis, 2) == ['whale', 'sea']
+    # Repeated sentences are picked once; text order on request
+    assert scorer.top_sentences(analysis, 6).count('Ishmael slept.') == 1
+    assert scorer.top_sentences(analysis, 2, in_text_order=True) == [
+        'Ahab watched the whale and the sea.', 'Nobody spoke of supper that night, and the sea was calm.'
+    ]
+
+def test_idf_weighting_demotes_common_words():
+    frequencies = DocumentFrequencies(['whale', 'sea', 'slept', 'ishmael'], np.array([100, 100, 100, 1]), documents=100)
+    scorer = ExtractiveScorer(stop_words=STOP_WORDS, document_frequencies=frequencies)
+    assert scorer.top_terms(scorer.analyze(TEXT), 1) == ['ishmael']
+
+def test_both_entry_points_share_the_scorer():
+    scorer = ExtractiveScorer(stop_words=STOP_WORDS)
+    result = ContentProcessor(scorer).generate_summary(TEXT)
+    assert result['key_sentences'][0] == 'Ahab watched the whale and the sea.'
+    assert result['main_topics'][:2] == ['whale', 'sea']
+
+    summarizer = TextSummarizer()
+    summarizer.scorer = scorer
+    assert summarizer.extractive_summarize(TEXT, length='short') == 'Ahab watched the whale and the sea.'
+
+def test_empty_text():
+    scorer = ExtractiveScorer(stop_words=STOP_WORDS)
+    assert scorer.top_sentences(scorer.analyze(''), 5) == []
+    assert ContentProcessor(scorer).generate_summary('')['main_topics'] == []
+
+def test_document_frequencies_update_incrementally(tmp_path):
+    scorer = ExtractiveScorer(stop_words=STOP_WORDS)
+    added, table = DocumentFrequencies.update(['The whale. The sea.', 'The sea again.'],
+                                              scorer, folder=str(tmp_path))
+    assert added == 2 and table.documents == 2
+
+    # Texts already counted are skipped, whenever and however often they are offered
+    added, _ = DocumentFrequencies.update(['The sea again.', 'A whale, a whale!'], scorer, folder=str(tmp_path))
+    stored = DocumentFrequencies.load(str(tmp_path))
+    assert added == 1 and stored.documents == 3
+    assert isinstance(stored.keys, np.memmap) and isinstance(stored.counts, np.memmap)
+    assert dict(zip(stored.terms, stored.counts.tolist())) == {'whale': 2, 'sea': 2, 'again': 1, 'a': 1}
+    assert stored.idf(['whale'])[0] < stored.idf(['again'])[0] < stored.idf(['kraken'])[0]
+
+def test_stored_texts_are_counted_block_by_block(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    monkeypatch.setattr(ContentStore, 'BLOCK_SIZE', 16)
+    scorer = ExtractiveScorer(stop_words=STOP_WORDS)
+    text = 'The whale rose from the sea. Ahab watched the whale. Ishmael slept.'
+    ContentStore.put('gutenberg', '1', text)
+    for stored in ContentStore.each():
+        assert DocumentFrequencies.text_key(stored) == DocumentFrequencies.text_key(text)
+
+    added, table = DocumentFrequencies.update(ContentStore.each(), scorer, folder=str(tmp_path / 'idf'))
+    assert added == 1
+    assert sorted(table.terms) == sorted(set(scorer.words(text)))
+    # The same text offered as a string is already counted
+    assert DocumentFrequencies.update([text], scorer, folder=str(tmp_path / 'idf'))[0] == 0
@@ -0,0 +1,97 @@
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from app.utils.file_handler import BookHandle, BookHandleCache, get_book_content
+
+def make_epub(path, chapters):
+    with zipfile.ZipFile(path, 'w') as book:
+        book.writestr('META-INF/container.xml',
+                      '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                      '<rootfile full-path="OEBPS/content.opf"/></rootfiles></container>')
+        items = ''.join(f'<item id="c{i}" href="c{i}.xhtml"/>' for i in range(len(chapters)))
+        spine = ''.join(f'<itemref idref="c{i}"/>' for i in range(len(chapters)))
+        book.writestr('OEBPS/content.opf', f'<package xmlns="http://www.idpf.org/2007/opf">'
+                                           f'<manifest>{items}</manifest><spine>{spine}</spine></package>')
+        for i, text in enumerate(chapters):
+            book.writestr(f'OEBPS/c{i}.xhtml', f'<html><body><p>{text}</p></body></html>')
+
+def test_epub_pages_reuse_one_handle_until_the_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(BookHandleCache, '_handles', type(BookHandleCache._handles)())
+    path = str(tmp_path / 'book.epub')
+    make_epub(path, ['One', 'Two', 'Three'])
+
+    assert '<p>Two</p>' in get_book_content(path, 1)
+    with BookHandleCache.open(path) as handle:
+        assert handle.page_count == 3
+    assert '<p>Three</p>' in get_book_content(path, 2)
+    with BookHandleCache.open(path) as again:
+        assert again is handle
+    assert get_book_content(path, 3) == ""
+
+    make_epub(path, ['Uno', 'Dos'])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert '<p>Dos</p>' in get_book_content(path, 1)
+    with BookHandleCache.open(path) as reopened:
+        assert reopened is not handle
+    assert handle._file.fp is None
+    BookHandleCache.clear()
+
+def test_least_recently_used_handle_is_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(BookHandleCache, '_handles', type(BookHandleCache._handles)())
+    monkeypatch.setattr(BookHandleCache, 'MAX_BOOKS', 1)
+    pdf_path = str(tmp_path / 'book.pdf')
+    pdf = canvas.Canvas(pdf_path, pagesize=letter)
+    for number in range(2):
+        pdf.drawString(72, 720, f"Page {number + 1} text")
+        pdf.showPage()
+    pdf.save()
+    epub_path = str(tmp_path / 'book.epub')
+    make_epub(epub_path, ['One'])
+
+    assert 'Page 2 text' in get_book_content(pdf_path, 1)
+    with BookHandleCache.open(pdf_path) as pdf_handle:
+        # Evicted while in use: it stays open until this block is done with it
+        assert '<p>One</p>' in get_book_content(epub_path, 0)
+        assert list(BookHandleCache._handles) == [os.path.abspath(epub_path)]
+        assert not pdf_handle._file.closed
+        assert 'Page 1 text' in pdf_handle.page(0)
+    assert pdf_handle._file.closed
+    BookHandleCache.clear()
+
+def test_concurrent_reads_never_lose_their_handle(tmp_path, monkeypatch):
+    monkeypatch.setattr(BookHandleCache, '_handles', type(BookHandleCache._handles)())
+    monkeypatch.setattr(BookHandleCache, 'MAX_BOOKS', 1)
+    paths = []
+    for number in range(3):
+        path = str(tmp_path / f'book{number}.epub')
+        make_epub(path, [f'Book {number} chapter {i}' for i in range(4)])
+        paths.append(path)
+    opened = []
+    handle_init = BookHandle.__init__
+    def slow_init(self, *args):
+        # Widen the window in which threads race to open the same file
+        time.sleep(0.005)
+        handle_init(self, *args)
+        opened.append(self)
+    monkeypatch.setattr(BookHandle, '__init__', slow_init)
+
+    def read(worker):
+        results = []
+        for step in range(30):
+            number, chapter = (worker + step) % 3, step % 4
+            results.append(get_book_content(paths[number], chapter) ==
+                           f'<html><body><p>Book {number} chapter {chapter}</p></body></html>')
+        return results
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [ok for batch in pool.map(read, range(8)) for ok in batch]
+
+    assert all(results)
+    BookHandleCache.clear()
+    assert all(handle.users == 0 and handle._file.fp is None for handle in opened)
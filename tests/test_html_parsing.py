@@ -0,0 +1,23 @@
+from app.utils.html_parsing import parse_html
+
+PAGE = '''<?xml version="1.0" encoding="utf-8"?>
+<html><head><script>var x = "<li class='booklink'>";</script></head><body>
+<nav><ul><li class="menu">Menu</li></ul></nav>
+<ul class="results">
+<li class="booklink"><a href="/ebooks/1"><span class="title">Café</span></a></li>
+<li class="booklink extra"><a href="/ebooks/2"><span class="title">Two</span></a></li>
+</ul>
+<table class="files"><tr><td><a href="/ebooks/1.epub">EPUB</a></td></tr></table>
+</body></html>'''
+
+def test_only_matching_subtrees_are_kept():
+    soup = parse_html(PAGE, 'booklink')
+    assert [a['href'] for a in soup.select('.booklink a')] == ['/ebooks/1', '/ebooks/2']
+    assert soup.select_one('.title').get_text() == 'Café'
+    assert not soup.select('.menu') and not soup.select('table')
+
+def test_xpath_and_full_parse():
+    soup = parse_html(PAGE, "//table[contains(concat(' ', @class, ' '), ' files ')]")
+    assert [a.get_text() for a in soup.select('table.files a')] == ['EPUB']
+    assert len(parse_html(PAGE).select('.booklink')) == 2
+    assert parse_html('', 'booklink').select('.booklink') == []
@@ -0,0 +1,34 @@
+from app.utils.html_stream import iter_html_paragraphs, iter_text_lines, iter_xml_paragraphs
+
+def chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+def test_html_paragraphs_from_small_chunks():
+    html = (
+        '<html><head><title>Book</title><style>p { margin: 0 }</style></head><body>'
+        '<header>Project Gutenberg</header><nav><a href="/">Home</a></nav>'
+        '<h1>Chapter I</h1><p>It was a <i>dark</i> and\n stormy night, café.</p>'
+        '<p>One<br>Two</p><!-- note --><pre>  line a\n  line b</pre></body></html>'
+    ).encode('utf-8')
+    expected = ['Chapter I', 'It was a dark and stormy night, café.', 'One', 'Two', 'line a', 'line b']
+    for size in (1, 7, 4096):
+        assert list(iter_html_paragraphs(chunked(html, size), encoding='utf-8')) == expected
+
+def test_paragraphs_are_yielded_before_the_document_ends():
+    def chunks():
+        yield b'<html><body><p>First</p>'
+        raise AssertionError('read past the first paragraph')
+    assert next(iter_html_paragraphs(chunks())) == 'First'
+
+def test_djvu_xml_paragraphs():
+    xml = (
+        b'<?xml version="1.0"?><DjVuXML><BODY><OBJECT><HIDDENTEXT><PAGECOLUMN><REGION>'
+        b'<PARAGRAPH><LINE><WORD coords="1">Hello</WORD><WORD>world</WORD></LINE>'
+        b'<LINE><WORD>again</WORD></LINE></PARAGRAPH>'
+        b'<PARAGRAPH><LINE><WORD>Second</WORD></LINE></PARAGRAPH>'
+        b'</REGION></PAGECOLUMN></HIDDENTEXT></OBJECT></BODY></DjVuXML>'
+    )
+    assert list(iter_xml_paragraphs(chunked(xml, 5))) == ['Hello world again', 'Second']
+
+def test_text_lines_split_across_chunks():
+    assert list(iter_text_lines([b'ab\r\ncaf\xc3', b'\xa9\nlast'])) == ['ab', 'café', 'last']
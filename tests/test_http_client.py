@@ -0,0 +1,61 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from app.utils.http_client import HttpClient
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 503 for the first ``failures`` requests, then 200"""
+    failures = 0
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        status = 503 if type(self).hits <= type(self).failures else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(HttpClient, 'BACKOFF_BASE', 0.01)
+    FlakyHandler.hits = 0
+    httpd = HTTPServer(('127.0.0.1', 0), FlakyHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+def test_retries_server_errors(server):
+    FlakyHandler.failures = 2
+    response = HttpClient.get(f"{server}/page")
+    assert response.status_code == 200
+    assert FlakyHandler.hits == 3
+
+def test_gives_up_after_max_retries(server):
+    FlakyHandler.failures = 100
+    response = HttpClient.get(f"{server}/page")
+    assert response.status_code == 503
+    assert FlakyHandler.hits == HttpClient.MAX_RETRIES + 1
+
+def test_reuses_one_session_per_host(server):
+    assert HttpClient.session_for(f"{server}/a") is HttpClient.session_for(f"{server}/b")
+
+def test_replayed_transport():
+    from app.utils.content_fetcher import GutenbergContentFetcher
+    from benchmarks.replay import FixtureTransport
+
+    transport = FixtureTransport()
+    HttpClient.use_transport(transport)
+    try:
+        assert HttpClient.head('https://www.gutenberg.org/cache/epub/1/pg1.cover.medium.jpg').status_code == 200
+        assert HttpClient.get('https://example.invalid/missing', stream=True).status_code == 404
+        paragraphs = list(GutenbergContentFetcher.iter_paragraphs('132'))
+        assert len(paragraphs) > 100
+        assert transport.misses == ['GET https://example.invalid/missing']
+    finally:
+        HttpClient.use_transport(None)
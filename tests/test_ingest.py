@@ -0,0 +1,144 @@
+import hashlib
+import io
+import os
+import time
+import zipfile
+
+from PIL import Image
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from config import Config
+
+from app import create_app, db
+from app.models import Book
+from app.utils import pdf_extract
+from app.utils.content_store import ContentStore
+from app.utils.disk_cache import DiskCache
+from app.utils.ingest import UPLOAD_SOURCE, IngestQueue, ingest_file, save_upload, thumbnail_path
+from app.utils.pagination import PageIndex, book_key
+from app.utils.pdf_extract import PdfTextExtractor
+
+def make_epub(path, paragraphs):
+    cover = io.BytesIO()
+    Image.new('RGB', (600, 900), 'navy').save(cover, 'PNG')
+    body = ''.join(f'<p>{text}</p>' for text in paragraphs)
+    with zipfile.ZipFile(path, 'w') as book:
+        book.writestr('META-INF/container.xml',
+                      '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                      '<rootfile full-path="content.opf"/></rootfiles></container>')
+        book.writestr('content.opf',
+                      '<package xmlns="http://www.idpf.org/2007/opf" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+                      '<metadata><dc:title>Test Book</dc:title><dc:creator>A. Writer</dc:creator>'
+                      '<meta name="cover" content="img"/></metadata>'
+                      '<manifest><item id="c1" href="c1.xhtml"/><item id="img" href="cover.png"/></manifest>'
+                      '<spine><itemref idref="c1"/></spine></package>')
+        book.writestr('c1.xhtml', f'<html xmlns="http://www.w3.org/1999/xhtml"><body>{body}</body></html>')
+        book.writestr('cover.png', cover.getvalue())
+
+def test_save_upload_streams_and_hashes(tmp_path):
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    path, content_hash = save_upload(io.BytesIO(data), str(tmp_path), 'book.pdf')
+    assert content_hash == hashlib.sha256(data).hexdigest()
+    assert os.path.basename(path) == f"{content_hash[:16]}_book.pdf"
+    with open(path, 'rb') as f:
+        assert f.read() == data
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+def test_ingest_stores_text_index_and_cover(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path / 'cache'))
+    path = str(tmp_path / 'book.epub')
+    make_epub(path, [f'Paragraph {i} of the test book.' for i in range(200)])
+    steps = []
+
+    info = ingest_file(path, 'abc123', page_size=500, progress=steps.append)
+
+    assert steps == ['metadata', 'text', 'index', 'cover']
+    assert (info['title'], info['author']) == ('Test Book', 'A. Writer')
+    assert ContentStore.get_text(UPLOAD_SOURCE, 'abc123').startswith('Paragraph 0 of the test book.')
+    offsets = PageIndex.load(book_key(UPLOAD_SOURCE, 'abc123'), 500, len(ContentStore.open(UPLOAD_SOURCE, 'abc123')))
+    assert info['total_pages'] == len(offsets) - 1 > 1
+    assert info['word_count'] == 200 * 6
+    assert info['has_cover']
+    with Image.open(thumbnail_path('abc123')) as thumbnail:
+        assert thumbnail.size == (300, 450)
+
+    # A second ingest of the same file finds its text already stored
+    os.remove(path)
+    make_epub(path, ['Different text.'])
+    assert ingest_file(path, 'abc123', page_size=500)['word_count'] == 200 * 6
+
+def test_lost_job_is_resumed(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path / 'cache'))
+    monkeypatch.setattr(IngestQueue, 'store', DiskCache('ingest_jobs', 1024 * 1024, str(tmp_path / 'jobs')))
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'app.db')
+        UPLOAD_FOLDER = str(tmp_path / 'epub')
+        CACHE_FOLDER = str(tmp_path / 'cache')
+
+    path = str(tmp_path / 'book.epub')
+    make_epub(path, [f'Paragraph {i} of the test book.' for i in range(50)])
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        book = Book(title='book', author='Unknown', file_path=path, file_type='EPUB',
+                    source=UPLOAD_SOURCE, source_id='lost123', total_pages=0, ingest_status='processing')
+        db.session.add(book)
+        db.session.commit()
+        # Taken by a process that died: the job was saved, then nothing touched it
+        IngestQueue._save({'book_id': book.id, 'path': path, 'hash': 'lost123', 'page_size': 500,
+                           'cover_url': None, 'fill': ['title'], 'submitted_at': time.time()}, 'processing')
+        assert not IngestQueue.resume(app, book)
+
+        monkeypatch.setattr(IngestQueue, 'STALE_SECONDS', 0)
+        assert IngestQueue.resume(app, book)
+        deadline = time.time() + 10
+        while IngestQueue.status(book.id)['status'] != 'ready' and time.time() < deadline:
+            time.sleep(0.05)
+        db.session.expire_all()
+        book = Book.query.get(book.id)
+        assert (book.ingest_status, book.title) == ('ready', 'Test Book')
+        assert not IngestQueue.resume(app, book)
+        db.session.remove()
+
+def test_pdf_text_is_extracted_in_place_by_the_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path / 'cache'))
+    monkeypatch.setattr(PdfTextExtractor, 'cache', DiskCache('pdf_text', 1024 * 1024, str(tmp_path / 'pdf')))
+    path = str(tmp_path / 'book.pdf')
+    pdf = canvas.Canvas(path, pagesize=letter)
+    for number in range(3):
+        pdf.drawString(72, 720, f"Page {number + 1} of the upload.")
+        pdf.showPage()
+    pdf.save()
+    with open(path, 'rb') as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+    monkeypatch.setattr(pdf_extract.tempfile, 'mkstemp', None)  # no copy of the upload is made
+
+    info = ingest_file(path, content_hash, page_size=500)
+
+    assert ContentStore.get_text(UPLOAD_SOURCE, content_hash).startswith('Page 1 of the upload.')
+    assert PdfTextExtractor.cache.get(content_hash) is not None
+    assert info['total_pages'] == 1
+
+def test_uploaded_text_is_escaped_in_the_reader(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path / 'cache'))
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'app.db')
+        CACHE_FOLDER = str(tmp_path / 'cache')
+        SCHEDULER_ENABLED = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        session = Book.query.session
+        session.add(Book(title='Upload', source=UPLOAD_SOURCE, source_id='evil', ingest_status='ready'))
+        session.commit()
+        ContentStore.put(UPLOAD_SOURCE, 'evil', 'Chapter one.\n\n<script>alert(1)</script>\n\n<b>bold</b>')
+
+        for view in ('paginated', 'full'):
+            page = app.test_client().get(f'/read/{UPLOAD_SOURCE}/evil?view={view}').get_data(as_text=True)
+            assert '&lt;script&gt;alert(1)&lt;/script&gt;' in page
+            assert '<script>alert(1)' not in page and '<b>bold</b>' not in page
+        db.session.remove()
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+
+import pytest
+
+from app.utils.content_store import ContentStore
+from app.utils.pagination import BookPager, PagerCache, build_page_offsets
+
+def split_pages(content, page_size=2000):
+    """Reference implementation of the original paragraph-grouping pagination"""
+    paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
+    pages, current, length = [], [], 0
+    for paragraph in paragraphs:
+        if length + len(paragraph) > page_size and current:
+            pages.append('\n'.join(current))
+            current, length = [], 0
+        current.append(paragraph)
+        length += len(paragraph)
+    if current:
+        pages.append('\n'.join(current))
+    return pages
+
+def test_pages_match_paragraph_grouping():
+    paragraphs = [('word ' * n).strip() for n in (10, 300, 50, 0, 450, 5, 1000, 20)]
+    text = '\n\n  '.join(paragraphs) + '\n'
+    pager = BookPager(text)
+    assert pager.get_pages(1, pager.page_count) == split_pages(text)
+
+def test_random_page_access():
+    text = '\n'.join(f'Paragraph {i} ' + 'x' * 900 for i in range(10))
+    pager = BookPager(text)
+    assert pager.page_count == 5
+    assert pager.get_page(3).startswith('Paragraph 4 ')
+    assert pager.get_pages(5, 10) == [pager.get_page(5)]
+
+def test_blank_text_has_no_pages():
+    assert len(build_page_offsets(b' \n\n \n')) == 1
+    assert BookPager('').page_count == 0
+
+def test_page_index_is_persisted_per_page_size(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    text = '\n'.join(f'Chapitre {i} ' + 'é' * 700 for i in range(12))
+    pager = BookPager(text, key='book')
+    assert (tmp_path / 'books' / 'book.2000.idx').exists()
+    assert pager.get_page(2).startswith('Chapitre 2 ')
+
+    # A second pager reuses the stored offsets rather than re-splitting
+    monkeypatch.setattr('app.utils.pagination.build_page_offsets', None)
+    assert list(BookPager(text, key='book').offsets) == list(pager.offsets)
+
+def test_stale_page_index_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    BookPager('short text', key='book')
+    longer = '\n'.join('line ' * 100 for _ in range(20))
+    assert BookPager(longer, key='book').get_pages(1, 100) == split_pages(longer)
+
+def test_evicted_pagers_are_closed_once_released(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    monkeypatch.setattr(PagerCache, 'MAX_BOOKS', 1)
+    monkeypatch.setattr(PagerCache, '_pagers', OrderedDict())
+    text = 'A line of some book.\n' * 500
+    ContentStore.put('gutenberg', '1', text)
+    ContentStore.put('gutenberg', '2', text)
+    load = lambda book_id: (lambda: ContentStore.open('gutenberg', book_id))
+
+    with PagerCache.open('gutenberg', '1', load('1'), page_size=500) as first:
+        with PagerCache.open('gutenberg', '2', load('2'), page_size=500) as second:
+            assert second.get_page(1)
+        # Evicted, but still held here: its text stays mapped
+        assert first.retired and first.get_page(2)
+    with pytest.raises(ValueError):
+        first.get_page(2)
+
+    # Still cached, so still open
+    with PagerCache.open('gutenberg', '2', load('2'), page_size=500) as again:
+        assert again is second and again.get_page(2)
@@ -0,0 +1,91 @@
+import io
+import signal
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from PyPDF2 import PdfReader
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from app.utils.disk_cache import DiskCache
+from app.utils.pdf_extract import PdfTextExtractor, _page_text
+
+def make_pdf(pages):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for number in range(pages):
+        pdf.drawString(72, 720, f"Page {number + 1} of the test document.")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+def use_tmp_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(PdfTextExtractor, 'cache', DiskCache('pdf_text', 1024 * 1024, folder=str(tmp_path)))
+
+def serial_text(data):
+    text = ""
+    for page in PdfReader(io.BytesIO(data)).pages:
+        text += page.extract_text() + "\n"
+    return text
+
+def test_parallel_extraction_matches_serial(monkeypatch, tmp_path):
+    use_tmp_cache(monkeypatch, tmp_path)
+    monkeypatch.setattr(PdfTextExtractor, 'WORKERS', 2)
+    monkeypatch.setattr(PdfTextExtractor, 'SHARD_PAGES', 3)
+    data = make_pdf(10)
+
+    text = PdfTextExtractor.extract(io.BytesIO(data))
+    assert text == serial_text(data)
+    assert 'Page 10 of the test document.' in text
+    assert PdfTextExtractor.stats()['misses'] >= 1
+
+def test_extracted_text_is_cached_by_file_hash(monkeypatch, tmp_path):
+    use_tmp_cache(monkeypatch, tmp_path)
+    data = make_pdf(2)
+    assert PdfTextExtractor.extract(data) == serial_text(data)
+    monkeypatch.setattr(PdfTextExtractor, '_extract', None)  # must not run again
+    assert PdfTextExtractor.extract(data) == serial_text(data)
+
+def test_slow_page_times_out():
+    class SlowPage:
+        def extract_text(self):
+            time.sleep(5)
+            return 'never'
+
+    class Reader:
+        pages = [SlowPage()]
+
+    started = time.monotonic()
+    assert _page_text(Reader(), 0, 0.1) == ''
+    assert time.monotonic() - started < 2
+
+def test_hung_worker_is_abandoned_and_replaced(monkeypatch, tmp_path):
+    use_tmp_cache(monkeypatch, tmp_path)
+    executor = PdfTextExtractor._get_executor()
+    hung = executor.submit(time.sleep, 60)
+    with pytest.raises(FutureTimeout):
+        PdfTextExtractor._result(hung, 0.5)
+    PdfTextExtractor._discard_executor(executor)
+    assert PdfTextExtractor._executor is not executor
+
+    # A fresh pool serves the next extraction, even one started off the main thread
+    data = make_pdf(3)
+    results = []
+    caller = threading.Thread(target=lambda: results.append(PdfTextExtractor.extract(data)))
+    caller.start()
+    caller.join(30)
+    assert results == [serial_text(data)]
+
+def test_unreadable_pdf_raises_value_error(monkeypatch, tmp_path):
+    use_tmp_cache(monkeypatch, tmp_path)
+    with pytest.raises(ValueError, match='could not be opened'):
+        PdfTextExtractor.extract(b'%PDF-1.4 this is not really a PDF')
+
+def test_pages_are_read_without_sigalrm(monkeypatch):
+    # As on Windows, where the signal doesn't exist
+    monkeypatch.delattr(signal, 'SIGALRM')
+    reader = PdfReader(io.BytesIO(make_pdf(1)))
+    assert _page_text(reader, 0, 5) == reader.pages[0].extract_text()
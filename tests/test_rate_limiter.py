@@ -0,0 +1,35 @@
+import time
+
+import pytest
+from app.utils.rate_limiter import RateLimiter
+
+@pytest.fixture(autouse=True)
+def fresh_limiter(monkeypatch):
+    monkeypatch.setattr(RateLimiter, 'HOST_LIMITS', {'example.org': (10.0, 2)})
+    RateLimiter.reset()
+    yield
+    RateLimiter.reset()
+
+def test_idle_host_is_not_throttled():
+    assert RateLimiter.acquire('example.org') == 0
+    assert RateLimiter.acquire('example.org') == 0
+
+def test_exhausted_bucket_waits_for_refill():
+    RateLimiter.acquire('example.org')
+    RateLimiter.acquire('example.org')
+    started = time.monotonic()
+    waited = RateLimiter.acquire('example.org')
+    assert 0.05 < waited <= 0.1
+    assert time.monotonic() - started >= waited * 0.9
+    stats = RateLimiter.metrics('example.org')
+    assert stats['requests'] == 3
+    assert stats['throttled'] == 1
+
+def test_shared_buckets_across_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(RateLimiter, 'DB_PATH', str(tmp_path / 'limits.sqlite'))
+    RateLimiter.acquire('example.org')
+    RateLimiter.acquire('example.org')
+    # A fresh process would see the same bucket, so clearing local state
+    # must not refill it
+    RateLimiter.reset()
+    assert RateLimiter.acquire('example.org') > 0
@@ -0,0 +1,80 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+from app.utils.disk_cache import DiskCache
+from app.utils.http_client import HttpClient
+from app.utils.response_cache import ResponseCache
+
+class ListingHandler(BaseHTTPRequestHandler):
+    """Serves a fixed page with an ETag and honours If-None-Match"""
+    hits = []
+
+    def do_GET(self):
+        type(self).hits.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b'<li class="booklink">Moby Dick</li>'
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResponseCache, 'store', DiskCache('responses', 1024 * 1024, folder=str(tmp_path)))
+    monkeypatch.setattr(ResponseCache, 'RULES', [(r'/listing', 60, 60)])
+    monkeypatch.setattr(ResponseCache, '_compiled', None)
+    return ResponseCache
+
+@pytest.fixture
+def server():
+    ListingHandler.hits = []
+    httpd = HTTPServer(('127.0.0.1', 0), ListingHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+def test_fresh_entry_is_served_without_network(cache, server):
+    url = f"{server}/listing"
+    assert 'Moby Dick' in HttpClient.get(url).text
+    assert 'Moby Dick' in HttpClient.get(url).text
+    assert len(ListingHandler.hits) == 1
+
+def test_expired_entry_is_revalidated_with_etag(cache, server):
+    url = f"{server}/listing"
+    cache.seed(url, b'<li class="booklink">Moby Dick</li>', headers={'ETag': '"v1"'},
+               stored_at=time.time() - 3600)
+    response = HttpClient.get(url)
+    assert response.status_code == 200
+    assert 'Moby Dick' in response.text
+    assert ListingHandler.hits == ['"v1"']
+    # The 304 refreshed the entry, so the next read is a plain hit
+    HttpClient.get(url)
+    assert len(ListingHandler.hits) == 1
+
+def test_offline_mode_serves_seeded_pages(cache, monkeypatch):
+    monkeypatch.setattr(ResponseCache, 'OFFLINE', True)
+    url = 'http://offline.invalid/listing'
+    cache.seed(url, b'seeded', stored_at=0)
+    assert HttpClient.get(url).text == 'seeded'
+    with pytest.raises(requests.ConnectionError):
+        HttpClient.get('http://offline.invalid/listing?page=2')
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path):
+    store = DiskCache('lru', max_bytes=100, folder=str(tmp_path))
+    store.set('a', b'x' * 40)
+    store.set('b', b'x' * 40)
+    store.get('a')
+    store.set('c', b'x' * 40)
+    assert store.get('a') is not None
+    assert store.get('b') is None
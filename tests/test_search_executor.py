@@ -0,0 +1,64 @@
+import threading
+import time
+from app.utils.search_executor import ParallelSearchExecutor
+
+def test_sources_run_concurrently():
+    def slow_source():
+        time.sleep(0.3)
+        return [{'title': 'Slow'}]
+
+    started = time.monotonic()
+    results, timed_out = ParallelSearchExecutor.run(
+        {'a': slow_source, 'b': slow_source, 'c': slow_source},
+        timeout=2
+    )
+    assert time.monotonic() - started < 0.8
+    assert timed_out == []
+    assert all(results[name] == [{'title': 'Slow'}] for name in 'abc')
+
+def test_timed_out_source_returns_partial_results():
+    def fast_source():
+        return [{'title': 'Fast'}]
+
+    def hung_source():
+        time.sleep(1)
+        return [{'title': 'Late'}]
+
+    results, timed_out = ParallelSearchExecutor.run(
+        {'fast': fast_source, 'hung': hung_source},
+        timeout=2,
+        timeouts={'hung': 0.1}
+    )
+    assert results['fast'] == [{'title': 'Fast'}]
+    assert results['hung'] == []
+    assert timed_out == ['hung']
+
+def test_failing_source_does_not_break_search():
+    def broken_source():
+        raise RuntimeError('boom')
+
+    results, timed_out = ParallelSearchExecutor.run({'broken': broken_source}, timeout=1)
+    assert results == {'broken': []}
+    assert timed_out == []
+
+def test_hung_source_is_capped(monkeypatch):
+    monkeypatch.setattr(ParallelSearchExecutor, 'MAX_PER_SOURCE', 2)
+    release = threading.Event()
+
+    def stuck_source():
+        release.wait(5)
+        return [{'title': 'Stuck'}]
+
+    def fast_source():
+        return [{'title': 'Fast'}]
+
+    try:
+        for _ in range(2):
+            ParallelSearchExecutor.run({'stuck': stuck_source}, timeout=0.05)
+        # Both earlier searches still hold a thread, so the third isn't started
+        results, timed_out = ParallelSearchExecutor.run(
+            {'stuck': stuck_source, 'quick': fast_source}, timeout=1)
+        assert timed_out == ['stuck']
+        assert results == {'stuck': [], 'quick': [{'title': 'Fast'}]}
+    finally:
+        release.set()
@@ -0,0 +1,124 @@
+import sys
+import threading
+import time
+import types
+
+from app.utils.disk_cache import DiskCache
+from app.utils.summarizer import SummarizerRegistry, TextSummarizer
+
+def fake_transformers(monkeypatch, calls):
+    def pipeline(task, model):
+        calls.append(model)
+        time.sleep(0.05)
+        return lambda text, **kwargs: [{'summary_text': f"summary of {len(text)} chars"}]
+    monkeypatch.setitem(sys.modules, 'transformers', types.SimpleNamespace(pipeline=pipeline))
+    monkeypatch.setattr(SummarizerRegistry, '_nltk_ready', True)
+    monkeypatch.setattr(SummarizerRegistry, '_summarizer', None)
+    monkeypatch.setattr(SummarizerRegistry, '_pipeline', None)
+    monkeypatch.setattr(SummarizerRegistry, '_failed_at', None)
+
+def test_model_loads_once_across_threads(monkeypatch):
+    calls = []
+    fake_transformers(monkeypatch, calls)
+    summarizers, results = [], []
+
+    def worker():
+        summarizer = SummarizerRegistry.get()
+        summarizers.append(summarizer)
+        results.append(summarizer.summarize('A sentence. ' * 200, method='abstractive'))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({id(s) for s in summarizers}) == 1
+    assert all(r.startswith('summary of ') for r in results)
+
+def test_idle_model_is_unloaded_and_reloaded(monkeypatch):
+    calls = []
+    fake_transformers(monkeypatch, calls)
+    monkeypatch.setattr(SummarizerRegistry, 'IDLE_SECONDS', 0.05)
+    monkeypatch.setattr(SummarizerRegistry, '_reaper', None)
+
+    assert SummarizerRegistry.available()
+    deadline = time.time() + 2
+    while SummarizerRegistry.stats()['loaded'] and time.time() < deadline:
+        time.sleep(0.02)
+    assert not SummarizerRegistry.stats()['loaded']
+
+    assert SummarizerRegistry.run('text', max_length=10)[0]['summary_text'] == 'summary of 4 chars'
+    assert len(calls) == 2
+    SummarizerRegistry.unload()
+
+def book_text(sentences=400):
+    return ' '.join(f"Sentence {i} tells part {i % 7} of the long story." for i in range(sentences))
+
+def fake_batch_model(monkeypatch, tmp_path, calls):
+    def pipeline(task, model):
+        def summarize(texts, **kwargs):
+            calls.append((list(texts), kwargs['max_length']))
+            return [{'summary_text': f"Gist {len(t.split())} words {kwargs['max_length']}."} for t in texts]
+        return summarize
+    fake_transformers(monkeypatch, [])
+    monkeypatch.setitem(sys.modules, 'transformers', types.SimpleNamespace(pipeline=pipeline))
+    monkeypatch.setattr(TextSummarizer, 'chunk_cache', DiskCache('chunks', 1024 * 1024, folder=str(tmp_path)))
+
+def test_chunks_are_sentence_aligned_and_bounded():
+    summarizer = TextSummarizer()
+    text = book_text()
+    chunks = summarizer.chunk_text(text, max_tokens=120)
+    assert len(chunks) > 1
+    assert ' '.join(chunks) == text
+    for chunk in chunks:
+        assert chunk.endswith('story.')
+        assert summarizer.estimate_tokens(chunk) <= 120 + len(chunk.split('. '))
+
+def test_hierarchical_summary_reuses_cached_chunks(monkeypatch, tmp_path):
+    calls = []
+    fake_batch_model(monkeypatch, tmp_path, calls)
+    summarizer = TextSummarizer()
+    text = book_text()
+
+    first = summarizer.hierarchical_summarize(text, length='medium')
+    assert first.startswith('Gist')
+    chunk_calls = [texts for texts, max_length in calls if len(texts) > 1]
+    assert chunk_calls and all(len(t) > 1 for t in chunk_calls)
+
+    # Only the final pass depends on the requested length
+    calls.clear()
+    summarizer.hierarchical_summarize(text, length='long')
+    assert len(calls) == 1 and calls[0][1] == TextSummarizer.MAX_LENGTH['long']
+    SummarizerRegistry.unload()
+
+def test_hierarchical_summary_respects_chunk_cap(monkeypatch, tmp_path):
+    calls = []
+    fake_batch_model(monkeypatch, tmp_path, calls)
+    TextSummarizer().hierarchical_summarize(book_text(2000), max_chunks=5)
+    assert sum(len(texts) for texts, _ in calls) <= 5 + 1
+    SummarizerRegistry.unload()
+
+def test_final_pass_gets_at_most_one_chunk(monkeypatch, tmp_path):
+    calls = []
+    def pipeline(task, model):
+        def summarize(texts, **kwargs):
+            calls.append((list(texts), kwargs['max_length']))
+            # As long as the model is allowed to write, like a real one on dense text
+            return [{'summary_text': ' '.join(['word'] * int(kwargs['max_length'] / 1.3)) + '.'}
+                    for t in texts]
+        return summarize
+    fake_batch_model(monkeypatch, tmp_path, [])
+    monkeypatch.setitem(sys.modules, 'transformers', types.SimpleNamespace(pipeline=pipeline))
+    summarizer = TextSummarizer()
+
+    summarizer.hierarchical_summarize(book_text(20000), length='medium')
+
+    computed = sum(len(texts) for texts, _ in calls[:-1])
+    final_texts, final_length = calls[-1]
+    assert final_length == TextSummarizer.MAX_LENGTH['medium']
+    assert len(final_texts) == 1
+    assert summarizer.estimate_tokens(final_texts[0]) <= TextSummarizer.CHUNK_TOKENS
+    assert computed <= TextSummarizer.MAX_CHUNKS
+    SummarizerRegistry.unload()
@@ -0,0 +1,112 @@
+import sys
+import threading
+import time
+import types
+
+from app.utils.disk_cache import DiskCache
+from app.utils.summarizer import SummarizerRegistry
+from app.utils.summary_cache import SummaryCache
+from app.utils.summary_queue import JobTexts, SummaryQueue
+
+def setup_queue(monkeypatch, tmp_path, calls):
+    def pipeline(task, model):
+        def summarize(texts, **kwargs):
+            calls.append(texts)
+            return [{'summary_text': f"abstract {len(t)}"} for t in texts]
+        return summarize
+    monkeypatch.setitem(sys.modules, 'transformers', types.SimpleNamespace(pipeline=pipeline))
+    monkeypatch.setattr(SummarizerRegistry, '_nltk_ready', True)
+    monkeypatch.setattr(SummarizerRegistry, '_pipeline', None)
+    monkeypatch.setattr(SummarizerRegistry, '_failed_at', None)
+    monkeypatch.setenv('CACHE_FOLDER', str(tmp_path))
+    monkeypatch.setattr(SummaryQueue, 'store', DiskCache('summary_jobs', 1024 * 1024, folder=str(tmp_path)))
+    monkeypatch.setattr(SummaryQueue, 'live', DiskCache('summary_jobs_live', 1024 * 1024, folder=str(tmp_path)))
+    monkeypatch.setattr(SummaryCache, 'store', DiskCache('summaries', 1024 * 1024, folder=str(tmp_path)))
+    monkeypatch.setattr(SummaryQueue, 'WORKERS', 0)
+    monkeypatch.setattr(SummaryQueue, 'BATCH_WAIT', 0.2)
+
+def test_abstractive_jobs_are_batched(monkeypatch, tmp_path):
+    calls = []
+    setup_queue(monkeypatch, tmp_path, calls)
+    done = []
+    texts = [f"Sentence number {i} is here. " * (i + 1) for i in range(5)]
+    ids = [SummaryQueue.submit(t, method='abstractive', length='short', on_done=done.append) for t in texts]
+
+    statuses = [SummaryQueue.wait(job_id, timeout=10) for job_id in ids]
+    assert [s['status'] for s in statuses] == ['done'] * 5
+    assert len(calls) == 1 and len(calls[0]) == 5
+    assert sorted(done) == sorted(s['summary'] for s in statuses)
+    SummarizerRegistry.unload()
+
+def test_extractive_job_status(monkeypatch, tmp_path):
+    setup_queue(monkeypatch, tmp_path, [])
+    text = "Cats purr. Dogs bark loudly at cats. Birds sing. Cats and dogs play. Fish swim."
+    job_id = SummaryQueue.submit(text, method='extractive', length='short')
+
+    status = SummaryQueue.wait(job_id, timeout=10)
+    assert status['status'] == 'done'
+    assert status['summary'] == SummarizerRegistry.get().summarize(text, method='extractive', length='short')
+    assert SummaryQueue.status('missing') is None
+
+def test_cached_summary_finishes_without_queueing(monkeypatch, tmp_path):
+    setup_queue(monkeypatch, tmp_path, [])
+    text = "Cats purr. Dogs bark loudly at cats. Birds sing. Cats and dogs play. Fish swim."
+    first = SummaryQueue.wait(SummaryQueue.submit(text, length='short'), timeout=10)
+
+    done = []
+    called = threading.Event()
+    def on_done(summary):
+        done.append((summary, threading.current_thread()))
+        called.set()
+    monkeypatch.setattr(SummaryQueue, '_queue', None)  # nothing may be queued now
+    job_id = SummaryQueue.submit(text, length='short', on_done=on_done)
+    assert SummaryQueue.status(job_id)['summary'] == first['summary']
+    assert called.wait(10)
+    assert done[0][0] == first['summary']
+    # The callback never runs on the submitting (request) thread
+    assert done[0][1] is not threading.current_thread()
+
+def test_batch_fallback_is_cached_as_extractive(monkeypatch, tmp_path):
+    setup_queue(monkeypatch, tmp_path, [])
+    registry = SummarizerRegistry.get()
+    def failing(texts, **kwargs):
+        raise RuntimeError('out of memory')
+    monkeypatch.setattr(type(registry), 'abstractive_summarizer', property(lambda self: failing))
+    text = "Cats purr. Dogs bark loudly at cats. Birds sing. Cats and dogs play. Fish swim."
+
+    status = SummaryQueue.wait(SummaryQueue.submit(text, method='abstractive', length='short'), timeout=10)
+    assert (status['status'], status['summarized_with']) == ('done', 'extractive')
+    content_hash = SummaryCache.content_hash(text)
+    assert SummaryCache.get(content_hash, 'abstractive', 'short', registry.version('abstractive')) is None
+    assert SummaryCache.get(content_hash, 'extractive', 'short',
+                            registry.version('extractive')) == status['summary']
+    SummarizerRegistry.unload()
+
+def test_job_lost_to_a_restart_is_resumed(monkeypatch, tmp_path):
+    setup_queue(monkeypatch, tmp_path, [])
+    text = "Cats purr. Dogs bark loudly at cats. Birds sing. Cats and dogs play. Fish swim."
+    # Left 'running' by a process that is gone; its record holds only the text's hash
+    lost = {'id': 'lost-job', 'text': text, 'hash': SummaryCache.content_hash(text), 'method': 'extractive',
+            'length': 'short', 'submitted_at': time.time()}
+    SummaryQueue._store_text(lost)
+    SummaryQueue._save(lost, 'running')
+    assert SummaryQueue.live.get('lost-job').value == b''
+    assert SummaryQueue.status('lost-job')['status'] == 'running'
+
+    monkeypatch.setattr(SummaryQueue, 'STALE_SECONDS', 0)
+    status = SummaryQueue.wait('lost-job', timeout=10)
+    assert status['status'] == 'done'
+    assert status['summary'] == SummarizerRegistry.get().summarize(text, method='extractive', length='short')
+    # Finished: the record moved to the bounded store and the text is gone
+    assert SummaryQueue.live.get('lost-job') is None
+    assert not JobTexts.has(SummaryQueue.TEXT_SOURCE, lost['hash'])
+
+def test_lost_job_without_stored_text_fails(monkeypatch, tmp_path):
+    setup_queue(monkeypatch, tmp_path, [])
+    lost = {'id': 'early-loss', 'text': 'Never stored.', 'hash': SummaryCache.content_hash('Never stored.'),
+            'method': 'extractive', 'length': 'short', 'submitted_at': time.time()}
+    SummaryQueue._save(lost, 'queued')
+    monkeypatch.setattr(SummaryQueue, 'STALE_SECONDS', 0)
+    status = SummaryQueue.status('early-loss')
+    assert (status['status'], status['error']) == ('error', 'Job was lost')
+    assert SummaryQueue.live.get('early-loss') is None
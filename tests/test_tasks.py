@@ -0,0 +1,19 @@
+import fcntl
+
+import pytest
+
+from app import tasks
+
+def test_only_one_process_is_elected(tmp_path, monkeypatch):
+    monkeypatch.setattr(tasks, '_election_file', None)
+    assert tasks.elect_scheduler_process(str(tmp_path))
+    assert tasks.elect_scheduler_process(str(tmp_path))  # still ours
+
+    # Another process (another open of the file) can't take the lock
+    with open(tmp_path / 'scheduler.lock', 'a') as other:
+        with pytest.raises(OSError):
+            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        # Once the elected process is gone, the next one to ask wins
+        tasks._election_file.close()
+        fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)